@@ -1,12 +1,27 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: scripts/batch_processor.py
-# Description: Batch processes files in test_samples to verify stability.
+# Description: Headless batch tools.
+#   check  : parses files in test_samples to verify stability (default).
+#   import : ingests a directory of PDF/EPUB books into the library without
+#            the GUI. Files are parsed and saved to folders in a process pool
+#            (--jobs N); the main process is the single DB writer. Every
+#            finished file is appended to a JSONL manifest, so an interrupted
+#            run resumes where it stopped.
+#
+#   Usage:
+#     python scripts/batch_processor.py
+#     python scripts/batch_processor.py import ./books --output ./library --jobs 8
 # --------------------------------------------------------------------------------
 
 import sys
 import os
-import glob
+import json
+import time
+import argparse
+import itertools
+import traceback
+import concurrent.futures
 from pathlib import Path
 
 # Force UTF-8 for batch processing output
@@ -17,15 +32,26 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 
 from extract_app.core import epub_parser, pdf_parser
 
+SUPPORTED_EXTENSIONS = ('.pdf', '.epub')
+MANIFEST_NAME = "batch_manifest.jsonl"
+BOOK_DIR_MARKER = ".source"  # Source file that owns a book folder
+
+
+def parse_file(filepath):
+    """Dispatch to the right parser by extension (None for unsupported formats)."""
+    ext = Path(filepath).suffix.lower()
+    if ext == '.pdf':
+        return pdf_parser.parse_pdf(filepath)
+    if ext == '.epub':
+        return epub_parser.parse_epub(filepath)
+    return None
+
+
 def process_file(filepath):
     print(f"Processing: {filepath}")
-    ext = Path(filepath).suffix.lower()
     try:
-        if ext == '.pdf':
-            res = pdf_parser.parse_pdf(filepath)
-        elif ext == '.epub':
-            res = epub_parser.parse_epub(filepath)
-        else:
+        res = parse_file(filepath)
+        if res is None:
             print("  [SKIP] Unsupported format")
             return
 
@@ -43,7 +69,7 @@ def process_file(filepath):
                 # item['content'] is list of articles (dicts) if structured, or raw tuples?
                 # Dependent on parser.
                 # PDF: structure_pdf_articles returns list of Dict.
-                
+
                 # Check directly
                 c_list = item.get('content', [])
                 if isinstance(c_list, list) and c_list and isinstance(c_list[0], dict) and 'subtitle' in c_list[0]:
@@ -51,23 +77,220 @@ def process_file(filepath):
                 else:
                      # Maybe raw content or just 1 article
                      total_articles += 1
-                     
+
             print(f"         Total sub-articles estimated: {total_articles}")
 
     except Exception as e:
         print(f"  [CRASH] Exception: {e}")
 
-def main():
+
+def check_samples():
     test_dir = Path("test_samples")
     if not test_dir.exists():
         print(f"Directory not found: {test_dir}")
         return
 
     files = list(test_dir.glob("**/*.pdf")) + list(test_dir.glob("**/*.epub"))
-    
+
     print(f"Found {len(files)} files to test.")
     for f in files:
         process_file(str(f))
 
+
+# ─────────────────────────────────────────────────────────────────────
+# Batch import
+# ─────────────────────────────────────────────────────────────────────
+
+def _file_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_manifest(manifest_path: Path) -> dict:
+    """Latest manifest entry per source path (later lines win)."""
+    entries = {}
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Truncated last line after a crash
+                entries[entry.get("path")] = entry
+    return entries
+
+
+def claim_book_dir(output_dir: Path, book_title: str, source: str) -> str:
+    """
+    Pick the folder name for *source*: the title stem, or "stem (2)", "stem (3)"...
+    when another source file already owns it. The claim is an O_EXCL marker
+    file, so workers never share (and prune) each other's folders; re-importing
+    the same source reuses its folder.
+    """
+    stem = Path(book_title).stem or "book"
+    for n in itertools.count(1):
+        name = stem if n == 1 else f"{stem} ({n})"
+        book_dir = output_dir / name
+        book_dir.mkdir(parents=True, exist_ok=True)
+        marker = book_dir / BOOK_DIR_MARKER
+        try:
+            fd = os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            try:
+                owner = marker.read_text(encoding='utf-8').strip()
+            except OSError:
+                owner = ""
+            if owner == source:
+                return name
+            continue
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(source)
+        return name
+
+
+def ingest_worker(filepath: str, output_dir: str) -> dict:
+    """
+    Runs in a worker process: parse + save_as_folders (+ cover copy).
+    The parsed tree is returned so the parent can write it to the DB.
+    """
+    from extract_app.core.storage_handler import save_as_folders, copy_cover
+
+    start = time.time()
+    try:
+        res = parse_file(filepath)
+        if res is None:
+            return {"status": "skipped", "error": "Unsupported format"}
+        if res.get('error'):
+            return {"status": "failed", "error": str(res['error'])}
+
+        content = res.get('content', [])
+        if len(content) == 1 and content[0].get('title') == 'Error':
+            return {"status": "failed", "error": str(content[0].get('content'))}
+
+        metadata = res.get('metadata', {})
+        book_title = metadata.get('title', '') or Path(filepath).stem
+        dir_name = claim_book_dir(Path(output_dir), book_title, str(Path(filepath).resolve()))
+        # Already one process per book: convert images inline, not in a nested pool
+        ok, book_dir = save_as_folders(content, Path(output_dir), book_title, image_workers=1,
+                                       book_dir_name=dir_name)
+        if not ok:
+            return {"status": "failed", "error": book_dir}
+
+        return {
+            "status": "parsed",
+            "book_title": book_title,
+            "author": metadata.get('author', 'Unknown'),
+            "published_year": metadata.get('published_year', ''),
+            "cover_path": copy_cover(metadata.get('cover_image_path', ''), Path(book_dir)),
+            "book_dir": book_dir,
+            "content": content,
+            "parse_seconds": round(time.time() - start, 3),
+        }
+    except Exception as e:
+        traceback.print_exc()
+        return {"status": "failed", "error": str(e)}
+
+
+def import_library(source_dir: Path, output_dir: Path, jobs: int, db_path: str = None,
+                   manifest_path: Path = None, retry_failed: bool = False) -> int:
+    """
+    Ingest every PDF/EPUB under *source_dir*. Returns the number of failed files.
+    """
+    from extract_app.core.database import DatabaseManager
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = manifest_path or (output_dir / MANIFEST_NAME)
+    done = load_manifest(manifest_path)
+
+    files = sorted(p for p in source_dir.rglob("*") if p.suffix.lower() in SUPPORTED_EXTENSIONS)
+    pending = []
+    for path in files:
+        entry = done.get(str(path.resolve()))
+        unchanged = entry and entry.get("size") == path.stat().st_size and \
+            entry.get("mtime") == int(path.stat().st_mtime)
+        if unchanged and (entry["status"] in ("done", "skipped") or
+                          (entry["status"] == "failed" and not retry_failed)):
+            continue
+        pending.append(path)
+
+    print(f"Found {len(files)} books, {len(files) - len(pending)} already in manifest, "
+          f"{len(pending)} to import with {jobs} job(s).")
+    print(f"Manifest: {manifest_path}")
+    if not pending:
+        return 0
+
+    db = DatabaseManager(db_path) if db_path else DatabaseManager()
+    failed = 0
+    start = time.time()
+
+    with open(manifest_path, 'a', encoding='utf-8') as manifest, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(ingest_worker, str(path), str(output_dir)): path for path in pending}
+        for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # Worker process died
+                result = {"status": "failed", "error": f"Worker crashed: {e}"}
+
+            entry = {"path": str(path.resolve()), **_file_signature(path), "status": result["status"]}
+            if result["status"] == "parsed":
+                # Single writer: all DB inserts happen here, one transaction per book
+                book_id = db.save_book_batch(
+                    result["book_title"], result["author"], str(path), result["cover_path"],
+                    result["content"], result["published_year"],
+                )
+                if book_id == -1:
+                    entry.update(status="failed", error="Database save failed")
+                else:
+                    entry.update(status="done", book_id=book_id, book_dir=result["book_dir"],
+                                 parse_seconds=result["parse_seconds"])
+            else:
+                entry["error"] = result.get("error", "")
+
+            if entry["status"] == "failed":
+                failed += 1
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+
+            elapsed = time.time() - start
+            rate = completed / elapsed * 60 if elapsed > 0 else 0.0
+            eta = (len(pending) - completed) / (completed / elapsed) if completed else 0.0
+            label = {"done": "OK  ", "skipped": "SKIP", "failed": "FAIL"}[entry["status"]]
+            detail = f" - {entry['error']}" if entry["status"] == "failed" else ""
+            print(f"[{completed}/{len(pending)}] {label} {path.name}{detail} "
+                  f"| {rate:.1f} books/min | ETA {eta / 60:.1f} min", flush=True)
+
+    print(f"Finished in {(time.time() - start) / 60:.1f} min: "
+          f"{len(pending) - failed} imported/skipped, {failed} failed.")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ExtractPDF-EPUB batch tools")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("check", help="Parse test_samples and report PASS/FAIL (default)")
+
+    imp = sub.add_parser("import", help="Import a directory of books into the library")
+    imp.add_argument("source", help="Directory containing .pdf/.epub files (searched recursively)")
+    imp.add_argument("--output", required=True, help="Library folder for extracted books")
+    imp.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel worker processes")
+    imp.add_argument("--db", help="SQLite database path (default: the app database)")
+    imp.add_argument("--manifest", help=f"Manifest file (default: <output>/{MANIFEST_NAME})")
+    imp.add_argument("--retry-failed", action="store_true", help="Retry files that failed previously")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        failed = import_library(
+            Path(args.source), Path(args.output), max(1, args.jobs), args.db,
+            Path(args.manifest) if args.manifest else None, args.retry_failed,
+        )
+        sys.exit(1 if failed else 0)
+    check_samples()
+
+
 if __name__ == "__main__":
     main()
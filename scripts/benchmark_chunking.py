@@ -0,0 +1,74 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: scripts/benchmark_chunking.py
+# Description: Times ChunkingStrategy (protect → chunk → restore) on a large
+#              synthetic chapter with thousands of image anchors.
+#              Usage: python scripts/benchmark_chunking.py [size_mb] [anchors]
+# --------------------------------------------------------------------------------
+
+import sys
+import os
+import time
+import random
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from extract_app.core.chunking_strategy import ChunkingStrategy
+
+
+def build_chapter(size_bytes: int, n_anchors: int, seed: int = 42) -> str:
+    """Build a Markdown chapter of ~size_bytes with n_anchors [Image: ...] tags."""
+    rng = random.Random(seed)
+    words = ["the", "wild", "boar", "forest", "species", "habitat", "snout", "roots", "sow", "litter"]
+    paragraphs = []
+    size = 0
+    para_idx = 0
+    while size < size_bytes:
+        if para_idx % 40 == 0:
+            para = f"## Section {para_idx // 40 + 1}"
+        else:
+            para = " ".join(rng.choice(words) for _ in range(rng.randint(40, 160))) + "."
+        paragraphs.append(para)
+        size += len(para) + 2
+        para_idx += 1
+
+    # Spread anchors evenly between paragraphs
+    step = max(1, len(paragraphs) // max(1, n_anchors))
+    for i in range(n_anchors):
+        pos = min(len(paragraphs), (i + 1) * step)
+        paragraphs.insert(pos + i, f"[Image: fig_{i:05d}.webp]")
+    return "\n\n".join(paragraphs)
+
+
+def timed(label: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<18} {elapsed * 1000:10.1f} ms")
+    return result, elapsed
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    n_anchors = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    chunker = ChunkingStrategy()
+
+    text = build_chapter(int(size_mb * 1024 * 1024), n_anchors)
+    print(f"Chapter: {len(text) / 1024 / 1024:.2f} MB, {n_anchors} anchors")
+
+    (protected, mapping), t_protect = timed("protect_anchors", chunker.protect_anchors, text)
+    chunks, t_chunk = timed("chunk_text", chunker.chunk_text, protected, 15000)
+    joined = "\n\n".join(chunks)
+    restored, t_restore = timed("restore_anchors", chunker.restore_anchors, joined, mapping)
+
+    total = t_protect + t_chunk + t_restore
+    print(f"  {'total':<18} {total * 1000:10.1f} ms  ({len(text) / 1024 / 1024 / total:.1f} MB/s)")
+    print(f"  chunks: {len(chunks)}, placeholders: {len(mapping)}")
+
+    missing = sum(1 for tag in mapping.values() if tag not in restored)
+    print("Roundtrip: OK" if missing == 0 else f"Roundtrip: {missing} anchors missing!")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,20 @@ import sys
 import os
 from llama_cpp import Llama
 
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from extract_app.core.local_genai import LocalGenAI, LocalTranslationService
+
+PREFIX_BENCH_CHUNKS = [
+    "The wild boar is the ancestor of the domestic pig.",
+    "A sow usually gives birth to a litter of four to six piglets.",
+    "Pigs use their snout to dig for roots, bulbs and insects.",
+    "Piglets are weaned at three to five weeks of age.",
+    "Boars mark their territory by rubbing against tree trunks.",
+    "Mong Cai sows are valued for their large litters.",
+]
+
 def run_benchmark(model_path, n_gpu_layers, label):
     print(f"\n{'='*50}")
     print(f"Running Benchmark: {label}")
@@ -54,6 +68,88 @@ def run_benchmark(model_path, n_gpu_layers, label):
         print(f"Error running benchmark: {e}")
         return 0
 
+def run_prefix_cache_benchmark(model_path, n_gpu_layers=0):
+    """
+    Compare per-chunk latency with and without the saved instruction-prefix states.
+
+    llama-cpp-python already reuses the common prefix of consecutive calls, so
+    chunks alternate between two styles: without saved states every call
+    re-evaluates its instruction prefix, with them the prefix is restored.
+    """
+    print(f"\n{'='*50}")
+    print("Running Benchmark: Instruction prefix KV cache")
+    print(f"{'='*50}")
+
+    engine = LocalGenAI()
+    engine.load_model(model_path, n_gpu_layers=n_gpu_layers)
+    service = LocalTranslationService()
+    instructions = [
+        service.build_instruction("Bạn là biên dịch viên chuyên nghiệp. Dịch sát nghĩa, văn phong tự nhiên."),
+        service.build_instruction("Bạn là biên tập viên khoa học. Dịch chính xác thuật ngữ, câu văn ngắn gọn."),
+    ]
+
+    results = {}
+    for enabled in (False, True):
+        engine.prefix_cache_enabled = enabled
+        engine.clear_prefix_cache()
+        timings = []
+        for i, chunk in enumerate(PREFIX_BENCH_CHUNKS):
+            start = time.time()
+            engine.generate_response(instructions[i % 2], chunk, max_tokens=64)
+            timings.append(time.time() - start)
+        # The first call of each style primes its state; steady state is what matters per chunk
+        steady = timings[2:] or timings
+        results[enabled] = sum(steady) / len(steady)
+        label = "ON " if enabled else "OFF"
+        print(f"  Prefix cache {label}: {results[enabled]:.2f} s/chunk "
+              f"(reused {engine.last_usage.get('cached_prefix_tokens', 0)} tokens)")
+
+    engine.unload_model()
+    if results[True] > 0:
+        print(f"  Per-chunk speedup: {results[False] / results[True]:.2f}x")
+    return results
+
+
+SPECULATIVE_BENCH_CHUNK = (
+    "## 3.2 Litter size\n\n"
+    "In Table 4, sows of the Mong Cai breed (__IMG_001__) produced 10.8 ± 1.2 piglets "
+    "per litter, compared with 8.4 ± 0.9 for the Large White x Mong Cai cross. "
+    "**Mong Cai** sows reached puberty at 95 days and a weight of 25 kg."
+)
+
+
+def run_speculative_benchmark(model_path, n_gpu_layers=0, draft="prompt_lookup"):
+    """Compare translation tokens/sec with and without speculative decoding."""
+    print(f"\n{'='*50}")
+    print(f"Running Benchmark: Speculative decoding ({os.path.basename(draft)})")
+    print(f"{'='*50}")
+
+    instruction = LocalTranslationService().build_instruction()
+    results = {}
+    for draft_model in (None, draft):
+        engine = LocalGenAI()
+        engine.load_model(model_path, n_gpu_layers=n_gpu_layers, draft_model=draft_model)
+        engine.generate_response(instruction, "Warm up.", max_tokens=8)
+
+        start = time.time()
+        engine.generate_response(instruction, SPECULATIVE_BENCH_CHUNK, max_tokens=256, temperature=0.0)
+        elapsed = time.time() - start
+        usage = engine.last_usage
+        results[draft_model] = usage.get('completion_tokens', 0) / elapsed if elapsed > 0 else 0
+
+        label = "ON " if draft_model else "OFF"
+        line = f"  Speculative {label}: {results[draft_model]:.2f} tokens/sec"
+        if draft_model and usage.get('draft_proposed'):
+            acceptance = usage['draft_accepted'] / usage['draft_proposed']
+            line += f" | acceptance {acceptance:.0%} ({usage['draft_accepted']}/{usage['draft_proposed']} drafted tokens)"
+        print(line)
+        engine.unload_model()
+
+    if results[None] > 0:
+        print(f"  Speedup: {results[draft] / results[None]:.2f}x")
+    return results
+
+
 def main():
     print("PDF/EPUB Extractor - GPU Benchmark Tool")
     print("---------------------------------------")
@@ -69,11 +165,11 @@ def main():
         return
 
     # 1. Run CPU Benchmark
-    print("\n[1/2] Starting CPU Benchmark (n_gpu_layers=0)...")
+    print("\n[1/4] Starting CPU Benchmark (n_gpu_layers=0)...")
     cpu_speed = run_benchmark(model_path, n_gpu_layers=0, label="CPU ONLY")
 
     # 2. Run GPU Benchmark
-    print("\n[2/2] Starting GPU Benchmark (n_gpu_layers=-1)...")
+    print("\n[2/4] Starting GPU Benchmark (n_gpu_layers=-1)...")
     gpu_speed = run_benchmark(model_path, n_gpu_layers=-1, label="GPU (CUDA)")
 
     # Summary
@@ -95,5 +191,14 @@ def main():
     else:
         print("Could not calculate speedup due to CPU error.")
 
+    # 3. Prefix KV cache on CPU (where re-evaluating the instruction hurts most)
+    print("\n[3/4] Starting Prefix Cache Benchmark (CPU)...")
+    run_prefix_cache_benchmark(model_path, n_gpu_layers=0)
+
+    # 4. Speculative decoding (prompt lookup, or a draft GGUF given as 2nd argument)
+    draft = sys.argv[2] if len(sys.argv) > 2 else "prompt_lookup"
+    print("\n[4/4] Starting Speculative Decoding Benchmark (CPU)...")
+    run_speculative_benchmark(model_path, n_gpu_layers=0, draft=draft)
+
 if __name__ == "__main__":
     main()
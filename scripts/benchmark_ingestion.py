@@ -0,0 +1,379 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: scripts/benchmark_ingestion.py
+# Description: End-to-end ingestion benchmark on synthetic PDF/EPUB books.
+#              Generates books of configurable size (pages, images, ToC entries,
+#              ToC depth), then times parse_pdf / parse_epub, save_as_folders and
+#              save_book_batch separately, with peak RSS and disk bytes per stage.
+#              Results are JSON; --compare exits non-zero on regressions so it
+#              can gate parser changes.
+#
+#              Usage:
+#                python scripts/benchmark_ingestion.py --preset medium --output ingest.json
+#                python scripts/benchmark_ingestion.py --pages 400 --images 80 --toc-depth 3
+#                python scripts/benchmark_ingestion.py --compare ingest.json --max-regression 15
+# --------------------------------------------------------------------------------
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from extract_app.core import epub_parser, pdf_parser
+from extract_app.core.storage_handler import save_as_folders
+from extract_app.core.database import DatabaseManager
+
+PRESETS = {
+    "small": {"pages": 20, "images": 5, "toc_entries": 8, "toc_depth": 2},
+    "medium": {"pages": 150, "images": 40, "toc_entries": 60, "toc_depth": 3},
+    "large": {"pages": 600, "images": 200, "toc_entries": 250, "toc_depth": 4},
+}
+
+STAGES = ["parse", "save_as_folders", "save_book_batch"]
+
+WORDS = ["the", "wild", "boar", "forest", "species", "habitat", "snout", "roots", "sow",
+         "litter", "piglet", "feed", "weight", "breed", "was", "and", "of", "in", "with"]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Synthetic books
+# ─────────────────────────────────────────────────────────────────────
+
+def toc_levels(n_entries: int, depth: int, rng: random.Random):
+    """Levels for n ToC entries: a level-1 chapter every few entries, nested up to depth."""
+    levels = []
+    per_chapter = max(1, depth * 2)
+    for i in range(n_entries):
+        if i % per_chapter == 0 or depth <= 1:
+            levels.append(1)
+        else:
+            levels.append(rng.randint(2, min(depth, levels[-1] + 1)))
+    return levels
+
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def image_png(rng: random.Random, size: int) -> bytes:
+    """Noise PNG (incompressible, so file sizes are realistic)."""
+    from PIL import Image
+    img = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def build_pdf(path: Path, cfg: dict, rng: random.Random) -> None:
+    import fitz
+
+    doc = fitz.open()
+    pages = cfg["pages"]
+    levels = toc_levels(cfg["toc_entries"], cfg["toc_depth"], rng)
+    heading_pages = {1 + i * pages // max(1, len(levels)): i for i in range(len(levels))}
+    image_pages = {i * pages // max(1, cfg["images"]) for i in range(cfg["images"])}
+    toc = []
+
+    for page_no in range(1, pages + 1):
+        page = doc.new_page()
+        y = 72
+        if page_no in heading_pages:
+            idx = heading_pages[page_no]
+            title = f"Section {idx + 1}"
+            page.insert_text((72, y), title, fontsize=18 - 2 * levels[idx])
+            toc.append([levels[idx], title, page_no])
+            y += 30
+        if page_no - 1 in image_pages:
+            page.insert_image(fitz.Rect(72, y, 272, y + 200), stream=image_png(rng, cfg["image_px"]))
+            y += 215
+        box = fitz.Rect(72, y, page.rect.width - 72, page.rect.height - 72)
+        page.insert_textbox(box, "\n\n".join(paragraph(rng) for _ in range(4)), fontsize=10)
+
+    if toc:
+        doc.set_toc(toc)
+    doc.set_metadata({"title": "Synthetic PDF", "author": "Benchmark"})
+    doc.save(str(path))
+    doc.close()
+
+
+def build_epub(path: Path, cfg: dict, rng: random.Random) -> None:
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier("benchmark-epub")
+    book.set_title("Synthetic EPUB")
+    book.add_author("Benchmark")
+
+    levels = toc_levels(cfg["toc_entries"], cfg["toc_depth"], rng)
+    pages_per_entry = max(1, cfg["pages"] // max(1, len(levels)))
+    image_every = max(1, len(levels) * pages_per_entry // max(1, cfg["images"]))
+
+    images = []
+    for i in range(cfg["images"]):
+        item = epub.EpubImage(uid=f"img{i}", file_name=f"images/img_{i:04d}.png",
+                              media_type="image/png", content=image_png(rng, cfg["image_px"]))
+        book.add_item(item)
+        images.append(item)
+
+    # One XHTML file per level-1 chapter; nested entries anchor into it (#sec-N)
+    chapters, bodies, links = [], [], []
+    page_counter = 0
+    for idx, lvl in enumerate(levels):
+        if lvl == 1:
+            chapters.append(epub.EpubHtml(title=f"Section {idx + 1}",
+                                          file_name=f"chap_{len(chapters):03d}.xhtml", lang="en"))
+            bodies.append([])
+        anchor = f"sec-{idx}"
+        parts = [f'<h{min(lvl, 6)} id="{anchor}">Section {idx + 1}</h{min(lvl, 6)}>']
+        for _ in range(pages_per_entry):
+            if images and page_counter % image_every == 0 and page_counter // image_every < len(images):
+                img = images[page_counter // image_every]
+                parts.append(f'<p><img src="{img.file_name}" alt="Figure {page_counter}"/></p>')
+            parts.extend(f"<p>{paragraph(rng)}</p>" for _ in range(4))
+            page_counter += 1
+        bodies[-1].extend(parts)
+        links.append((lvl, epub.Link(f"{chapters[-1].file_name}#{anchor}", f"Section {idx + 1}", anchor)))
+
+    for chapter, body in zip(chapters, bodies):
+        chapter.content = "<html><body>" + "".join(body) + "</body></html>"
+        book.add_item(chapter)
+
+    def nest(entries, level):
+        """Turn (level, link) pairs into ebooklib's nested (Section, [children]) ToC."""
+        result = []
+        while entries and entries[0][0] >= level:
+            lvl, link = entries.pop(0)
+            children = nest(entries, lvl + 1)
+            result.append((epub.Section(link.title, link.href), children) if children else link)
+        return result
+
+    book.toc = nest(list(links), 1)
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav"] + chapters
+    epub.write_epub(str(path), book)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Measurement
+# ─────────────────────────────────────────────────────────────────────
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class PeakRssSampler:
+    """Samples RSS on a background thread; use as a context manager around one stage."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_rss = self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+        return False
+
+
+def dir_bytes(path: Path) -> int:
+    if not path.exists():
+        return 0
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def count_nodes(nodes) -> int:
+    return sum(1 + count_nodes(n.get("children", [])) for n in nodes)
+
+
+def timed_stage(fn):
+    with PeakRssSampler() as rss:
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+    return result, {"seconds": seconds, "peak_rss_bytes": rss.peak, "rss_growth_bytes": rss.peak - rss.start_rss}
+
+
+def bench_book(kind: str, source: Path, workdir: Path, repeat: int) -> dict:
+    """Parse + save one book *repeat* times; report the median of each stage."""
+    parse_fn = pdf_parser.parse_pdf if kind == "pdf" else epub_parser.parse_epub
+    runs = []
+    for i in range(repeat):
+        run_dir = workdir / f"run_{i}"
+        run_dir.mkdir()
+        os.chdir(run_dir)  # Parsers write images under ./temp/images
+
+        parsed, parse_stats = timed_stage(lambda: parse_fn(str(source)))
+        parse_stats["temp_bytes"] = dir_bytes(run_dir / "temp")
+        content = parsed.get("content", [])
+        metadata = parsed.get("metadata", {})
+
+        out_dir = run_dir / "library"
+        out_dir.mkdir()
+        (ok, book_dir), save_stats = timed_stage(
+            lambda: save_as_folders(content, out_dir, source.name)
+        )
+        if not ok:
+            raise SystemExit(f"save_as_folders failed: {book_dir}")
+        save_stats["disk_bytes"] = dir_bytes(out_dir)
+
+        db = DatabaseManager(str(run_dir / "library.db"))
+        book_id, db_stats = timed_stage(lambda: db.save_book_batch(
+            metadata.get("title", source.stem), metadata.get("author", ""), str(source),
+            metadata.get("cover_image_path", ""), content, metadata.get("published_year", ""),
+        ))
+        if book_id == -1:
+            raise SystemExit("save_book_batch failed")
+        db_stats["disk_bytes"] = dir_bytes(run_dir / "library.db")
+
+        runs.append({"parse": parse_stats, "save_as_folders": save_stats,
+                     "save_book_batch": db_stats, "nodes": count_nodes(content)})
+
+    stages = {}
+    for stage in STAGES:
+        samples = [r[stage] for r in runs]
+        stages[stage] = {key: (statistics.median(s[key] for s in samples) if key == "seconds"
+                               else max(s[key] for s in samples)) for key in samples[0]}
+        stages[stage]["runs_s"] = [round(s["seconds"], 6) for s in samples]
+    return {"kind": kind, "source_bytes": source.stat().st_size, "nodes": runs[0]["nodes"], "stages": stages}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Reporting
+# ─────────────────────────────────────────────────────────────────────
+
+def mb(n: int) -> str:
+    return f"{n / 1024 / 1024:8.1f} MB"
+
+
+def print_report(results: list) -> None:
+    for book in results:
+        print(f"\n{book['kind'].upper()}: {mb(book['source_bytes']).strip()}, {book['nodes']} nodes")
+        print(f"  {'stage':<16} {'median s':>9} {'peak RSS':>12} {'RSS growth':>12} {'disk':>12}")
+        for stage in STAGES:
+            s = book["stages"][stage]
+            disk = s.get("temp_bytes", s.get("disk_bytes", 0))
+            print(f"  {stage:<16} {s['seconds']:>9.3f} {mb(s['peak_rss_bytes']):>12} "
+                  f"{mb(s['rss_growth_bytes']):>12} {mb(disk):>12}")
+
+
+def compare(results: list, baseline_path: str, max_regression: float) -> bool:
+    """Print per-stage time deltas; return False if any stage regressed beyond the limit."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {b["kind"]: b for b in json.load(f)["results"]}
+
+    ok = True
+    print(f"\nCompared with {baseline_path} (limit +{max_regression:.0f}%):")
+    for book in results:
+        base = baseline.get(book["kind"])
+        if not base:
+            continue
+        for stage in STAGES:
+            new, old = book["stages"][stage]["seconds"], base["stages"][stage]["seconds"]
+            change = (new - old) / old * 100 if old else 0.0
+            flag = ""
+            if change > max_regression:
+                flag, ok = "  REGRESSION", False
+            print(f"  {book['kind']:<5} {stage:<16} {old:>8.3f}s -> {new:>8.3f}s  {change:+6.1f}%{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF/EPUB ingestion benchmark")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--pages", type=int)
+    parser.add_argument("--images", type=int)
+    parser.add_argument("--toc-entries", type=int, help="Number of ToC entries (anchors)")
+    parser.add_argument("--toc-depth", type=int)
+    parser.add_argument("--image-px", type=int, default=256, help="Width/height of generated images")
+    parser.add_argument("--formats", default="pdf,epub", help="Comma-separated: pdf,epub")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=15.0,
+                        help="Allowed slowdown in percent before --compare fails")
+    args = parser.parse_args()
+
+    cfg = dict(PRESETS[args.preset])
+    for key in ("pages", "images", "toc_entries", "toc_depth"):
+        if getattr(args, key) is not None:
+            cfg[key] = getattr(args, key)
+    cfg["image_px"] = args.image_px
+
+    cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        try:
+            for kind in [k.strip() for k in args.formats.split(",") if k.strip()]:
+                source = workdir / f"synthetic.{kind}"
+                builder = build_pdf if kind == "pdf" else build_epub
+                builder(source, cfg, random.Random(args.seed))
+                print(f"Generated {source.name}: {mb(source.stat().st_size).strip()}")
+                book_dir = workdir / kind
+                book_dir.mkdir()
+                results.append(bench_book(kind, source, book_dir, args.repeat))
+        finally:
+            os.chdir(cwd)
+
+    print_report(results)
+
+    if args.output:
+        payload = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": cfg,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
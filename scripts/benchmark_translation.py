@@ -0,0 +1,357 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: scripts/benchmark_translation.py
+# Description: Reproducible benchmark of the real TranslationService.translate_text
+#              pipeline on a fixed synthetic corpus.
+#              - cloud: Gemini replaced by a deterministic stub with simulated latency
+#              - local: the configured GGUF model (pass --model)
+#              Reports per-stage timings, tokens/sec and p50/p95 chunk latency,
+#              and writes JSON so runs can be compared (--compare baseline.json).
+#
+#              Usage:
+#                python scripts/benchmark_translation.py --engine cloud --output bench.json
+#                python scripts/benchmark_translation.py --engine local --model model.gguf
+#                python scripts/benchmark_translation.py --compare bench.json
+# --------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from extract_app.core.settings_manager import SettingsManager
+from extract_app.core.glossary_manager import GlossaryManager
+from extract_app.core.token_budget import TokenEstimator
+from extract_app.core.translation_service import TranslationService
+
+# Stages in pipeline order (keys of the "stages" section of the JSON results)
+STAGES = [
+    "protect_anchors",
+    "chunking",
+    "glossary",
+    "prompt_build",
+    "inference",
+    "clean_output",
+    "anchor_restore",
+]
+
+# Fixed corpus: (chapter title, approx. characters, image anchors)
+CORPUS = [
+    ("Short note", 4_000, 2),
+    ("Breeding", 25_000, 12),
+    ("Housing and feeding", 60_000, 30),
+    ("Diseases", 120_000, 60),
+]
+
+GLOSSARY = {
+    "wild boar": "lợn rừng",
+    "sow": "lợn nái",
+    "litter": "lứa đẻ",
+    "snout": "mõm",
+    "habitat": "môi trường sống",
+    "species": "loài",
+    "piglet": "lợn con",
+    "farrowing": "đẻ",
+}
+FILLER_GLOSSARY_TERMS = 500  # Unmatched terms that still have to be scanned
+
+WORDS = ["the", "wild boar", "forest", "species", "habitat", "snout", "roots", "sow", "litter",
+         "piglet", "farrowing", "feed", "weight", "days", "breed", "was", "and", "of", "in"]
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Corpus / fixtures
+# ─────────────────────────────────────────────────────────────────────
+
+def build_chapter(title: str, size: int, n_anchors: int, rng: random.Random) -> str:
+    """Deterministic Markdown chapter with ## sections and [Image: ...] anchors."""
+    paragraphs = [f"# {title}"]
+    length = 0
+    while length < size:
+        if len(paragraphs) % 12 == 1:
+            para = f"## Section {len(paragraphs) // 12 + 1}"
+        else:
+            sentence_count = rng.randint(2, 6)
+            para = " ".join(
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 24))).capitalize() + "."
+                for _ in range(sentence_count)
+            )
+        paragraphs.append(para)
+        length += len(para) + 2
+
+    step = max(1, len(paragraphs) // max(1, n_anchors))
+    for i in range(n_anchors):
+        pos = min(len(paragraphs), 1 + (i + 1) * step + i)
+        paragraphs.insert(pos, f"[Image: {title.lower().replace(' ', '_')}_{i:03d}.webp]")
+    return "\n\n".join(paragraphs)
+
+
+def build_corpus(seed: int):
+    rng = random.Random(seed)
+    return [(title, build_chapter(title, size, anchors, rng)) for title, size, anchors in CORPUS]
+
+
+class StubCloudClient:
+    """
+    Drop-in for CloudAIClient: no network, deterministic output, simulated latency
+    of latency_ms + ms_per_token * output tokens per chunk.
+    """
+
+    def __init__(self, prompt_builder, latency_ms: float, ms_per_token: float):
+        self.prompt_builder = prompt_builder
+        self.token_estimator = TokenEstimator()
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.api_key = "benchmark"
+        self.is_ready = True
+
+    def generate(self, prompt: str, text: str) -> str:
+        """Simulated model call: 'translates' by echoing the chunk."""
+        output_tokens = self.token_estimator.count(text) * self.token_estimator.output_ratio
+        time.sleep((self.latency_ms + self.ms_per_token * output_tokens) / 1000.0)
+        return text
+
+    def translate_chunk(self, text, glossary_str="", on_token=None, should_stop=None):
+        prompt = self.prompt_builder.build_translation_prompt(text, glossary_str)
+        raw = self.generate(prompt, text)
+        if on_token:
+            on_token(raw)
+        return self.prompt_builder.clean_output(raw), None
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Instrumentation
+# ─────────────────────────────────────────────────────────────────────
+
+class StageTimer:
+    """Collects wall-clock durations per stage from wrapped methods (thread-safe)."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, obj, attr: str, stage: str) -> None:
+        """Replace obj.attr (instance level) with a timed version."""
+        original = getattr(obj, attr)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(obj, attr, timed)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+
+def percentile(values, pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * pct / 100.0
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "total_s": round(sum(values), 6),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Benchmark
+# ─────────────────────────────────────────────────────────────────────
+
+def build_service(args, workdir: str, timer: StageTimer):
+    settings = SettingsManager(os.path.join(workdir, "settings.json"))
+    settings.settings.update({
+        "translation_engine": args.engine,
+        "local_model_path": args.model or "",
+        "n_gpu_layers": args.n_gpu_layers,
+        "stream_translation": False,
+    })
+
+    service = TranslationService(settings)
+
+    glossary = GlossaryManager(os.path.join(workdir, "glossary.json"))
+    terms = dict(GLOSSARY)
+    terms.update({f"filler term {i:04d}": f"thuật ngữ {i:04d}" for i in range(FILLER_GLOSSARY_TERMS)})
+    glossary.bulk_add_terms(terms)
+    service.glossary_manager = glossary
+
+    if args.engine == "cloud":
+        service.cloud_client = StubCloudClient(service.prompt_builder, args.cloud_latency_ms, args.cloud_ms_per_token)
+        timer.wrap(service.cloud_client, "generate", "inference")
+        count_output = service.cloud_client.token_estimator.count
+    else:
+        err = service._ensure_local_model()
+        if err:
+            raise SystemExit(f"Local engine unavailable: {err}")
+        engine = service.local_service.engine
+        timer.wrap(service.local_service, "build_instruction", "prompt_build")
+        timer.wrap(engine, "build_prompt", "prompt_build")
+        timer.wrap(engine, "generate_response", "inference")
+        count_output = engine.count_tokens
+
+    timer.wrap(service.chunker, "protect_anchors", "protect_anchors")
+    timer.wrap(service.chunker, "chunk_text", "chunking")
+    timer.wrap(service.chunker, "restore_anchors", "anchor_restore")
+    timer.wrap(service.glossary_manager, "get_relevant_glossary_string", "glossary")
+    timer.wrap(service.prompt_builder, "build_translation_prompt", "prompt_build")
+    timer.wrap(service.prompt_builder, "clean_output", "clean_output")
+    chunk_attr = "_translate_cloud_chunk" if args.engine == "cloud" else "_translate_local_chunk"
+    timer.wrap(service, chunk_attr, "chunk")
+    return service, count_output
+
+
+def run(args) -> dict:
+    corpus = build_corpus(args.seed)
+    timer = StageTimer()
+    chapters = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        service, count_output = build_service(args, workdir, timer)
+
+        # Warm-up pass (model caches, regex compilation) is not recorded
+        service.translate_text(corpus[0][1])
+        timer.samples.clear()
+
+        total_wall = 0.0
+        total_output_tokens = 0
+        for repeat in range(args.repeat):
+            for title, text in corpus:
+                start = time.perf_counter()
+                result = service.translate_text(text)
+                elapsed = time.perf_counter() - start
+                if result is None:
+                    raise SystemExit(f"Translation failed for chapter '{title}'")
+                output_tokens = count_output(result)
+                total_wall += elapsed
+                total_output_tokens += output_tokens
+                chapters.append({
+                    "repeat": repeat,
+                    "chapter": title,
+                    "chars": len(text),
+                    "seconds": round(elapsed, 6),
+                    "output_tokens": output_tokens,
+                })
+
+    inference_s = sum(timer.samples.get("inference", []))
+    chunk_latencies = timer.samples.get("chunk", [])
+    return {
+        "engine": args.engine,
+        "chapters": chapters,
+        "stages": {stage: summarize(timer.samples.get(stage, [])) for stage in STAGES},
+        "chunks": summarize(chunk_latencies),
+        "throughput": {
+            "wall_s": round(total_wall, 6),
+            "output_tokens": total_output_tokens,
+            "tokens_per_sec": round(total_output_tokens / total_wall, 3) if total_wall else 0.0,
+            "inference_tokens_per_sec": round(total_output_tokens / inference_s, 3) if inference_s else 0.0,
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except Exception:
+        return ""
+
+
+def print_report(results: dict) -> None:
+    print(f"\nEngine: {results['engine'].upper()}")
+    print(f"  {'stage':<16} {'count':>6} {'total s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for stage in STAGES:
+        s = results["stages"][stage]
+        print(f"  {stage:<16} {s['count']:>6} {s['total_s']:>10.3f} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f}")
+    c = results["chunks"]
+    t = results["throughput"]
+    print(f"  chunk latency    p50 {c['p50_ms']:.1f} ms | p95 {c['p95_ms']:.1f} ms ({c['count']} chunks)")
+    print(f"  throughput       {t['tokens_per_sec']:.1f} tok/s end-to-end | "
+          f"{t['inference_tokens_per_sec']:.1f} tok/s inference")
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    """Print relative changes of the headline metrics against a previous JSON run."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nCompared with {baseline_path}:")
+    for stage in STAGES:
+        new, old = current["stages"][stage]["total_s"], baseline["stages"][stage]["total_s"]
+        print(f"  {stage:<16} {old:>9.3f}s -> {new:>9.3f}s  {delta(new, old)}")
+    for key in ("p50_ms", "p95_ms"):
+        new, old = current["chunks"][key], baseline["chunks"][key]
+        print(f"  chunk {key:<10} {old:>9.1f}  -> {new:>9.1f}   {delta(new, old)}")
+    new, old = current["throughput"]["tokens_per_sec"], baseline["throughput"]["tokens_per_sec"]
+    print(f"  tokens/sec       {old:>9.1f}  -> {new:>9.1f}   {delta(new, old)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TranslationService pipeline benchmark")
+    parser.add_argument("--engine", choices=["cloud", "local"], default="cloud")
+    parser.add_argument("--model", help="GGUF model path (local engine)")
+    parser.add_argument("--n-gpu-layers", type=int, default=-1)
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cloud-latency-ms", type=float, default=40.0, help="Stub: fixed latency per call")
+    parser.add_argument("--cloud-ms-per-token", type=float, default=0.05, help="Stub: latency per output token")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    if args.engine == "local" and not args.model:
+        parser.error("--model is required for the local engine")
+
+    results = run(args)
+    print_report(results)
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.output:
+        payload = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
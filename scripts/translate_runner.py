@@ -0,0 +1,249 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: scripts/translate_runner.py
+# Description: Headless translation runner (no display needed).
+#              Queues every untranslated leaf article of one or more books,
+#              books matching a filter, or the whole library, and runs them
+#              through TranslationService via ChapterQueueManager.
+#              Progress and throughput go to stdout, as text or JSON lines.
+#
+#              Usage:
+#                python scripts/translate_runner.py --book 12 --book 15
+#                python scripts/translate_runner.py --filter "wild boar" --engine cloud --concurrency 4
+#                python scripts/translate_runner.py --all --json > run.jsonl
+#                python scripts/translate_runner.py --book 12 --limit 5 --trace run-trace.json
+#                python scripts/translate_runner.py --all --concurrency 4 --metrics-file run.prom
+# --------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from extract_app.core.database import DatabaseManager
+from extract_app.core.settings_manager import SettingsManager
+from extract_app.core.translation_service import TranslationService
+from extract_app.core.queue_manager import ChapterQueueManager, ChapterQueueItem
+from extract_app.core import metrics
+from extract_app.shared import tracing
+
+
+class RunSettings:
+    """
+    SettingsManager view with per-run overrides (e.g. --engine).
+
+    Overrides only change what get() returns; set() still goes to the wrapped
+    manager, whose dict never sees them, so settings.json keeps the GUI's values.
+    """
+
+    def __init__(self, base, overrides):
+        self._base = base
+        self._overrides = dict(overrides)
+
+    def get(self, key, default=None):
+        if key in self._overrides:
+            return self._overrides[key]
+        return self._base.get(key, default)
+
+    def __getattr__(self, name):
+        return getattr(self._base, name)
+
+
+def collect_items(db, book_ids, retranslate=False, limit=0):
+    """
+    Build queue items for the untranslated leaf articles of *book_ids* (book order).
+    Only ids and word counts are kept; the queue reads each body when it is translated.
+    """
+    items, words = [], 0
+    for book_id in book_ids:
+        details = db.get_book_details(book_id)
+        for chapter in details.get('chapters', []):
+            for article in chapter.get('articles', []):
+                if not article.get('is_leaf'):
+                    continue
+                if article.get('status') == 'translated' and not retranslate:
+                    continue
+                if article.get('word_count') == 0:
+                    continue  # Empty article
+                word_count = article.get('word_count') or 0
+                items.append(ChapterQueueItem(article['id'], article.get('subtitle', ''), word_count))
+                words += word_count
+                if limit and len(items) >= limit:
+                    return items, words
+    return items, words
+
+
+def resolve_books(db, args):
+    if args.all:
+        return [b['id'] for b in db.get_all_books()]
+    book_ids = list(args.book or [])
+    if args.filter:
+        book_ids += [b['id'] for b in db.search_books(args.filter) if b['id'] not in book_ids]
+    return book_ids
+
+
+class ProgressReporter:
+    """Prints per-article progress and running throughput (text or JSON lines)."""
+
+    def __init__(self, items, total_words, as_json=False, verbose=False):
+        self.words = {item.article_id: item.word_count for item in items}
+        self.titles = {item.article_id: item.subtitle for item in items}
+        self.total = len(items)
+        self.total_words = total_words
+        self.as_json = as_json
+        self.verbose = verbose
+        self.done = self.failed = self.words_done = 0
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict, text: str) -> None:
+        if self.as_json:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        else:
+            print(text, flush=True)
+
+    def on_item_done(self, article_id: int, success: bool) -> None:
+        with self._lock:
+            self.done += 1
+            if success:
+                self.words_done += self.words.get(article_id, 0)
+            else:
+                self.failed += 1
+            elapsed = time.time() - self.start
+            wpm = self.words_done / elapsed * 60 if elapsed > 0 else 0.0
+            remaining_words = self.total_words - self.words_done
+            eta = remaining_words / wpm * 60 if wpm > 0 else None
+            event = {
+                "event": "article_done", "article_id": article_id, "success": success,
+                "done": self.done, "total": self.total, "failed": self.failed,
+                "words_per_min": round(wpm, 1), "elapsed_s": round(elapsed, 1),
+                "eta_s": round(eta, 1) if eta is not None else None,
+            }
+            status = "OK  " if success else "FAIL"
+            eta_text = f"{eta / 60:.1f} min" if eta is not None else "?"
+            self.emit(event, f"[{self.done}/{self.total}] {status} #{article_id} "
+                             f"{self.titles.get(article_id, '')[:40]} | {wpm:.0f} words/min | ETA {eta_text}")
+
+    def on_progress(self, article_id: int, current: int, total: int, message: str) -> None:
+        if self.verbose:
+            self.emit({"event": "progress", "article_id": article_id, "current": current,
+                       "total": total, "message": message},
+                      f"    #{article_id} {message}")
+
+    def summary(self, stopped: bool) -> None:
+        elapsed = time.time() - self.start
+        wpm = self.words_done / elapsed * 60 if elapsed > 0 else 0.0
+        self.emit(
+            {"event": "summary", "done": self.done, "failed": self.failed, "total": self.total,
+             "words": self.words_done, "elapsed_s": round(elapsed, 1),
+             "words_per_min": round(wpm, 1), "stopped": stopped},
+            f"{'Stopped' if stopped else 'Finished'}: {self.done - self.failed} translated, "
+            f"{self.failed} failed, {self.total - self.done} not started "
+            f"| {self.words_done} words in {elapsed / 60:.1f} min ({wpm:.0f} words/min)",
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate books without the GUI")
+    target = parser.add_argument_group("what to translate")
+    target.add_argument("--book", type=int, action="append", help="Book id (repeatable)")
+    target.add_argument("--filter", help="Books whose title or author contains this text")
+    target.add_argument("--all", action="store_true", help="Every book in the library")
+    parser.add_argument("--engine", choices=["cloud", "local"], help="Override the configured engine")
+    parser.add_argument("--concurrency", type=int, default=1, help="Articles translated at once")
+    parser.add_argument("--retranslate", action="store_true", help="Include already translated articles")
+    parser.add_argument("--limit", type=int, default=0, help="Translate at most N articles")
+    parser.add_argument("--db", help="SQLite database path (default: the app database)")
+    parser.add_argument("--settings", help="settings.json path (default: the app settings)")
+    parser.add_argument("--json", action="store_true", help="Emit JSON lines instead of text")
+    parser.add_argument("--verbose", action="store_true", help="Also report per-chunk progress")
+    parser.add_argument("--trace", help="Write a Chrome trace (chrome://tracing) of the run to this file")
+    parser.add_argument("--metrics-file", help="Keep Prometheus metrics in this file (rewritten every 15 s and at the end)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    if not (args.book or args.filter or args.all):
+        parser.error("choose --book, --filter or --all")
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    if args.trace:
+        tracing.enable(args.trace)  # Saved at exit
+    if args.metrics_file:
+        metrics.REGISTRY.start_textfile_writer(args.metrics_file)
+    if args.metrics_port:
+        metrics.REGISTRY.serve(args.metrics_port)
+
+    db = DatabaseManager(args.db) if args.db else DatabaseManager()
+    settings = SettingsManager(args.settings) if args.settings else SettingsManager()
+    if args.engine:
+        settings = RunSettings(settings, {"translation_engine": args.engine})
+
+    engine = settings.get("translation_engine", "cloud")
+    concurrency = max(1, args.concurrency)
+    if engine == "local" and settings.get("local_inference_mode", "in_process") != "server" and concurrency > 1:
+        # One in-process llama.cpp context cannot serve several articles at once
+        print("Local engine runs in-process: concurrency forced to 1 (use local_inference_mode=server).",
+              file=sys.stderr)
+        concurrency = 1
+
+    items, total_words = collect_items(db, resolve_books(db, args), args.retranslate, args.limit)
+    if not items:
+        print("Nothing to translate.", file=sys.stderr)
+        return
+
+    service = TranslationService(settings)
+    if engine == "cloud" and not service.cloud_client.is_ready:
+        sys.exit("Cloud engine selected but no Gemini API key is configured.")
+
+    reporter = ProgressReporter(items, total_words, as_json=args.json, verbose=args.verbose)
+    reporter.emit(
+        {"event": "start", "articles": len(items), "words": total_words,
+         "engine": engine, "concurrency": concurrency},
+        f"Translating {len(items)} articles ({total_words} words) with {engine.upper()}, "
+        f"concurrency {concurrency}",
+    )
+
+    finished = threading.Event()
+    queue_manager = ChapterQueueManager(
+        translation_service=service,
+        db_manager=db,
+        settings_manager=settings,
+        on_item_done=reporter.on_item_done,
+        on_queue_done=finished.set,
+        on_progress=reporter.on_progress,
+        workers=concurrency,
+    )
+    for item in items:
+        queue_manager.enqueue(item)
+
+    stopped = [False]
+
+    def request_stop(*_):
+        if stopped[0]:
+            sys.exit(130)  # Second Ctrl+C: give up immediately
+        stopped[0] = True
+        print("Stopping after in-flight chunks abort (Ctrl+C again to force)...", file=sys.stderr)
+        queue_manager.stop()
+        finished.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    queue_manager.start()
+    while not finished.wait(0.5):
+        pass
+    queue_manager.join()
+
+    reporter.summary(stopped[0])
+    if args.metrics_file:
+        metrics.REGISTRY.write_textfile(args.metrics_file)
+    sys.exit(1 if reporter.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,39 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/chunking_strategy.py
-# Version: 1.0.0
+# Version: 2.0.0 (single-scan)
 # Author: Antigravity
 # Description: Pure text chunking and anchor protection helpers.
 #              No external project dependencies — easy to unit test.
+#              All operations are linear in the text size: boundaries are
+#              recorded as offsets and the original string is sliced once.
 # --------------------------------------------------------------------------------
 
 import re
-from typing import List, Tuple, Dict
+from typing import Callable, List, Tuple, Dict
+
+from ..shared import tracing
 
 
 DEFAULT_CHUNK_SIZE = 3000
 
+# Markdown ## / ### headings (but not # = article title) start a new section
+_SECTION_RE = re.compile(r'\n#{2,3} ')
+_PARAGRAPH_RE = re.compile(r'\n\n+')
+_ANCHOR_RE = re.compile(r'\[Image:.*?\]')
+_PLACEHOLDER_RE = re.compile(r'__IMG_\d{3,}__')
+# LLM mutations like _IMG_001_, __ IMG_001 __, IMG 001 (only tried for missing placeholders)
+_MUTATED_PLACEHOLDER_RE = r'(?:_+\s*)?IMG\s*_*\s*({})(?!\d)(?:\s*_+)?'
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink [start, end) so it excludes leading/trailing whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
 
 class ChunkingStrategy:
     """
@@ -20,61 +41,71 @@ class ChunkingStrategy:
     image anchor tags so the AI cannot mangle them.
     """
 
-    def chunk_text(self, text: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+    @tracing.traced("translate.chunk")
+    def chunk_text(
+        self,
+        text: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        length_fn: Callable[[str], int] = len,
+    ) -> List[str]:
         """Split text into chunks, preferring Markdown header boundaries.
 
         Strategy:
         1. Split by Markdown headings (## or ###) to keep sub-sections intact.
         2. If a sub-section exceeds chunk_size, fallback to paragraph splitting.
-        3. Merge small adjacent sections if they fit within chunk_size.
+        3. Pack the resulting units greedily into chunks of at most chunk_size.
+
+        chunk_size is measured with *length_fn* — characters by default, or
+        tokens when a tokenizer / token estimator is passed in. Every unit is
+        measured once; chunks are slices of the original text, so the original
+        separators between units are preserved.
         """
-        if len(text) <= chunk_size:
+        if length_fn(text) <= chunk_size:
             return [text]
 
-        # Step 1: Split by Markdown headings (## or ###, but not # = article title)
-        sections = re.split(r'(?=\n#{2,3} )', text)
-        sections = [s.strip() for s in sections if s.strip()]
-
-        # Step 2: Process sections — split oversized ones by paragraphs
-        processed_sections = []
-        for section in sections:
-            if len(section) <= chunk_size:
-                processed_sections.append(section)
-            else:
-                paragraphs = re.split(r'\n\n+', section)
-                sub_chunk: List[str] = []
-                sub_size = 0
-                for para in paragraphs:
-                    para = para.strip()
-                    if not para:
-                        continue
-                    if sub_size + len(para) > chunk_size and sub_chunk:
-                        processed_sections.append('\n\n'.join(sub_chunk))
-                        sub_chunk = [para]
-                        sub_size = len(para)
-                    else:
-                        sub_chunk.append(para)
-                        sub_size += len(para)
-                if sub_chunk:
-                    processed_sections.append('\n\n'.join(sub_chunk))
-
-        # Step 3: Merge small adjacent sections to reduce API calls
+        # Step 1: Section boundaries (offsets only, no copies)
+        starts = [0] + [m.start() for m in _SECTION_RE.finditer(text)]
+        ends = starts[1:] + [len(text)]
+
+        # Step 2: Units = (start, end, size); oversized sections become paragraphs
+        units: List[Tuple[int, int, int]] = []
+        for sec_start, sec_end in zip(starts, ends):
+            sec_start, sec_end = _strip_span(text, sec_start, sec_end)
+            if sec_start == sec_end:
+                continue
+            sec_size = length_fn(text[sec_start:sec_end])
+            if sec_size <= chunk_size:
+                units.append((sec_start, sec_end, sec_size))
+                continue
+
+            para_start = sec_start
+            for m in _PARAGRAPH_RE.finditer(text, sec_start, sec_end):
+                p_start, p_end = _strip_span(text, para_start, m.start())
+                if p_start < p_end:
+                    units.append((p_start, p_end, length_fn(text[p_start:p_end])))
+                para_start = m.end()
+            p_start, p_end = _strip_span(text, para_start, sec_end)
+            if p_start < p_end:
+                units.append((p_start, p_end, length_fn(text[p_start:p_end])))
+
+        # Step 3: Greedy packing — a chunk spans [first unit start, last unit end)
         chunks: List[str] = []
-        current_chunk: List[str] = []
+        chunk_start = chunk_end = -1
         current_size = 0
-
-        for section in processed_sections:
-            section_size = len(section)
-            if current_size + section_size > chunk_size and current_chunk:
-                chunks.append('\n\n'.join(current_chunk))
-                current_chunk = [section]
-                current_size = section_size
+        for start, end, size in units:
+            if chunk_start < 0:
+                chunk_start, chunk_end, current_size = start, end, size
+                continue
+            gap_size = length_fn(text[chunk_end:start])
+            if current_size + gap_size + size > chunk_size:
+                chunks.append(text[chunk_start:chunk_end])
+                chunk_start, chunk_end, current_size = start, end, size
             else:
-                current_chunk.append(section)
-                current_size += section_size
+                chunk_end = end
+                current_size += gap_size + size
 
-        if current_chunk:
-            chunks.append('\n\n'.join(current_chunk))
+        if chunk_start >= 0:
+            chunks.append(text[chunk_start:chunk_end])
 
         return chunks if chunks else [text]
 
@@ -84,30 +115,39 @@ class ChunkingStrategy:
         Returns:
             (protected_text, mapping)  where mapping[placeholder] = original_tag
         """
-        anchor_pattern = r'\[Image:.*?\]'
-        anchors = re.findall(anchor_pattern, text)
         mapping: Dict[str, str] = {}
 
-        protected_text = text
-        for i, anchor in enumerate(anchors):
-            placeholder = f"__IMG_{i:03d}__"
-            mapping[placeholder] = anchor
-            protected_text = protected_text.replace(anchor, placeholder, 1)
+        def _swap(match: "re.Match") -> str:
+            placeholder = f"__IMG_{len(mapping):03d}__"
+            mapping[placeholder] = match.group(0)
+            return placeholder
 
-        return protected_text, mapping
+        return _ANCHOR_RE.sub(_swap, text), mapping
 
     def restore_anchors(self, text: str, mapping: Dict[str, str]) -> str:
         """Restore __IMG_NNN__ placeholders back to original anchor tags.
-        Also handles 'mutated' placeholders produced by some LLMs.
+        Placeholders the LLM dropped or mutated (e.g. 'IMG 001') are then looked
+        up with a relaxed pattern, limited to those ids so literal text such as
+        "IMG 12" is left alone when every placeholder survived.
         """
-        restored = text
-        for placeholder, original in mapping.items():
-            if placeholder in restored:
-                restored = restored.replace(placeholder, original)
-            else:
-                # Relaxed regex for LLM mutations like _IMG_001_, IMG_001, etc.
-                if placeholder.startswith("__IMG_") and placeholder.endswith("__"):
-                    idx = placeholder[6:-2]
-                    pattern = r'_*\s*IMG\s*_*\s*' + idx + r'\s*_*'
-                    restored = re.sub(pattern, original, restored, flags=re.IGNORECASE)
-        return restored
+        if not mapping:
+            return text
+
+        found = set()
+
+        def _restore(match: "re.Match") -> str:
+            placeholder = match.group(0)
+            if placeholder in mapping:
+                found.add(placeholder)
+                return mapping[placeholder]
+            return placeholder
+
+        text = _PLACEHOLDER_RE.sub(_restore, text)
+        missing = {p[len("__IMG_"):-len("__")]: p for p in mapping if p not in found}
+        if not missing:
+            return text
+
+        mutated_re = re.compile(
+            _MUTATED_PLACEHOLDER_RE.format("|".join(map(re.escape, missing))), re.IGNORECASE
+        )
+        return mutated_re.sub(lambda m: mapping[missing[m.group(1)]], text)
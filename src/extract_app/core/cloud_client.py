@@ -1,20 +1,24 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/cloud_client.py
-# Version: 1.0.0
+# Version: 1.1.0
 # Author: Antigravity
 # Description: Thin wrapper around the Google Generative AI SDK.
-#              Handles model initialisation, multi-model fallback and retries.
+#              Handles model initialisation, multi-model fallback and retries,
+#              streamed responses, MAX_TOKENS truncation and call metrics.
 # --------------------------------------------------------------------------------
 
 import json
 import time
 import logging
-from typing import Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
 
 import google.generativeai as genai
 
 from .prompt_builder import PromptBuilder
+from .token_budget import TokenEstimator
+from ..shared import tracing
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,15 @@ FALLBACK_MODELS = [
 
 MAX_RETRIES = 3
 
+# Visible output a translation chunk is sized for when no output cap is configured.
+CHUNK_OUTPUT_TOKENS = 8192
+# Share of a configured cap (cloud_max_output_tokens) left for thinking tokens,
+# which gemini-2.5 models count against the same limit.
+THINKING_SHARE = 0.5
+
+ABORTED_MESSAGE = "Đã dừng theo yêu cầu."
+TRUNCATED_MESSAGE = "Phản hồi bị cắt do vượt giới hạn token đầu ra (MAX_TOKENS)."
+
 
 class CloudAIClient:
     """
@@ -42,6 +55,7 @@ class CloudAIClient:
     def __init__(self, settings_manager):
         self.settings = settings_manager
         self.prompt_builder = PromptBuilder()
+        self.token_estimator = TokenEstimator()  # Calibrated from response usage metadata
         self.api_key: str = ""
         self._configured = False
         self.setup(settings_manager.get_api_key())
@@ -65,15 +79,37 @@ class CloudAIClient:
     def is_ready(self) -> bool:
         return bool(self.api_key and self._configured)
 
+    def max_output_tokens(self) -> Optional[int]:
+        """The configured response cap, or None to use the model's own limit."""
+        value = self.settings.get('cloud_max_output_tokens', 0)
+        return value if isinstance(value, int) and value > 0 else None
+
+    def chunk_output_tokens(self) -> int:
+        """Visible output tokens a translation chunk may produce."""
+        cap = self.max_output_tokens()
+        if cap is None:
+            return CHUNK_OUTPUT_TOKENS
+        return max(1, int(cap * (1.0 - THINKING_SHARE)))
+
     # ─────────────────────────────────────────────────────────────────
     # Translation
     # ─────────────────────────────────────────────────────────────────
 
     def translate_chunk(
-        self, text: str, glossary_str: str = ""
+        self,
+        text: str,
+        glossary_str: str = "",
+        on_token: Optional[Callable[[str], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        stats: Optional[Dict[str, float]] = None,
     ) -> Tuple[Optional[str], Optional[str]]:
         """Translate a single text chunk (EN → VI) with model fallback.
 
+        With *on_token* / *should_stop* the response is streamed: on_token gets
+        each partial text piece and the call is abandoned once should_stop() is true.
+        *stats* (optional dict) receives "seconds", the duration of the successful
+        attempt alone (no failed attempts or back-off sleeps).
+
         Returns:
             (translated_text, error_message)  — one of them is always None.
         """
@@ -81,9 +117,15 @@ class CloudAIClient:
             return None, "API Key chưa được cấu hình"
 
         prompt = self.prompt_builder.build_translation_prompt(text, glossary_str)
-        generation_config = genai.GenerationConfig(temperature=0.3, top_p=0.9)
+        config = {"temperature": 0.3, "top_p": 0.9}
+        if self.max_output_tokens() is not None:
+            config["max_output_tokens"] = self.max_output_tokens()
+        generation_config = genai.GenerationConfig(**config)
 
-        return self._call_with_fallback(prompt, generation_config)
+        return self._call_with_fallback(
+            prompt, generation_config, source_chars=len(text),
+            on_token=on_token, should_stop=should_stop, stats=stats,
+        )
 
     # ─────────────────────────────────────────────────────────────────
     # Style transformation
@@ -154,8 +196,18 @@ class CloudAIClient:
         self,
         prompt: str,
         generation_config,
+        source_chars: int = 0,
+        on_token: Optional[Callable[[str], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        stats: Optional[Dict[str, float]] = None,
     ) -> Tuple[Optional[str], Optional[str]]:
-        """Try the primary model first, then each fallback in order."""
+        """Try the primary model first, then each fallback in order.
+
+        When *source_chars* is given (translation calls), the response usage
+        metadata is fed to the token estimator to calibrate chunk budgets.
+        Streaming is used whenever *on_token* or *should_stop* is provided.
+        """
+        streaming = bool(on_token or should_stop)
         primary = self.settings.get('cloud_model_name', 'gemini-2.5-pro')
         models_to_try = [primary] + [m for m in FALLBACK_MODELS if m != primary]
 
@@ -164,16 +216,52 @@ class CloudAIClient:
             try:
                 model = genai.GenerativeModel(model_name)
                 for attempt in range(MAX_RETRIES):
+                    if should_stop and should_stop():
+                        return None, ABORTED_MESSAGE
+                    started = time.monotonic()
                     try:
-                        response = model.generate_content(prompt, generation_config=generation_config)
-                        if response.text:
-                            cleaned = self.prompt_builder.clean_output(response.text)
-                            return cleaned, None
+                        with tracing.span("cloud.generate", model=model_name, attempt=attempt,
+                                          prompt_chars=len(prompt), stream=streaming):
+                            if streaming:
+                                response = model.generate_content(
+                                    prompt, generation_config=generation_config, stream=True
+                                )
+                                text = self._consume_stream(response, on_token, should_stop)
+                                if text is None:
+                                    return None, ABORTED_MESSAGE
+                                if self._is_truncated(response):
+                                    metrics.record_retry("cloud", model_name, "max_tokens")
+                                    return None, TRUNCATED_MESSAGE
+                                if text:
+                                    seconds = self._record_call(model_name, started, response)
+                                    if stats is not None:
+                                        stats["seconds"] = seconds
+                                    if source_chars:
+                                        self._observe_usage(response, len(prompt), source_chars)
+                                    return self.prompt_builder.clean_output(text), None
+                                metrics.record_retry("cloud", model_name, "empty response")
+                                continue
+
+                            response = model.generate_content(prompt, generation_config=generation_config)
+                            if self._is_truncated(response):
+                                # Retrying gives the same cut-off reply; response.text may even raise
+                                metrics.record_retry("cloud", model_name, "max_tokens")
+                                return None, TRUNCATED_MESSAGE
+                            if response.text:
+                                seconds = self._record_call(model_name, started, response)
+                                if stats is not None:
+                                    stats["seconds"] = seconds
+                                if source_chars:
+                                    self._observe_usage(response, len(prompt), source_chars)
+                                cleaned = self.prompt_builder.clean_output(response.text)
+                                return cleaned, None
+                            metrics.record_retry("cloud", model_name, "empty response")
                     except Exception as e:
                         last_error = str(e)
-                        if "429" in last_error or "Quota" in last_error:
+                        reason = metrics.record_retry("cloud", model_name, last_error)
+                        if reason == "429":
                             time.sleep(5)
-                        elif "404" in last_error or "not found" in last_error.lower():
+                        elif reason == "404":
                             break  # model unavailable — skip immediately
                         else:
                             time.sleep(1)
@@ -183,3 +271,55 @@ class CloudAIClient:
                 logger.error(f"[CloudAIClient] Init failed for {model_name}: {e}")
 
         return None, last_error or "Tất cả các model fallback đều thất bại."
+
+    @staticmethod
+    def _is_truncated(response) -> bool:
+        """True if the reply stopped at the output token cap (finish_reason MAX_TOKENS)."""
+        try:
+            reason = response.candidates[0].finish_reason
+        except (AttributeError, IndexError, TypeError):
+            return False
+        return getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+
+    @staticmethod
+    def _consume_stream(response, on_token, should_stop) -> Optional[str]:
+        """Drain a streamed response. Returns the full text, or None if aborted."""
+        pieces = []
+        for part in response:
+            text = getattr(part, 'text', '')
+            if text:
+                pieces.append(text)
+                if on_token:
+                    on_token(text)
+            if should_stop and should_stop():
+                return None
+        return "".join(pieces)
+
+    @staticmethod
+    def _record_call(model_name: str, started: float, response) -> float:
+        """Latency and token usage of one successful call, for the metrics registry.
+
+        Returns:
+            The call's duration in seconds.
+        """
+        seconds = time.monotonic() - started
+        usage = getattr(response, 'usage_metadata', None)
+        tokens_in = getattr(usage, 'prompt_token_count', 0) or 0
+        tokens_out = getattr(usage, 'candidates_token_count', 0) or 0
+        metrics.record_chunk(
+            "cloud", model_name, seconds,
+            tokens_in if isinstance(tokens_in, int) else 0,
+            tokens_out if isinstance(tokens_out, int) else 0,
+        )
+        return seconds
+
+    def _observe_usage(self, response, prompt_chars: int, source_chars: int) -> None:
+        """Calibrate the token estimator from a response's usage metadata."""
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        if not isinstance(prompt_tokens, int) or not isinstance(output_tokens, int):
+            return
+        self.token_estimator.observe_prompt(prompt_chars, prompt_tokens)
+        source_tokens = round(source_chars / self.token_estimator.chars_per_token)
+        self.token_estimator.observe_output(source_tokens, output_tokens)
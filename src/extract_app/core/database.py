@@ -1,17 +1,108 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/database.py
-# Version: 1.0.0
+# Version: 1.1.0
 # Author: Antigravity
 # Description: Manages SQLite database interactions effectively for the application.
 # --------------------------------------------------------------------------------
 
 import sqlite3
 import json
+import hashlib
+from collections import defaultdict, deque
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from ..shared import tracing
+
+
+def _image_digest(path: str) -> str:
+    """Content hash of an extracted image ("" if the file is gone)."""
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+def node_fingerprint(subtitle: str, text_content: str, images: List[Dict]) -> str:
+    """
+    Fingerprint of one article as extracted: title, text and image contents.
+    Re-imports compare it to decide whether an article changed.
+    """
+    digest = hashlib.sha1()
+    parts = [subtitle, text_content] + [img.get('digest') or _image_digest(img['path']) for img in images]
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def flatten_book(structured_content: list) -> List[Dict[str, Any]]:
+    """
+    Walks the extracted tree once and returns one record per node, in storage
+    order. Both the folder writer (storage_handler) and the DB writer
+    (DatabaseManager.save_book_records) consume these records.
+
+    Each record holds:
+        chapter_index, chapter_title: top-level node it belongs to.
+        order_index:  article order inside the chapter (children: parent + 1000 + i).
+        path:         ((index, raw title or None), ...) from the top-level node down to this node.
+        subtitle, text, word_count, is_leaf, fingerprint: article columns.
+        parts:        content in order, ('text', str) or ('image', anchor, caption).
+        images:       [{'path', 'caption', 'digest'}] for the images table.
+    """
+    records = []
+    digests: Dict[str, str] = {}  # The same picture is often reused across nodes
+
+    def visit(node: dict, chapter_index: int, chapter_title: str, order_index: int, path: tuple):
+        subtitle = node.get('title', 'Untitled')
+        children = node.get('children', [])
+        full_text, parts, images = [], [], []
+
+        for content_type, data in node.get('content', []):
+            if content_type == 'text':
+                text = data.get('content', '') if isinstance(data, dict) else str(data)
+                full_text.append(text)
+                parts.append(('text', text))
+            elif content_type == 'image' and isinstance(data, dict):
+                anchor = data.get('anchor', '')
+                if anchor:
+                    caption = data.get('caption', '')
+                    if anchor not in digests:
+                        digests[anchor] = _image_digest(anchor)
+                    full_text.append(f"[Image: {Path(anchor).name}]")
+                    parts.append(('image', anchor, caption))
+                    images.append({'path': anchor, 'caption': caption, 'digest': digests[anchor]})
+
+        text_content = "\n\n".join(full_text)
+        records.append({
+            'chapter_index': chapter_index,
+            'chapter_title': chapter_title,
+            'order_index': order_index,
+            'path': path,
+            'subtitle': subtitle,
+            'text': text_content,
+            'parts': parts,
+            'images': images,
+            'is_leaf': 0 if children else 1,
+            'word_count': len(text_content.split()) if text_content else 0,
+            'fingerprint': node_fingerprint(subtitle, text_content, images),
+        })
+        for i, child_node in enumerate(children):
+            visit(child_node, chapter_index, chapter_title, order_index + 1000 + i,
+                  path + ((i, child_node.get('title')),))
+
+    for chap_idx, root_node in enumerate(structured_content):
+        visit(root_node, chap_idx, root_node.get('title', f"Chapter {chap_idx+1}"), 0,
+              ((chap_idx, root_node.get('title')),))
+    return records
+
+
 class DatabaseManager:
     """
     Handles SQLite database connections and strict schema management.
@@ -23,6 +114,7 @@ class DatabaseManager:
         else:
             self.db_path = Path(db_path)
             
+        self.last_import_stats: Dict[str, int] = {}  # Set by save_book_batch
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._init_db()
 
@@ -192,6 +284,15 @@ class DatabaseManager:
             except Exception as e:
                  print(f"[DB] Article Migration 4 failed: {e}")
 
+        # Migration v0.4.0: Source fingerprint for incremental re-import
+        if 'fingerprint' not in art_cols:
+            print("[DB] Migration: Adding fingerprint to articles.")
+            try:
+                cursor.execute("ALTER TABLE articles ADD COLUMN fingerprint TEXT")
+                conn.commit()
+            except Exception as e:
+                 print(f"[DB] Article Migration 5 failed: {e}")
+
         conn.close()
 
     # --- CRUD Operations ---
@@ -312,6 +413,23 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def get_article_summary(self, article_id: int) -> Optional[Dict]:
+        """One article's list fields (same columns as get_book_details), for in-place row updates."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, chapter_id, subtitle, status, translation_text, is_leaf, order_index,
+                       word_count, last_updated, translated_at,
+                       website_text, facebook_text
+                FROM articles
+                WHERE id = ?
+            """, (article_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
     def get_article_content(self, article_id: int) -> str:
         """Retrieves content text for a specific article."""
         conn = self._get_connection()
@@ -322,7 +440,28 @@ class DatabaseManager:
             return result['content_text'] if result else ""
         finally:
             conn.close()
+
+    def get_articles_content(self, article_ids: List[int]) -> Dict[int, str]:
+        """Content text for many articles in one query (article_id -> text)."""
+        ids = list(article_ids)
+        if not ids:
+            return {}
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            contents = {}
+            for start in range(0, len(ids), 500):  # Stay under SQLite's bound-parameter limit
+                batch = ids[start:start + 500]
+                cursor.execute(
+                    f"SELECT id, content_text FROM articles WHERE id IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                contents.update({row['id']: row['content_text'] or "" for row in cursor.fetchall()})
+            return contents
+        finally:
+            conn.close()
     
+    @tracing.traced("db.save_book_batch")
     def save_book_batch(self, book_title: str, author: str, source_path: str, 
                         cover_path: str, structured_content: list, published_year: str = "") -> int:
         """
@@ -331,42 +470,78 @@ class DatabaseManager:
         
         structured_content is a tree: [{ title, content, children: [...] }, ...]
         """
+        return self.save_book_records(book_title, author, source_path, cover_path,
+                                      flatten_book(structured_content), published_year)
+
+    @tracing.traced("db.save_book_records")
+    def save_book_records(self, book_title: str, author: str, source_path: str, cover_path: str,
+                          records: List[Dict[str, Any]], published_year: str = "",
+                          progress_callback=None) -> int:
+        """
+        Saves pre-flattened article records (see flatten_book) in a single transaction.
+
+        If a book with the same source_path already exists, it is re-imported
+        incrementally (see _sync_book): unchanged articles keep their id and
+        translation, and only changed nodes are written.
+        Counts are left in self.last_import_stats.
+
+        Args:
+            progress_callback: Optional callback(done, total) fired per article.
+        """
+        chapters: List[tuple] = []  # (title, [records]) in chapter order
+        for record in records:
+            if not chapters or chapters[-1][2] != record['chapter_index']:
+                chapters.append((record['chapter_title'], [], record['chapter_index']))
+            chapters[-1][1].append(record)
+
+        done = [0]
+
+        def advance():
+            done[0] += 1
+            if progress_callback:
+                progress_callback(done[0], len(records))
+
         conn = self._get_connection()
         try:
             cursor = conn.cursor()
+            stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
             
+            cursor.execute("SELECT id FROM books WHERE source_path = ?", (source_path,))
+            existing = cursor.fetchone()
+            if existing:
+                # Re-import: refresh metadata, then diff the tree
+                book_id = existing['id']
+                cursor.execute("""
+                    UPDATE books SET title = ?, author = ?, cover_path = ?, published_year = ?
+                    WHERE id = ?
+                """, (book_title, author, cover_path, published_year, book_id))
+                self._sync_book(cursor, book_id, chapters, stats, advance)
+                conn.commit()
+                self.last_import_stats = stats
+                return book_id
+
             # 1. Insert Book
             cursor.execute("""
-                INSERT OR IGNORE INTO books (title, author, source_path, cover_path, published_year)
+                INSERT INTO books (title, author, source_path, cover_path, published_year)
                 VALUES (?, ?, ?, ?, ?)
             """, (book_title, author, source_path, cover_path, published_year))
+            book_id = cursor.lastrowid
             
-            if cursor.lastrowid and cursor.lastrowid > 0:
-                book_id = cursor.lastrowid
-            else:
-                cursor.execute("SELECT id FROM books WHERE source_path = ?", (source_path,))
-                result = cursor.fetchone()
-                book_id = result['id'] if result else -1
-            
-            if book_id == -1:
-                conn.rollback()
-                return -1
-            
-            # 2. Process each top-level node as a Chapter
-            for chap_idx, root_node in enumerate(structured_content):
-                chap_title = root_node.get('title', f"Chapter {chap_idx+1}")
+            # 2. Each top-level node is a Chapter; its whole subtree is flattened into articles
+            for chap_idx, (chap_title, chapter_records, _) in enumerate(chapters):
                 cursor.execute("""
                     INSERT INTO chapters (book_id, title, order_index)
                     VALUES (?, ?, ?)
                 """, (book_id, chap_title, chap_idx))
                 chapter_id = cursor.lastrowid
-                
-                # Save the root node and all its children recursively
-                # _save_node_batch handles the full tree traversal
-                self._save_node_batch(cursor, chapter_id, root_node, 0, None)
+                for record in chapter_records:
+                    self._insert_article(cursor, chapter_id, record)
+                    stats["added"] += 1
+                    advance()
             
             # 3. Commit everything at once
             conn.commit()
+            self.last_import_stats = stats
             return book_id
             
         except Exception as e:
@@ -375,59 +550,141 @@ class DatabaseManager:
             return -1
         finally:
             conn.close()
-    
-    def _save_node_batch(self, cursor, chapter_id: int, node: dict, order_index: int, parent_id: int):
-        """
-        Recursively saves a node and its children using an existing cursor.
-        Does NOT commit - caller handles transaction.
-        """
-        from pathlib import Path
-        
-        subtitle = node.get('title', 'Untitled')
-        content_list = node.get('content', [])
-        children = node.get('children', [])
-        is_leaf = len(children) == 0
-        
-        # Build text content
-        full_text = []
-        images_to_save = []
-        
-        for content_type, data in content_list:
-            if content_type == 'text':
-                if isinstance(data, dict):
-                    full_text.append(data.get('content', ''))
-                else:
-                    full_text.append(str(data))
-            elif content_type == 'image' and isinstance(data, dict):
-                anchor = data.get('anchor', '')
-                if anchor:
-                    full_text.append(f"[Image: {Path(anchor).name}]")
-                    images_to_save.append({
-                        'path': anchor,
-                        'caption': data.get('caption', '')
-                    })
-        
-        text_content = "\n\n".join(full_text)
-        
-        word_count = len(text_content.split()) if text_content else 0
-        
-        # Insert article
+
+    def _insert_article(self, cursor, chapter_id: int, record: Dict[str, Any]) -> int:
+        """Inserts one article record and its images. Does NOT commit."""
         cursor.execute("""
-            INSERT INTO articles (chapter_id, subtitle, content_text, order_index, is_leaf, word_count, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (chapter_id, subtitle, text_content, order_index, 1 if is_leaf else 0, word_count))
+            INSERT INTO articles (chapter_id, subtitle, content_text, order_index, is_leaf, word_count,
+                                  fingerprint, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, (chapter_id, record['subtitle'], record['text'], record['order_index'], record['is_leaf'],
+              record['word_count'], record['fingerprint']))
         article_id = cursor.lastrowid
         
         # Insert images
-        for img in images_to_save:
+        for img in record['images']:
             cursor.execute("""
                 INSERT INTO images (article_id, path, caption)
                 VALUES (?, ?, ?)
             """, (article_id, img['path'], img['caption']))
+        return article_id
+
+    def _delete_articles(self, cursor, article_ids: List[int]) -> None:
+        for article_id in article_ids:
+            cursor.execute("DELETE FROM images WHERE article_id = ?", (article_id,))
+            cursor.execute("DELETE FROM translation_revisions WHERE article_id = ?", (article_id,))
+            cursor.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+
+    def _sync_book(self, cursor, book_id: int, chapters: List[tuple], stats: Dict[str, int], advance):
+        """
+        Diffs a re-extracted tree against the stored book. Chapters are matched
+        by title; chapters that no longer exist are removed.
+        """
+        cursor.execute("SELECT id, title, order_index FROM chapters WHERE book_id = ? ORDER BY order_index",
+                       (book_id,))
+        unmatched = [dict(row) for row in cursor.fetchall()]
         
-        # Recurse for children
-        for i, child_node in enumerate(children):
-            self._save_node_batch(cursor, chapter_id, child_node, order_index + 1000 + i, article_id)
+        for chap_idx, (chap_title, chapter_records, _) in enumerate(chapters):
+            chapter = next((c for c in unmatched if c['title'] == chap_title), None)
+            if chapter:
+                unmatched.remove(chapter)
+                chapter_id = chapter['id']
+                if chapter['order_index'] != chap_idx:
+                    cursor.execute("UPDATE chapters SET order_index = ? WHERE id = ?", (chap_idx, chapter_id))
+            else:
+                cursor.execute("""
+                    INSERT INTO chapters (book_id, title, order_index)
+                    VALUES (?, ?, ?)
+                """, (book_id, chap_title, chap_idx))
+                chapter_id = cursor.lastrowid
+            self._sync_chapter(cursor, chapter_id, chapter_records, stats, advance)
+        
+        for chapter in unmatched:
+            cursor.execute("SELECT id FROM articles WHERE chapter_id = ?", (chapter['id'],))
+            article_ids = [row['id'] for row in cursor.fetchall()]
+            self._delete_articles(cursor, article_ids)
+            stats["removed"] += len(article_ids)
+            cursor.execute("DELETE FROM chapters WHERE id = ?", (chapter['id'],))
+
+    def _sync_chapter(self, cursor, chapter_id: int, records: List[Dict[str, Any]], stats: Dict[str, int],
+                      advance):
+        """
+        Matches the chapter's new nodes to stored articles: first by fingerprint
+        (unchanged — only order/leaf flag may move), then by subtitle (changed —
+        content and images rewritten, translation kept but status reset to 'new'
+        so it gets re-translated). Everything else is inserted or deleted.
+        """
+        cursor.execute("""
+            SELECT id, subtitle, content_text, fingerprint, order_index, is_leaf
+            FROM articles WHERE chapter_id = ? ORDER BY order_index
+        """, (chapter_id,))
+        old_rows = [dict(row) for row in cursor.fetchall()]
+        matched: Dict[int, Dict] = {}  # position in records -> old row
+        used = set()
+
+        # Candidate rows per key, in order_index order, so matching stays linear
+        by_fingerprint: Dict[str, deque] = defaultdict(deque)
+        by_legacy: Dict[tuple, deque] = defaultdict(deque)  # Imported before fingerprints existed
+        by_subtitle: Dict[str, deque] = defaultdict(deque)
+        for pos, row in enumerate(old_rows):
+            row['_pos'] = pos
+            if row['fingerprint']:
+                by_fingerprint[row['fingerprint']].append(row)
+            else:
+                by_legacy[(row['subtitle'], row['content_text'] or "")].append(row)
+            by_subtitle[row['subtitle']].append(row)
+
+        def take(index: Dict, key) -> Optional[Dict]:
+            """First unused row under *key*; rows matched through another index are dropped lazily."""
+            rows = index.get(key)
+            while rows and rows[0]['id'] in used:
+                rows.popleft()
+            return rows[0] if rows else None
+
+        for pos, record in enumerate(records):
+            candidates = [row for row in (take(by_fingerprint, record['fingerprint']),
+                                          take(by_legacy, (record['subtitle'], record['text'])))
+                          if row]
+            if candidates:
+                row = min(candidates, key=lambda r: r['_pos'])
+                matched[pos] = row
+                used.add(row['id'])
+
+        for pos, record in enumerate(records):
+            advance()
+            order_index = record['order_index']
+            row = matched.get(pos)
+            if row:
+                if (row['order_index'], row['is_leaf'], row['fingerprint']) != \
+                        (order_index, record['is_leaf'], record['fingerprint']):
+                    cursor.execute("UPDATE articles SET order_index = ?, is_leaf = ?, fingerprint = ? WHERE id = ?",
+                                   (order_index, record['is_leaf'], record['fingerprint'], row['id']))
+                stats["unchanged"] += 1
+                continue
+
+            row = take(by_subtitle, record['subtitle'])
+            if row:
+                used.add(row['id'])
+                cursor.execute("""
+                    UPDATE articles
+                    SET content_text = ?, order_index = ?, is_leaf = ?, word_count = ?, fingerprint = ?,
+                        status = 'new',
+                        last_updated = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (record['text'], order_index, record['is_leaf'], record['word_count'],
+                      record['fingerprint'], row['id']))
+                cursor.execute("DELETE FROM images WHERE article_id = ?", (row['id'],))
+                for img in record['images']:
+                    cursor.execute("INSERT INTO images (article_id, path, caption) VALUES (?, ?, ?)",
+                                   (row['id'], img['path'], img['caption']))
+                stats["updated"] += 1
+            else:
+                self._insert_article(cursor, chapter_id, record)
+                stats["added"] += 1
+
+        stale = [r['id'] for r in old_rows if r['id'] not in used]
+        self._delete_articles(cursor, stale)
+        stats["removed"] += len(stale)
             
     def get_all_books(self) -> List[Dict]:
         """Retrieves all books with translation stats (total & translated leaf articles)."""
@@ -493,6 +750,46 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def get_book_webview_data(self, book_id: int) -> List[Dict[str, Any]]:
+        """
+        Everything the webview needs for a book in ONE query (articles with
+        their text, translation and image paths), instead of 2 queries per article.
+
+        Returns:
+            [{ title, articles: [{ id, subtitle, content_text, translation_text, images: [path] }] }]
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id AS chapter_id, c.title AS chapter_title,
+                       a.id, a.subtitle, a.content_text, a.translation_text, i.path AS image_path
+                FROM chapters c
+                JOIN articles a ON a.chapter_id = c.id
+                LEFT JOIN images i ON i.article_id = a.id
+                WHERE c.book_id = ?
+                ORDER BY c.order_index, c.id, a.order_index, a.id, i.id
+            """, (book_id,))
+            chapters: List[Dict[str, Any]] = []
+            article = None
+            for row in cursor.fetchall():
+                if not chapters or chapters[-1]['id'] != row['chapter_id']:
+                    chapters.append({'id': row['chapter_id'], 'title': row['chapter_title'], 'articles': []})
+                if article is None or article['id'] != row['id']:
+                    article = {
+                        'id': row['id'],
+                        'subtitle': row['subtitle'],
+                        'content_text': row['content_text'] or "",
+                        'translation_text': row['translation_text'] or "",
+                        'images': [],
+                    }
+                    chapters[-1]['articles'].append(article)
+                if row['image_path']:
+                    article['images'].append(row['image_path'])
+            return chapters
+        finally:
+            conn.close()
+
     def get_book_details(self, book_id: int) -> Dict[str, Any]:
         """
         Retrieves full book details: Metadata, Chapters, and Articles (lite info).
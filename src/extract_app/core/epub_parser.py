@@ -26,8 +26,10 @@ from .epub_parsers import anchor_based_parser, simple_toc_parser
 # Import centralized utils
 from .epub_parsers.utils import resolve_image_path, save_image_to_temp
 from ..shared import debug_logger
+from ..shared import tracing
 
 
+@tracing.traced("parse.epub")
 def parse_epub(filepath: str) -> Dict[str, Any]:
     """
     Parses an EPUB file by dispatching to the correct specialized parser.
@@ -93,7 +95,7 @@ def parse_epub(filepath: str) -> Dict[str, Any]:
         # 1. Try to find cover ID from metadata (standard OPF way)
         try:
             # Debug metadata structure to understand namespace issues
-            debug_logger.log(f"Metadata namespaces: {list(book.metadata.keys())}")
+            debug_logger.debug("Metadata namespaces: %s", list(book.metadata.keys()))
             
             opf_ns = 'http://www.idpf.org/2007/opf'
             if opf_ns in book.metadata and 'meta' in book.metadata[opf_ns]:
@@ -137,7 +139,7 @@ def parse_epub(filepath: str) -> Dict[str, Any]:
                 media_type = getattr(cover_item, 'media_type', '').lower()
                 file_name = cover_item.get_name().lower()
                 
-                debug_logger.log(f"Inspecting cover item: id={cover_item.get_id()}, name={file_name}, media_type={media_type}")
+                debug_logger.debug("Inspecting cover item: id=%s, name=%s, media_type=%s", cover_item.get_id(), file_name, media_type)
 
                 is_direct_image = (
                     media_type.startswith('image/') or 
@@ -15,6 +15,7 @@ from ebooklib import epub
 # Import shared helper functions
 from . import utils
 from ...shared import debug_logger
+from ...shared import tracing
 
 
 def _get_all_anchor_ids(toc_items: List) -> set:
@@ -48,7 +49,7 @@ def _build_tree(
             
         if link:
             title = link.title if hasattr(link, 'title') else "Unknown"
-            debug_logger.log(f"AnchorParser: Đang xử lý node '{title}'")
+            debug_logger.debug("AnchorParser: Đang xử lý node '%s'", title)
             
             # --- Extraction Logic (Refactored) ---
             href_parts = link.href.split('#')
@@ -66,14 +67,14 @@ def _build_tree(
                     if start_node:
                         content_slice = []
                         if start_node.name == 'body':
-                            debug_logger.log(f"  [DEBUG] Found body start_node for {file_href}")
+                            debug_logger.debug("  Found body start_node for %s", file_href)
                             # Case 1: Whole file
                             for child in start_node.find_all(recursive=False):
                                 if isinstance(child, Tag):
                                     content_slice.append(child)
                         else:
                             # Case 2: Anchor based
-                            debug_logger.log(f"  [DEBUG] Found anchor start_node: {start_node.name}#{anchor_id}")
+                            debug_logger.debug("  Found anchor start_node: %s#%s", start_node.name, anchor_id)
                             
                             content_slice.append(start_node)
                             
@@ -91,7 +92,7 @@ def _build_tree(
                                     if isinstance(sibling, Tag):
                                          # Check if this sibling is a start of another section
                                          if sibling.get('id') in all_anchor_ids:
-                                              debug_logger.log(f"  [DEBUG] Stopping at sibling anchor: {sibling.get('id')}")
+                                              debug_logger.debug("  Stopping at sibling anchor: %s", sibling.get('id'))
                                               full_stop = True
                                               break
                                          
@@ -109,16 +110,16 @@ def _build_tree(
                                 if not curr_element or curr_element.name == 'body':
                                     break
 
-                        debug_logger.log(f"  [DEBUG] Collected {len(content_slice)} tags.")
+                        debug_logger.debug("  Collected %d tags.", len(content_slice))
                         content = utils.extract_content_from_tags(
                             content_slice, book, doc_item, temp_image_dir
                         )
-                        debug_logger.log(f"  [DEBUG] Extracted content items: {len(content)}")
+                        debug_logger.debug("  Extracted content items: %d", len(content))
                     else:
-                        debug_logger.log(f"  [WARNING] start_node not found for id={anchor_id} in {file_href}")
+                        debug_logger.warning(f"  [WARNING] start_node not found for id={anchor_id} in {file_href}")
 
                 except Exception as e:
-                    debug_logger.log(f"Error parsing content for '{title}': {e}")
+                    debug_logger.error(f"Error parsing content for '{title}': {e}")
 
             # --- Recurse for children ---
             children_nodes = _build_tree(children, book, temp_image_dir, all_anchor_ids)
@@ -151,6 +152,7 @@ def _build_tree(
     return tree
 
 
+@tracing.traced("parse.epub.anchor_toc")
 def parse(book: epub.EpubBook, temp_image_dir: Path) -> List[Dict[str, Any]]:
     """
     Public function to parse an EPUB with a complex, anchor-based ToC.
@@ -18,6 +18,7 @@ from ebooklib import epub
 # Import shared helper functions
 from . import utils
 from ...shared import debug_logger
+from ...shared import tracing
 from ..content_structurer import SmartSplitter
 
 
@@ -64,11 +65,12 @@ def _process_chapter(
     return processed_content, processed_children
 
 
+@tracing.traced("parse.epub.simple_toc")
 def parse(book: epub.EpubBook, temp_image_dir: Path) -> List[Dict[str, Any]]:
     """Parses an EPUB book with a simple ToC into a structured tree."""
     tree = []
     for link in book.toc:
-        debug_logger.log(f"SimpleParser: Đang kiểm tra link '{link.title}'")
+        debug_logger.debug("SimpleParser: Đang kiểm tra link '%s'", link.title)
         if any(kw in link.title.lower() for kw in
                ['cover', 'title', 'copyright', 'dedication', 'contents']):
             continue
@@ -81,7 +83,7 @@ def parse(book: epub.EpubBook, temp_image_dir: Path) -> List[Dict[str, Any]]:
             continue
         content, children = _process_chapter(
             soup.body, book, doc_item, temp_image_dir)
-        debug_logger.log(f"  -> Đã extract: {len(content)} bài viết con, {len(children)} chương con.")
+        debug_logger.debug("  -> Đã extract: %d bài viết con, %d chương con.", len(content), len(children))
         node = {'title': link.title,
                 'content': content, 'children': children}
         if node['content'] or node['children']:
@@ -1,13 +1,18 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/eta_calculator.py
-# Version: 1.0.0
+# Version: 2.0.0
 # Author: Antigravity
 # Description: Utility functions for estimating translation time for books.
+#              ThroughputModel learns per-chunk cost (fixed overhead + per-word
+#              time) per engine and model; the WPM settings remain the fallback
+#              until it has observations.
 # --------------------------------------------------------------------------------
 
+import math
+import threading
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +35,161 @@ def update_dynamic_wpm(settings_manager, engine: str, word_count: int, elapsed_s
     logger.info(f"Dynamic WPM ({engine}): {saved_wpm} -> {new_wpm} (Real: {real_wpm})")
 
 
-def calculate_book_eta(chapters: List[Dict[str, Any]], wpm: int = 180, engine: str = "") -> str:
+class ThroughputModel:
+    """
+    Per-chunk translation cost model: ``seconds = overhead + per_word * words``.
+
+    Fitted by weighted least squares over recent chunk observations, per
+    "engine|model" and per engine ("engine|*", used when a model has no data).
+    Old observations fade with `decay` per new one, so only the six weighted
+    sums (n, Σx, Σy, Σx², Σxy, Σy²) are kept and persisted.
+
+    Args:
+        decay: Weight multiplier applied to history on each observation
+               (0.97 ≈ the last ~30 chunks dominate).
+    """
+
+    MIN_OBSERVATIONS = 3  # Below this (weighted count) estimates fall back to WPM
+    Z_90 = 1.645           # Two-sided 90% range
+
+    def __init__(self, decay: float = 0.97):
+        self.decay = decay
+        self._sums: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    # ── Persistence ──────────────────────────────────────────────────
+
+    @classmethod
+    def from_dict(cls, data) -> "ThroughputModel":
+        model = cls()
+        if isinstance(data, dict):
+            for key, sums in data.items():
+                if isinstance(sums, list) and len(sums) == 6:
+                    model._sums[key] = [float(v) for v in sums]
+        return model
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {key: [round(v, 4) for v in sums] for key, sums in self._sums.items()}
+
+    def save(self, settings_manager) -> None:
+        """Stores the model in the "eta_model" setting."""
+        settings_manager.set("eta_model", self.to_dict())
+
+    # ── Learning ─────────────────────────────────────────────────────
+
+    def observe(self, engine: str, model: str, words: int, seconds: float) -> None:
+        """Records one successful chunk: its source word count and call duration."""
+        if words <= 0 or seconds <= 0:
+            return
+        sample = (1.0, words, seconds, words * words, words * seconds, seconds * seconds)
+        with self._lock:
+            for key in (f"{engine}|{model}", f"{engine}|*"):
+                sums = self._sums.setdefault(key, [0.0] * 6)
+                for i, value in enumerate(sample):
+                    sums[i] = sums[i] * self.decay + value
+
+    def fit(self, engine: str, model: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Fitted parameters for *engine*/*model* (falling back to the engine).
+
+        Returns:
+            {'overhead', 'per_word', 'words_per_chunk', 'sigma', 'n', 'cov'},
+            or None if there are too few observations.
+        """
+        with self._lock:
+            sums = self._sums.get(f"{engine}|{model}")
+            if sums is None or sums[0] < self.MIN_OBSERVATIONS:
+                sums = self._sums.get(f"{engine}|*")
+            if sums is None or sums[0] < self.MIN_OBSERVATIONS:
+                return None
+            n, sx, sy, sxx, sxy, syy = sums
+
+        mean_x, mean_y = sx / n, sy / n
+        var_x = sxx / n - mean_x * mean_x
+        overhead, per_word = 0.0, (sxy / sxx if sxx > 0 else 0.0)
+        if var_x > 1e-6 * (mean_x * mean_x + 1):
+            per_word = (sxy / n - mean_x * mean_y) / var_x
+            overhead = mean_y - per_word * mean_x
+            if overhead < 0 or per_word < 0:
+                # Not physical: keep the proportional fit through the origin
+                overhead, per_word = 0.0, (sxy / sxx if sxx > 0 else 0.0)
+        sse = (syy - 2 * overhead * sy - 2 * per_word * sxy
+               + overhead * overhead * n + 2 * overhead * per_word * sx + per_word * per_word * sxx)
+        sigma2 = max(sse, 0.0) / max(n - 2, 1.0)
+
+        det = n * sxx - sx * sx
+        cov = None
+        if det > 0:
+            cov = (sigma2 * sxx / det, -sigma2 * sx / det, sigma2 * n / det)  # var(a), cov(a,b), var(b)
+        return {
+            "overhead": overhead, "per_word": per_word, "words_per_chunk": mean_x,
+            "sigma": math.sqrt(sigma2), "n": n, "cov": cov,
+        }
+
+    # ── Prediction ───────────────────────────────────────────────────
+
+    def estimate(self, engine: str, model: str, article_words: List[int],
+                 workers: int = 1, chunk_workers: int = 1) -> Optional[Tuple[float, float, float]]:
+        """
+        Wall-clock seconds to translate articles with the given word counts.
+
+        Args:
+            workers:       Articles translated at once (queue workers).
+            chunk_workers: Chunks of one article translated at once.
+
+        Returns:
+            (estimate, low, high) for a 90% range, or None without enough data.
+        """
+        params = self.fit(engine, model)
+        if params is None:
+            return None
+        a, b = params["overhead"], params["per_word"]
+        words_per_chunk = max(params["words_per_chunk"], 1.0)
+        chunk_workers = max(1, chunk_workers)
+
+        chunks_total = words_total = 0
+        wall_sum = wall_max = 0.0
+        for words in article_words:
+            if words <= 0:
+                continue
+            chunks = max(1, math.ceil(words / words_per_chunk))
+            parallel = min(chunks, chunk_workers)
+            # Chunks run in rounds of `parallel`; per-word time is shared across them
+            wall = math.ceil(chunks / parallel) * a + b * words / parallel
+            wall_sum += wall
+            wall_max = max(wall_max, wall)
+            chunks_total += chunks
+            words_total += words
+        if not chunks_total:
+            return 0.0, 0.0, 0.0
+
+        wall = max(wall_sum / max(1, workers), wall_max)
+        serial = chunks_total * a + words_total * b
+
+        # Chunk-to-chunk noise plus uncertainty of the fitted parameters
+        variance = chunks_total * params["sigma"] ** 2
+        if params["cov"] is not None:
+            var_a, cov_ab, var_b = params["cov"]
+            variance += (chunks_total ** 2 * var_a + 2 * chunks_total * words_total * cov_ab
+                         + words_total ** 2 * var_b)
+        spread = self.Z_90 * math.sqrt(max(variance, 0.0)) * (wall / serial if serial > 0 else 1.0)
+        return wall, max(0.0, wall - spread), wall + spread
+
+
+def _format_minutes(total_minutes: float) -> str:
+    if total_minutes < 1:
+        return "< 1 phút"
+    hours = int(total_minutes // 60)
+    minutes = int(total_minutes % 60)
+    if hours > 0:
+        return f"~{hours}h {minutes:02d}m"
+    return f"~{minutes}m"
+
+
+def calculate_book_eta(chapters: List[Dict[str, Any]], wpm: int = 180, engine: str = "",
+                       throughput: Optional[ThroughputModel] = None, model: str = "",
+                       workers: int = 1, chunk_workers: int = 1) -> str:
     """
     Calculates the estimated time remaining to translate all untranslated articles in a book.
 
@@ -39,15 +198,18 @@ def calculate_book_eta(chapters: List[Dict[str, Any]], wpm: int = 180, engine: s
                   Each chapter has an 'articles' key with article dicts.
                   Each article has 'word_count' (int) and 'status' (str).
         wpm: Words per minute speed of the Local/Cloud LLM (default: 180).
+             Used when `throughput` has no observations for the engine yet.
         engine: "cloud" or "local" to append string context like "(Cloud)".
+        throughput: Learned per-chunk model; adds a 90% range to the estimate.
+        model: Model name the throughput model is keyed by.
+        workers: Articles translated concurrently.
+        chunk_workers: Chunks of one article translated concurrently.
 
     Returns:
-        A formatted string like "~2h 15m" or "~45m" or "Đã dịch xong!" or "N/A".
+        A formatted string like "~2h 15m" or "~45m (Cloud, 38m–52m)",
+        "Đã dịch xong!" or "N/A".
     """
-    if wpm <= 0:
-        return "N/A"
-
-    total_untranslated_words = 0
+    article_words = []
 
     for chapter in chapters:
         for article in chapter.get('articles', []):
@@ -57,26 +219,30 @@ def calculate_book_eta(chapters: List[Dict[str, Any]], wpm: int = 180, engine: s
 
             # Only count leaf articles that haven't been translated yet
             if is_leaf and status != 'translated' and word_count > 0:
-                total_untranslated_words += word_count
+                article_words.append(word_count)
 
-    if total_untranslated_words == 0:
-        return "Đã dịch xong! ✅"
+    if not article_words:
+        return "Đã dịch xong! ✅" if wpm > 0 or throughput is not None else "N/A"
 
-    total_minutes = total_untranslated_words / wpm
+    estimate = None
+    if throughput is not None and engine:
+        estimate = throughput.estimate(engine.lower(), model, article_words, workers, chunk_workers)
 
-    if total_minutes < 1:
-        res = "< 1 phút"
-    else:
-        hours = int(total_minutes // 60)
-        minutes = int(total_minutes % 60)
-
-        if hours > 0:
-            res = f"~{hours}h {minutes:02d}m"
-        else:
-            res = f"~{minutes}m"
-            
+    engine_name = ""
     if engine:
         engine_name = "Cloud" if engine.lower() == "cloud" else "Local"
+
+    if estimate is not None:
+        seconds, low, high = estimate
+        res = _format_minutes(seconds / 60)
+        range_text = f"{_format_minutes(low / 60).lstrip('~')}–{_format_minutes(high / 60).lstrip('~')}"
+        label = f"{engine_name}, " if engine_name else ""
+        return f"{res} ({label}{range_text})"
+
+    if wpm <= 0:
+        return "N/A"
+
+    res = _format_minutes(sum(article_words) / wpm)
+    if engine_name:
         return f"{res} ({engine_name})"
-        
     return res
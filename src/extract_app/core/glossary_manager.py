@@ -1,16 +1,23 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/glossary_manager.py
-# Version: 1.0.0
+# Version: 1.1.0
 # Author: Antigravity
 # Description: Manages user-defined translations and terminology.
 # --------------------------------------------------------------------------------
 
+import re
 import json
 import os
 import copy
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..shared import tracing
+
+# Ranking modes accepted by find_relevant_terms()
+RANKING_MODES = ("frequency", "length", "order")
 
 class GlossaryManager:
     """
@@ -32,6 +39,13 @@ class GlossaryManager:
         else:
             self.data_path = Path(data_path)
         self.data: Dict = copy.deepcopy(self.DEFAULT_DATA)  # Deep copy avoids shared state
+
+        # Serialized strings / compiled matchers are memoized per glossary version.
+        # Every write goes through _save_data(), which bumps the version.
+        self._version = 0
+        self._cache: Dict[tuple, Any] = {}
+        self._cache_lock = threading.Lock()
+
         self._load_data()
 
     def _load_data(self):
@@ -55,6 +69,7 @@ class GlossaryManager:
 
     def _save_data(self):
         """Save glossary data to JSON."""
+        self._invalidate_cache()
         self.data_path.parent.mkdir(parents=True, exist_ok=True)
         try:
             with open(self.data_path, 'w', encoding='utf-8') as f:
@@ -62,6 +77,17 @@ class GlossaryManager:
         except Exception as e:
             print(f"[GlossaryManager] Error saving data: {e}")
 
+    def _invalidate_cache(self):
+        """Bump the glossary version so memoized strings are rebuilt lazily."""
+        with self._cache_lock:
+            self._version += 1
+            self._cache.clear()
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter incremented on every glossary change."""
+        return self._version
+
     # --- Category Management ---
     
     def get_categories(self) -> List[str]:
@@ -152,18 +178,101 @@ class GlossaryManager:
         """
         Serialize the active category into a string suitable for LLM injection.
         Returns ALL terms — use get_relevant_glossary_string() for filtered injection.
+        The result is memoized until the glossary changes.
         """
+        cat = self.get_active_category()
+        key = ("active", cat, self._version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
         terms = self.get_terms()
-        if not terms:
-            return ""
-        
-        lines = []
-        for en, vi in terms.items():
-            lines.append(f"'{en}' → '{vi}'")
-            
-        return "\n".join(lines)
+        result = "\n".join(f"'{en}' → '{vi}'" for en, vi in terms.items())
+
+        with self._cache_lock:
+            if key[2] == self._version:
+                self._cache[key] = result
+        return result
+
+    def _get_matchers(self) -> List[Tuple[int, str, str, str, Optional["re.Pattern"]]]:
+        """
+        Return (index, en, vi, en_lower, pattern) for every term in the active
+        category. Patterns are compiled once per glossary version.
+        """
+        cat = self.get_active_category()
+        key = ("matchers", cat, self._version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        matchers = []
+        for idx, (en, vi) in enumerate(self.get_terms().items()):
+            en_lower = en.lower()
+            # Use word boundary matching to avoid partial matches
+            # e.g., "sow" should not match "Moscow"
+            try:
+                pattern = re.compile(r'\b' + re.escape(en_lower) + r'\b')
+            except re.error:
+                pattern = None  # Fallback to simple substring count
+            matchers.append((idx, en, vi, en_lower, pattern))
+
+        with self._cache_lock:
+            if key[2] == self._version:
+                self._cache[key] = matchers
+        return matchers
+
+    @tracing.traced("glossary.match")
+    def find_relevant_terms(
+        self,
+        source_text: str,
+        max_terms: Optional[int] = None,
+        ranking: str = "order",
+    ) -> List[Tuple[str, str]]:
+        """
+        Return the (en, vi) pairs of the active category that occur in source_text.
 
-    def get_relevant_glossary_string(self, source_text: str) -> str:
+        Args:
+            source_text: The chunk of text that will be translated.
+            max_terms:   Keep at most this many terms (None or <= 0 = no cap).
+            ranking:     How to order terms before capping:
+                         "frequency" — most occurrences first, longer terms break ties;
+                         "length"    — longest (most specific) terms first;
+                         "order"     — glossary insertion order.
+        """
+        if not source_text:
+            return []
+        matchers = self._get_matchers()
+        if not matchers:
+            return []
+
+        text_lower = source_text.lower()
+        hits = []
+        for idx, en, vi, en_lower, pattern in matchers:
+            # Cheap substring pre-check: a boundary match implies a substring match
+            if en_lower not in text_lower:
+                continue
+            count = len(pattern.findall(text_lower)) if pattern else text_lower.count(en_lower)
+            if count:
+                hits.append((count, idx, en, vi))
+
+        if ranking == "frequency":
+            hits.sort(key=lambda h: (-h[0], -len(h[2]), h[1]))
+        elif ranking == "length":
+            hits.sort(key=lambda h: (-len(h[2]), h[1]))
+        else:
+            hits.sort(key=lambda h: h[1])
+
+        if max_terms and max_terms > 0:
+            hits = hits[:max_terms]
+        return [(en, vi) for _, _, en, vi in hits]
+
+    def get_relevant_glossary_string(
+        self,
+        source_text: str,
+        max_terms: Optional[int] = None,
+        ranking: str = "order",
+        quoted: bool = False,
+    ) -> str:
         """
         Filter active glossary to only include terms that appear in source_text.
         Uses case-insensitive word-boundary matching for accuracy.
@@ -171,34 +280,18 @@ class GlossaryManager:
         This is critical for Local LLM (TranslateGemma 12B) which has limited
         context (4096 tokens). Injecting 100+ terms wastes precious tokens;
         typically only 5-15 terms are relevant per chunk of 1500 chars.
+        The Cloud path uses it too, with a cap and ranking from settings.
         
         Args:
             source_text: The chunk of text that will be translated.
+            max_terms: Optional cap on the number of injected terms.
+            ranking: Ordering used before capping (see find_relevant_terms).
+            quoted: Use the Cloud format ('en' → 'vi') instead of en → vi.
             
         Returns:
             Formatted glossary string with only matching terms, or empty string.
         """
-        import re
-        
-        terms = self.get_terms()
-        if not terms or not source_text:
-            return ""
-        
-        text_lower = source_text.lower()
-        matched_lines = []
-        
-        for en, vi in terms.items():
-            en_lower = en.lower()
-            # Use word boundary matching to avoid partial matches
-            # e.g., "sow" should not match "Moscow"
-            # For multi-word terms, check if the exact phrase exists
-            try:
-                pattern = r'\b' + re.escape(en_lower) + r'\b'
-                if re.search(pattern, text_lower):
-                    matched_lines.append(f"{en} → {vi}")
-            except re.error:
-                # Fallback to simple substring check for unusual terms
-                if en_lower in text_lower:
-                    matched_lines.append(f"{en} → {vi}")
-        
-        return "\n".join(matched_lines)
+        pairs = self.find_relevant_terms(source_text, max_terms=max_terms, ranking=ranking)
+        if quoted:
+            return "\n".join(f"'{en}' → '{vi}'" for en, vi in pairs)
+        return "\n".join(f"{en} → {vi}" for en, vi in pairs)
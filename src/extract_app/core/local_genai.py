@@ -1,15 +1,20 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/local_genai.py
-# Version: 1.0.0
+# Version: 1.3.0
 # Author: Antigravity
 # Description: Local LLM Service using llama-cpp-python for TranslateGemma 12B.
 # --------------------------------------------------------------------------------
 
 import os
 import time
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List, Callable
+import functools
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterator, List, Callable, Tuple
+
+from ..shared import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,240 @@ try:
 except ImportError:
     Llama = None
 
+try:
+    from llama_cpp.llama_speculative import LlamaDraftModel, LlamaPromptLookupDecoding
+except ImportError:
+    LlamaDraftModel = object
+    LlamaPromptLookupDecoding = None
+
+# Speculative decoding: "prompt_lookup" drafts from n-grams already in the
+# prompt (translations copy placeholders, numbers, names and Markdown from the
+# source); a path to a small GGUF uses that model as the drafter.
+DRAFT_PROMPT_LOOKUP = "prompt_lookup"
+DEFAULT_DRAFT_TOKENS = 10
+
+
+class _GGUFDraftModel(LlamaDraftModel):
+    """Greedy drafts from a small GGUF sharing the target model's vocabulary."""
+
+    def __init__(self, model_path: str, num_pred_tokens: int = DEFAULT_DRAFT_TOKENS,
+                 n_ctx: int = 4096, n_gpu_layers: int = 0):
+        self.num_pred_tokens = num_pred_tokens
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_gpu_layers=n_gpu_layers, verbose=False)
+
+    def __call__(self, input_ids, /, **kwargs):
+        import numpy as np
+
+        draft = []
+        # generate() reuses the longest common prefix already in the draft KV cache
+        for token in self.llm.generate(input_ids.tolist(), top_k=1, temp=0.0, reset=True):
+            if token == self.llm.token_eos() or len(draft) >= self.num_pred_tokens:
+                break
+            draft.append(token)
+        return np.array(draft, dtype=np.intc)
+
+
+class _CountingDraftModel(LlamaDraftModel):
+    """Counts drafting rounds and proposed tokens so acceptance can be reported."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+        self.proposed = 0
+
+    def reset_counts(self) -> None:
+        self.calls = 0
+        self.proposed = 0
+
+    def __call__(self, input_ids, /, **kwargs):
+        draft = self.inner(input_ids, **kwargs)
+        self.calls += 1
+        self.proposed += len(draft)
+        return draft
+
+
+def make_draft_model(draft: Optional[str], num_pred_tokens: int = DEFAULT_DRAFT_TOKENS,
+                     n_ctx: int = 4096, n_gpu_layers: int = 0):
+    """
+    Build the llama.cpp draft model for speculative decoding.
+
+    Args:
+        draft: None/"" (off), "prompt_lookup", or the path to a small .gguf drafter
+        num_pred_tokens: Tokens proposed per drafting round
+
+    Returns:
+        A counting draft model, or None when speculative decoding is off/unavailable.
+    """
+    if not draft:
+        return None
+    if draft == DRAFT_PROMPT_LOOKUP:
+        if LlamaPromptLookupDecoding is None:
+            logger.warning("[LocalLLM] Prompt-lookup decoding requires a newer llama-cpp-python.")
+            return None
+        inner = LlamaPromptLookupDecoding(num_pred_tokens=num_pred_tokens)
+    else:
+        if not os.path.exists(draft):
+            raise FileNotFoundError(f"Không tìm thấy draft model tại: {draft}")
+        inner = _GGUFDraftModel(draft, num_pred_tokens, n_ctx, n_gpu_layers)
+    return _CountingDraftModel(inner)
+
+def _state_nbytes(state) -> int:
+    """Approximate memory held by a LlamaState: KV cells plus the copied scores and ids."""
+    size = getattr(state, "llama_state_size", 0) or 0
+    for name in ("scores", "input_ids"):
+        size += getattr(getattr(state, name, None), "nbytes", 0) or 0
+    return int(size)
+
+def draft_spec_from_settings(settings) -> Tuple[Optional[str], int]:
+    """Speculative decoding settings as (draft_model, draft_tokens) for load_model."""
+    mode = settings.get("local_speculative", "off")
+    tokens = settings.get("local_draft_tokens", DEFAULT_DRAFT_TOKENS)
+    if not isinstance(tokens, int) or tokens <= 0:
+        tokens = DEFAULT_DRAFT_TOKENS
+    if mode == DRAFT_PROMPT_LOOKUP:
+        return DRAFT_PROMPT_LOOKUP, tokens
+    if mode == "model":
+        return (settings.get("local_draft_model_path", "") or None), tokens
+    return None, tokens
+
+
+# GGML tensor types accepted for the KV cache (type_k / type_v).
+# Quantized V cache requires flash attention.
+KV_CACHE_TYPES = {"f32": 0, "f16": 1, "q4_0": 2, "q4_1": 3, "q5_0": 6, "q5_1": 7, "q8_0": 8}
+
+
+@functools.lru_cache(maxsize=None)
+def detect_cpu_topology() -> Tuple[int, int]:
+    """
+    Return (physical_cores, logical_cpus).
+
+    llama.cpp generation is memory-bound and runs best with one thread per
+    physical core; prompt evaluation (batch) can use every logical CPU.
+    Probed once per process: LoadProfile is built for every local chunk.
+    """
+    logical = os.cpu_count() or 1
+    try:
+        import psutil
+        physical = psutil.cpu_count(logical=False)
+        if physical:
+            return physical, logical
+    except ImportError:
+        pass
+    try:
+        cores = set()
+        physical_id = "0"
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                name = name.strip()
+                if name == "physical id":
+                    physical_id = value.strip()
+                elif name == "core id":
+                    cores.add((physical_id, value.strip()))
+        if cores:
+            return len(cores), logical
+    except OSError:
+        pass
+    return max(1, logical // 2) if logical > 1 else 1, logical
+
+
+def available_memory() -> Optional[int]:
+    """Available system RAM in bytes, or None if it cannot be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class LoadProfile:
+    """
+    llama.cpp load-time tuning knobs for one model.
+
+    None for n_threads / n_threads_batch means auto-detected from the CPU
+    topology; everything else maps 1:1 to llama_cpp.Llama arguments.
+    """
+
+    def __init__(self,
+                 n_ctx: int = 4096,
+                 n_threads: Optional[int] = None,
+                 n_threads_batch: Optional[int] = None,
+                 n_batch: int = 512,
+                 use_mmap: bool = True,
+                 use_mlock: bool = False,
+                 kv_cache_type: str = "f16",
+                 flash_attn: bool = True):
+        physical, logical = detect_cpu_topology()
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or physical
+        self.n_threads_batch = n_threads_batch or logical
+        self.n_batch = n_batch
+        self.use_mmap = use_mmap
+        self.use_mlock = use_mlock
+        self.kv_cache_type = kv_cache_type if kv_cache_type in KV_CACHE_TYPES else "f16"
+        self.flash_attn = flash_attn
+
+    @classmethod
+    def from_settings(cls, settings) -> "LoadProfile":
+        """Build a profile from SettingsManager values (0 = auto for thread counts)."""
+        return cls(
+            n_ctx=settings.get("local_n_ctx", 4096),
+            n_threads=settings.get("local_n_threads", 0) or None,
+            n_threads_batch=settings.get("local_n_threads_batch", 0) or None,
+            n_batch=settings.get("local_n_batch", 512),
+            use_mmap=bool(settings.get("local_use_mmap", True)),
+            use_mlock=bool(settings.get("local_use_mlock", False)),
+            kv_cache_type=settings.get("local_kv_cache_type", "f16"),
+            flash_attn=bool(settings.get("local_flash_attn", True)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_ctx": self.n_ctx,
+            "n_threads": self.n_threads,
+            "n_threads_batch": self.n_threads_batch,
+            "n_batch": self.n_batch,
+            "use_mmap": self.use_mmap,
+            "use_mlock": self.use_mlock,
+            "kv_cache_type": self.kv_cache_type,
+            "flash_attn": self.flash_attn,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LoadProfile":
+        return cls(**data)
+
+    def key(self) -> tuple:
+        """Hashable identity: two loads with equal keys can share one Llama."""
+        return tuple(sorted(self.to_dict().items()))
+
+    def to_llama_kwargs(self) -> Dict[str, Any]:
+        kv_type = KV_CACHE_TYPES[self.kv_cache_type]
+        if kv_type != KV_CACHE_TYPES["f16"] and not self.flash_attn:
+            logger.warning("[LocalLLM] Quantized KV cache needs flash attention; using f16.")
+            kv_type = KV_CACHE_TYPES["f16"]
+        return {
+            "n_ctx": self.n_ctx,
+            "n_threads": self.n_threads,
+            "n_threads_batch": self.n_threads_batch,
+            "n_batch": self.n_batch,
+            "use_mmap": self.use_mmap,
+            "use_mlock": self.use_mlock,
+            "type_k": kv_type,
+            "type_v": kv_type,
+            "flash_attn": self.flash_attn,
+        }
+
+    def __repr__(self) -> str:
+        return (f"ctx={self.n_ctx}, threads={self.n_threads}/{self.n_threads_batch}, "
+                f"batch={self.n_batch}, mmap={self.use_mmap}, mlock={self.use_mlock}, "
+                f"kv={self.kv_cache_type}, flash_attn={self.flash_attn}")
+
+
 class LocalGenAI:
     """
     Wrapper for local LLM inference using llama-cpp-python.
@@ -27,6 +266,17 @@ class LocalGenAI:
     _instance = None
     _model_path: str = ""
     _llm: Optional[Any] = None
+    _n_ctx: int = 4096
+
+    # KV-cache snapshots of the fixed instruction prefix. A LlamaState holds the
+    # KV cells of the prefix plus a copy of the scores array (n_batch x n_vocab
+    # floats, ~500 MB for a 262k vocab; n_ctx rows with logits_all), so the
+    # cache is bounded by bytes. The newest state is always kept.
+    MAX_PREFIX_STATES = 4
+    MAX_PREFIX_STATE_BYTES = 768 * 1024 * 1024
+
+    # Models kept loaded for instant switching (default; see max_resident_models)
+    MAX_RESIDENT_MODELS = 2
 
     @classmethod
     def get_instance(cls):
@@ -36,66 +286,133 @@ class LocalGenAI:
 
     def __init__(self):
         self.model_loaded = False
+        self.last_usage: Dict[str, int] = {}  # llama.cpp usage of the last generation
+        self.prefix_cache_enabled = True
+        # sha256(model + prefix) -> (prefix token count, LlamaState, bytes), LRU ordered
+        self._prefix_states: "OrderedDict[str, tuple]" = OrderedDict()
+        self._resident_prefix_key: Optional[str] = None  # Prefix currently in the KV cache
+        self._draft = None  # _CountingDraftModel when speculative decoding is on
+        self.draft_spec = (None, DEFAULT_DRAFT_TOKENS)  # (draft, num_pred_tokens) of the loaded model
+        self.max_resident_models = self.MAX_RESIDENT_MODELS
+        # (path, gpu layers, profile key, draft spec) -> (Llama, draft, n_ctx), LRU ordered
+        self._resident: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._active_key: Optional[tuple] = None
         
-    def load_model(self, model_path: str, n_ctx: int = 4096, n_gpu_layers: int = -1):
+    @tracing.traced("local.load_model")
+    def load_model(self, model_path: str, n_ctx: int = 4096, n_gpu_layers: int = -1,
+                   n_threads: Optional[int] = None, draft_model: Optional[str] = None,
+                   draft_tokens: int = DEFAULT_DRAFT_TOKENS, profile: Optional["LoadProfile"] = None):
         """
         Load the GGUF model into memory/GPU.
+
+        Up to max_resident_models models stay resident (LRU); switching back to
+        one of them only swaps the active handle. Weights are memory-mapped, so
+        resident models mostly cost page cache rather than private memory.
         
         Args:
             model_path: Absolute path to .gguf file
             n_ctx: Context window size (reduced to 4096 for translation efficiency)
             n_gpu_layers: Number of layers to offload to GPU (-1 = all, 0 = cpu only)
+            n_threads: CPU threads for generation (None = auto-detected)
+            draft_model: Speculative decoding — None (off), "prompt_lookup",
+                         or the path to a small draft .gguf with the same vocabulary
+            draft_tokens: Tokens proposed per drafting round
+            profile: Full load profile; when given, n_ctx / n_threads are ignored
         """
         if Llama is None:
             raise ImportError("Thư viện 'llama-cpp-python' chưa được cài đặt.")
-            
-        if self._llm and self._model_path == model_path:
+
+        if profile is None:
+            profile = LoadProfile(n_ctx=n_ctx, n_threads=n_threads)
+        spec = (draft_model or None, draft_tokens)
+        key = (model_path, n_gpu_layers, profile.key(), spec)
+
+        if self._llm and self._active_key == key:
             return  # Already loaded
+        if key in self._resident:
+            self._activate(key)
+            logger.info(f"[LocalLLM] Switched to resident model: {model_path}")
+            return
 
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Không tìm thấy model tại: {model_path}")
 
-        logger.info(f"[LocalLLM] Loading model: {model_path} (GPU Layers: {n_gpu_layers})...")
+        self._make_room(os.path.getsize(model_path))
+        logger.info(f"[LocalLLM] Loading model: {model_path} (GPU Layers: {n_gpu_layers}, {profile})...")
+        try:
+            draft = make_draft_model(draft_model, draft_tokens, profile.n_ctx, n_gpu_layers)
+        except Exception as e:
+            logger.warning(f"[LocalLLM] Speculative decoding disabled: {e}")
+            draft = None
+        extra = profile.to_llama_kwargs()
+        if draft is not None:
+            extra["draft_model"] = draft
         
         # Attempt 1: Load with requested configuration (likely with GPU)
         try:
-            self._llm = Llama(
-                model_path=model_path,
-                n_ctx=n_ctx,
-                n_gpu_layers=n_gpu_layers,
-                flash_attn=True,
-                verbose=False
-            )
-            self._model_path = model_path
-            self.model_loaded = True
+            llm = Llama(model_path=model_path, n_gpu_layers=n_gpu_layers, verbose=False, **extra)
             logger.info("[LocalLLM] Model loaded successfully.")
-            return
         except Exception as e:
             logger.error(f"[LocalLLM] Error loading with GPU layers={n_gpu_layers}: {e}")
+            llm = None
             
             # Attempt 2: Fallback to CPU if GPU failed and n_gpu_layers was not 0
             if n_gpu_layers != 0:
                 logger.info("[LocalLLM] Attempting fallback to CPU (n_gpu_layers=0)...")
                 try:
-                    self._llm = Llama(
-                        model_path=model_path,
-                        n_ctx=n_ctx,
-                        n_gpu_layers=0, # Force CPU
-                        flash_attn=True,
-                        verbose=False
-                    )
-                    self._model_path = model_path
-                    self.model_loaded = True
+                    llm = Llama(model_path=model_path, n_gpu_layers=0, verbose=False, **extra)  # Force CPU
                     logger.info("[LocalLLM] Model loaded successfully (CPU Fallback).")
-                    return
                 except Exception as e_cpu:
                     logger.error(f"[LocalLLM] CPU Fallback failed: {e_cpu}")
-            
-            self.model_loaded = False
-            raise e
+
+            if llm is None:
+                self.model_loaded = self._llm is not None
+                raise e
+
+        self._resident[key] = (llm, draft, profile.n_ctx)
+        self._activate(key)
+        while len(self._resident) > max(1, self.max_resident_models):
+            self._evict_lru()
+
+    def _activate(self, key: tuple) -> None:
+        """Make a resident model the one used for generation."""
+        llm, draft, n_ctx = self._resident[key]
+        self._resident.move_to_end(key)
+        self._llm, self._draft, self._n_ctx = llm, draft, n_ctx
+        self._model_path, self.draft_spec = key[0], key[3]
+        self._active_key = key
+        self._resident_prefix_key = None  # KV cache belongs to the previous model
+        self.model_loaded = True
+
+    def _evict_lru(self) -> None:
+        """Release the least recently used resident model (never the active one)."""
+        for key in self._resident:
+            if key != self._active_key:
+                logger.info(f"[LocalLLM] Evicting resident model: {key[0]}")
+                del self._resident[key]
+                return
+
+    def _make_room(self, needed_bytes: int) -> None:
+        """Evict inactive resident models while available RAM is below *needed_bytes*."""
+        while len(self._resident) > (1 if self._active_key in self._resident else 0):
+            available = available_memory()
+            if available is None or available >= needed_bytes:
+                return
+            self._evict_lru()
+            import gc
+            gc.collect()
+
+    @property
+    def resident_models(self) -> List[str]:
+        """Paths of resident models, least recently used first."""
+        return [key[0] for key in self._resident]
 
     def unload_model(self):
-        """Free memory by releasing the model."""
+        """Free memory by releasing every resident model."""
+        self.clear_prefix_cache()
+        self._resident.clear()
+        self._draft = None
+        self._active_key = None
         if self._llm:
             del self._llm
             self._llm = None
@@ -103,23 +420,192 @@ class LocalGenAI:
         import gc
         gc.collect()
 
+    @property
+    def n_ctx(self) -> int:
+        """Context window of the loaded model (configured value if not loaded)."""
+        if self._llm is not None:
+            try:
+                return int(self._llm.n_ctx())
+            except Exception:
+                pass
+        return self._n_ctx
+
+    def count_tokens(self, text: str, special: bool = False) -> int:
+        """Count tokens of *text* with the model's own tokenizer."""
+        if not self._llm or not text:
+            return 0
+        return len(self._llm.tokenize(text.encode("utf-8"), add_bos=False, special=special))
+
+    def build_prefix(self, system_instruction: str) -> str:
+        """The part of the prompt that only depends on the instruction (cacheable)."""
+        return f"<start_of_turn>user\n{system_instruction}\n\n"
+
+    def build_prompt(self, system_instruction: str, prompt: str) -> str:
+        """Wrap instruction + prompt in the Gemma chat template."""
+        # Standard Gemma: <start_of_turn>user\n{content}<end_of_turn>\n<start_of_turn>model\n
+        return f"{self.build_prefix(system_instruction)}{prompt}<end_of_turn>\n<start_of_turn>model\n"
+
+    def clear_prefix_cache(self):
+        """Drop all saved prefix states (model changed or memory is needed)."""
+        self._prefix_states.clear()
+        self._resident_prefix_key = None
+
+    def _prime_prefix(self, prefix: str) -> int:
+        """
+        Make the llama.cpp KV cache start with the evaluated *prefix*.
+
+        llama-cpp-python already skips the longest common token prefix with the
+        previous generate(), so a prefix that stays the same between calls costs
+        nothing either way. The saved states only help when the prefix changes
+        between calls (style switches, a reload, the server's slots serving
+        different styles): a known prefix is restored instead of re-evaluated.
+        States are keyed by sha256(active model key + prefix text).
+
+        Returns:
+            Number of prefix tokens reused without evaluation (0 on a miss).
+        """
+        key = hashlib.sha256(f"{self._active_key or self._model_path}\0{prefix}".encode("utf-8")).hexdigest()
+        entry = self._prefix_states.get(key)
+
+        if entry and key == self._resident_prefix_key:
+            self._prefix_states.move_to_end(key)
+            return entry[0]
+
+        if entry:
+            self._llm.load_state(entry[1])
+            self._prefix_states.move_to_end(key)
+            self._resident_prefix_key = key
+            return entry[0]
+
+        # Miss: evaluate the prefix once and snapshot the KV cache
+        start = time.time()
+        tokens = self._llm.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)
+        self._llm.reset()
+        self._llm.eval(tokens)
+        state = self._llm.save_state()
+        self._prefix_states[key] = (len(tokens), state, _state_nbytes(state))
+        self._resident_prefix_key = key
+        while len(self._prefix_states) > 1 and (
+                len(self._prefix_states) > self.MAX_PREFIX_STATES
+                or sum(e[2] for e in self._prefix_states.values()) > self.MAX_PREFIX_STATE_BYTES):
+            self._prefix_states.popitem(last=False)
+        logger.info(f"[LocalLLM] Cached instruction prefix: {len(tokens)} tokens in {time.time() - start:.2f}s")
+        return 0
+
+    def _prepare_generation(self, system_instruction: str, prompt: str, max_tokens: int):
+        """Build the full prompt, clamp max_tokens and prime the prefix KV cache.
+
+        Returns:
+            (full_prompt, max_tokens, reused_prefix_tokens)
+        """
+        # Construct Prompt (Gemma 2 / ChatML style)
+        full_prompt = self.build_prompt(system_instruction, prompt)
+
+        # Never ask for more tokens than the context has left after the prompt
+        prompt_tokens = self.count_tokens(full_prompt, special=True)
+        if prompt_tokens:
+            max_tokens = max(1, min(max_tokens, self.n_ctx - prompt_tokens))
+
+        reused = 0
+        if self.prefix_cache_enabled:
+            try:
+                reused = self._prime_prefix(self.build_prefix(system_instruction))
+            except Exception as e:
+                logger.warning(f"[LocalLLM] Prefix cache unavailable, evaluating full prompt: {e}")
+                self.clear_prefix_cache()
+        else:
+            self._resident_prefix_key = None
+        if self._draft is not None:
+            self._draft.reset_counts()
+        return full_prompt, max_tokens, reused
+
+    def _record_draft_usage(self) -> None:
+        """Add speculative decoding counters to last_usage.
+
+        Every drafting round is one forward pass that yields one sampled token
+        plus the accepted draft tokens, so accepted = completion - rounds.
+        """
+        if self._draft is None or not self._draft.calls:
+            return
+        completion = self.last_usage.get('completion_tokens', 0)
+        self.last_usage['draft_proposed'] = self._draft.proposed
+        self.last_usage['draft_accepted'] = max(0, completion - self._draft.calls)
+
+    def generate_stream(self,
+                        system_instruction: str,
+                        prompt: str,
+                        max_tokens: int = 4096,
+                        temperature: float = 0.15,
+                        stop: List[str] = None) -> Iterator[str]:
+        """
+        Stream the response token by token (each item is a decoded text piece).
+        Closing the iterator early stops generation.
+        """
+        if not self._llm:
+            return
+
+        full_prompt, max_tokens, reused = self._prepare_generation(system_instruction, prompt, max_tokens)
+        self.last_usage = {'completion_tokens': 0, 'cached_prefix_tokens': reused}
+        pieces = []
+        for part in self._llm(
+            full_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stop=stop or ["<end_of_turn>", "<start_of_turn>"],
+            echo=False,
+            stream=True
+        ):
+            piece = part['choices'][0]['text']
+            pieces.append(piece)
+            yield piece
+        # Pieces are not tokens: llama.cpp merges the bytes of multi-byte UTF-8
+        # characters (frequent in Vietnamese) into one piece
+        self.last_usage['completion_tokens'] = self.count_tokens("".join(pieces))
+        self._record_draft_usage()
+
+    @tracing.traced("local.generate")
+    def generate_with_usage(self, system_instruction: str, prompt: str,
+                            **kwargs) -> Tuple[Optional[str], Dict[str, int]]:
+        """generate_response() plus the usage of this very call (see LocalServerClient)."""
+        text = self.generate_response(system_instruction, prompt, **kwargs)
+        return text, dict(self.last_usage)
+
     def generate_response(self, 
                           system_instruction: str, 
                           prompt: str, 
                           max_tokens: int = 4096,
                           temperature: float = 0.15,
-                          stop: List[str] = None) -> Optional[str]:
+                          stop: List[str] = None,
+                          on_token: Optional[Callable[[str], None]] = None,
+                          should_stop: Optional[Callable[[], bool]] = None) -> Optional[str]:
         """
         Generate response using ChatML/Gemma format.
+
+        When *on_token* or *should_stop* is given the completion is streamed:
+        on_token receives every text piece, and generation is abandoned (None
+        returned) as soon as should_stop() becomes true.
         """
         if not self._llm:
             return None
 
-        # Construct Prompt (Gemma 2 / ChatML style)
-        # Standard Gemma: <start_of_turn>user\n{content}<end_of_turn>\n<start_of_turn>model\n
-        
-        full_prompt = f"<start_of_turn>user\n{system_instruction}\n\n{prompt}<end_of_turn>\n<start_of_turn>model\n"
-        
+        if on_token or should_stop:
+            pieces = []
+            try:
+                stream = self.generate_stream(system_instruction, prompt, max_tokens, temperature, stop)
+                for piece in stream:
+                    pieces.append(piece)
+                    if on_token:
+                        on_token(piece)
+                    if should_stop and should_stop():
+                        stream.close()
+                        logger.info("[LocalLLM] Generation aborted by caller.")
+                        return None
+                return "".join(pieces).strip()
+            except Exception as e:
+                logger.error(f"[LocalLLM] Generation error: {e}")
+                return None
+
+        full_prompt, max_tokens, reused = self._prepare_generation(system_instruction, prompt, max_tokens)
         try:
             output = self._llm(
                 full_prompt,
@@ -128,6 +614,9 @@ class LocalGenAI:
                 stop=stop or ["<end_of_turn>", "<start_of_turn>"],
                 echo=False
             )
+            self.last_usage = dict(output.get('usage') or {})
+            self.last_usage['cached_prefix_tokens'] = reused
+            self._record_draft_usage()
             return output['choices'][0]['text'].strip()
         except Exception as e:
             logger.error(f"[LocalLLM] Generation error: {e}")
@@ -155,27 +644,48 @@ class LocalTranslationService:
         self.engine = LocalGenAI.get_instance()
         self.model_path = model_path
 
+    def build_instruction(self, system_instruction: str = "") -> str:
+        """Use the strict prompt as base, append the style instruction if provided."""
+        base_instruction = self.STRICT_SYSTEM_PROMPT
+        if system_instruction:
+            base_instruction += f"\n\nHƯỚNG DẪN BỔ SUNG:\n{system_instruction}"
+        return base_instruction
+
     def translate(self, text: str, 
                   system_instruction: str = "",
-                  glossary: str = "") -> Optional[str]:
+                  glossary: str = "",
+                  on_token: Optional[Callable[[str], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """Translate text using local LLM with strict prompt rules (see translate_with_usage)."""
+        return self.translate_with_usage(text, system_instruction, glossary, on_token, should_stop)[0]
+
+    def translate_with_usage(self, text: str,
+                             system_instruction: str = "",
+                             glossary: str = "",
+                             on_token: Optional[Callable[[str], None]] = None,
+                             should_stop: Optional[Callable[[], bool]] = None
+                             ) -> Tuple[Optional[str], Dict[str, int]]:
         """Translate text using local LLM with strict prompt rules.
         
         Args:
             text: Source text to translate.
             system_instruction: Optional override for system prompt (used by StyleManager).
             glossary: Optional glossary terms (format: 'term_en → term_vi').
+            on_token: Optional callback receiving streamed text pieces.
+            should_stop: Optional predicate; generation is aborted when it returns True.
+
+        Returns:
+            (translation, usage of this call) — chunks may run concurrently on
+            the inference server, so the engine's last_usage is not reliable.
         """
         # Ensure model is active
         if not self.engine.model_loaded:
             if self.model_path:
                 self.engine.load_model(self.model_path)
             else:
-                return "Error: Model path not configured."
+                return "Error: Model path not configured.", {}
         
-        # Build instruction: use strict prompt as base, append style if provided
-        base_instruction = self.STRICT_SYSTEM_PROMPT
-        if system_instruction:
-            base_instruction += f"\n\nHƯỚNG DẪN BỔ SUNG:\n{system_instruction}"
+        base_instruction = self.build_instruction(system_instruction)
         
         # Build the user prompt: glossary BEFORE text for better attention
         # (closer to output = higher attention weight in small models)
@@ -187,7 +697,9 @@ class LocalTranslationService:
             )
         user_prompt += text
 
-        return self.engine.generate_response(
+        return self.engine.generate_with_usage(
             system_instruction=base_instruction,
-            prompt=user_prompt
+            prompt=user_prompt,
+            on_token=on_token,
+            should_stop=should_stop
         )
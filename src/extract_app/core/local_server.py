@@ -0,0 +1,595 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/core/local_server.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Out-of-process local inference server + client.
+#
+#   The server is a separate Python process that loads the GGUF model once and
+#   keeps it warm across app restarts (until idle_timeout). The GUI talks to it
+#   over an authenticated local socket (multiprocessing.connection).
+#
+#   Concurrent requests are queued and dispatched to N "slots" — independent
+#   llama.cpp contexts over the same memory-mapped weights, each with its own
+#   KV cache and a share of the CPU threads. llama-cpp-python's high-level API
+#   does not expose multi-sequence batched decoding, so parallel slots are how
+#   concurrent chunk requests are batched here.
+#
+#   Run manually with:
+#       python -m extract_app.core.local_server --port 8765 --slots 2
+# --------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import queue
+import secrets
+import logging
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .local_genai import DEFAULT_DRAFT_TOKENS, LocalGenAI, LoadProfile, detect_cpu_topology
+from ..shared import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_IDLE_TIMEOUT = 30 * 60  # Seconds without requests before the server exits
+AUTHKEY_ENV = "EXTRACT_LOCAL_SERVER_KEY"
+
+
+def default_slots(n_gpu_layers: int) -> int:
+    """Pick a slot count: one per 4 physical cores on CPU, one on GPU (VRAM is not shared)."""
+    if n_gpu_layers != 0:
+        return 1
+    return max(1, min(4, detect_cpu_topology()[0] // 4))
+
+
+def get_state_path() -> Path:
+    """
+    Where the running server's address/authkey are recorded.
+
+    Lives in a per-user directory (not the possibly shared portable user_data):
+    anyone holding the authkey can send pickled requests to the server.
+    """
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_RUNTIME_DIR") or Path.home() / ".cache")
+    return base / "ExtractPDF-EPUB" / "local_server.json"
+
+
+def write_state(port: int, authkey: str) -> Path:
+    """Publish the server address and authkey, readable by the current user only."""
+    state_path = get_state_path()
+    state_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    fd = os.open(str(state_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        if hasattr(os, "fchmod"):
+            os.fchmod(f.fileno(), 0o600)  # The mode above only applies to new files
+        f.write(json.dumps({"port": port, "authkey": authkey}))
+    return state_path
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Server
+# ─────────────────────────────────────────────────────────────────────
+
+class LocalInferenceServer:
+    """
+    Serves load / tokenize / generate requests for one GGUF model.
+
+    Each client connection is handled on its own thread; generation requests
+    wait for a free slot, so up to `n_slots` chunks are generated at once.
+    """
+
+    def __init__(self, port: int, authkey: bytes, n_slots: int = 0,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.address = ("127.0.0.1", port)
+        self.authkey = authkey
+        self.requested_slots = n_slots
+        self.idle_timeout = idle_timeout
+
+        # Free engines; replaced by a new queue on every load. A None in a
+        # queue tells blocked requests it was retired (re-read self._slots).
+        self._slots: "queue.Queue[Optional[LocalGenAI]]" = queue.Queue()
+        self._engines: List[LocalGenAI] = []
+        self._load_lock = threading.Lock()
+        self._active_lock = threading.Lock()
+        self._model_path = ""
+        self._n_ctx = 4096
+        self._request_key: Optional[tuple] = None  # Arguments of the current load
+        self._last_activity = time.time()
+        self._active = 0
+        self._stop = threading.Event()
+        self.ready = threading.Event()  # Set once the listener is bound
+
+    # ── Lifecycle ────────────────────────────────────────────────────
+
+    def serve_forever(self) -> None:
+        listener = Listener(self.address, authkey=self.authkey)
+        self.address = listener.address  # Resolves port 0 to the bound port
+        self.ready.set()
+        logger.info(f"[LocalServer] Listening on {self.address[0]}:{self.address[1]}")
+        threading.Thread(target=self._idle_watchdog, args=(listener,), daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    if self._stop.is_set():
+                        break
+                    logger.warning(f"[LocalServer] Rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            self._unload()
+            logger.info("[LocalServer] Stopped")
+
+    def _idle_watchdog(self, listener) -> None:
+        """Exit after idle_timeout seconds without requests (frees RAM/VRAM)."""
+        while not self._stop.wait(5):
+            if self.idle_timeout and self._active == 0 and \
+                    time.time() - self._last_activity > self.idle_timeout:
+                logger.info("[LocalServer] Idle timeout reached, shutting down")
+                self._shutdown(listener)
+
+    def _shutdown(self, listener=None) -> None:
+        self._stop.set()
+        # Unblock accept() by connecting to ourselves
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+
+    # ── Model management ─────────────────────────────────────────────
+
+    def _load(self, model_path: str, n_gpu_layers: int,
+              draft_model: Optional[str] = None, draft_tokens: int = DEFAULT_DRAFT_TOKENS,
+              profile: Optional[Dict[str, Any]] = None) -> None:
+        """Load *model_path* into every slot. *profile* is a LoadProfile.to_dict()."""
+        profile = dict(profile or {})
+        with self._load_lock:
+            spec = (draft_model or None, draft_tokens)
+            request_key = (model_path, n_gpu_layers, sorted(profile.items()), spec)
+            if self._engines and self._request_key == request_key:
+                return
+            self._drain_slots()
+            self._unload()
+            n_slots = self.requested_slots or default_slots(n_gpu_layers)
+            physical, logical = detect_cpu_topology()
+            # Split the cores between slots so parallel generations do not oversubscribe
+            profile["n_threads"] = max(1, min(profile.get("n_threads") or physical, physical // n_slots or 1))
+            profile["n_threads_batch"] = max(1, logical // n_slots)
+            load_profile = LoadProfile.from_dict(profile)
+            for _ in range(n_slots):
+                engine = LocalGenAI()
+                # Weights are mmapped, so extra slots share the same pages
+                engine.load_model(model_path, n_gpu_layers=n_gpu_layers, draft_model=draft_model,
+                                  draft_tokens=draft_tokens, profile=load_profile)
+                self._engines.append(engine)
+                self._slots.put(engine)
+            self._model_path = model_path
+            self._n_ctx = load_profile.n_ctx
+            self._request_key = request_key
+            logger.info(f"[LocalServer] Loaded {model_path} in {n_slots} slot(s) ({load_profile})")
+
+    def _drain_slots(self) -> None:
+        """
+        Wait until every engine is back from in-flight generations, then retire
+        the queue. Called with _load_lock held, so no new request picks it up.
+        """
+        old_slots = self._slots
+        for _ in range(len(self._engines)):
+            old_slots.get()
+        old_slots.put(None)  # Wake requests still blocked on the old queue
+
+    def _unload(self) -> None:
+        for engine in self._engines:
+            engine.unload_model()
+        self._engines = []
+        self._slots = queue.Queue()
+        self._model_path = ""
+        self._request_key = None
+
+    # ── Request handling ─────────────────────────────────────────────
+
+    def _handle(self, conn) -> None:
+        with self._active_lock:
+            self._active += 1
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                self._last_activity = time.time()
+                try:
+                    self._dispatch(conn, request)
+                except (EOFError, OSError, BrokenPipeError):
+                    return  # Client went away (e.g. aborted a stream)
+                except Exception as e:
+                    conn.send({"ok": False, "error": str(e)})
+        finally:
+            with self._active_lock:
+                self._active -= 1
+            self._last_activity = time.time()
+            conn.close()
+
+    def _dispatch(self, conn, request: Dict[str, Any]) -> None:
+        op = request.get("op")
+        if op == "ping":
+            conn.send({
+                "ok": True,
+                "model_path": self._model_path,
+                "n_ctx": self._n_ctx,
+                "slots": len(self._engines),
+                "load_key": repr(self._request_key),
+                "pid": os.getpid(),
+            })
+        elif op == "load":
+            self._load(request["model_path"], request.get("n_gpu_layers", -1), request.get("draft_model"),
+                       request.get("draft_tokens", DEFAULT_DRAFT_TOKENS), request.get("profile"))
+            conn.send({"ok": True, "slots": len(self._engines), "n_ctx": self._n_ctx})
+        elif op == "tokenize":
+            with self._load_lock:  # Not during a reload
+                if not self._engines:
+                    raise RuntimeError("Model chưa được load")
+                count = self._engines[0].count_tokens(request.get("text", ""),
+                                                      special=request.get("special", False))
+            conn.send({"ok": True, "count": count})
+        elif op == "generate":
+            self._generate(conn, request)
+        elif op == "shutdown":
+            conn.send({"ok": True})
+            self._shutdown()
+        else:
+            raise ValueError(f"Unknown op: {op}")
+
+    def _acquire_slot(self):
+        """Take a free engine; returns it with the queue it must go back to."""
+        while True:
+            with self._load_lock:
+                if not self._engines:
+                    raise RuntimeError("Model chưa được load")
+                slots = self._slots
+            engine = slots.get()  # Blocks until a slot is free
+            if engine is not None:
+                return engine, slots
+            slots.put(None)  # Queue retired by a reload: pass the marker on, retry
+
+    def _generate(self, conn, request: Dict[str, Any]) -> None:
+        engine, slots = self._acquire_slot()
+        try:
+            engine.prefix_cache_enabled = request.get("prefix_cache", True)
+            cancelled = [False]
+            on_token = None
+            if request.get("stream"):
+                def on_token(piece: str) -> None:
+                    try:
+                        conn.send({"token": piece})
+                    except (EOFError, OSError):
+                        cancelled[0] = True
+
+            text = engine.generate_response(
+                system_instruction=request.get("system_instruction", ""),
+                prompt=request.get("prompt", ""),
+                max_tokens=request.get("max_tokens", 4096),
+                temperature=request.get("temperature", 0.15),
+                stop=request.get("stop"),
+                on_token=on_token,
+                should_stop=(lambda: cancelled[0]) if on_token else None,
+            )
+            if not cancelled[0]:
+                conn.send({"ok": text is not None, "text": text, "usage": engine.last_usage,
+                           "error": None if text is not None else "Generation failed"})
+        finally:
+            slots.put(engine)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Client
+# ─────────────────────────────────────────────────────────────────────
+
+class _ServerUnavailable(Exception):
+    """No server answered (e.g. it exited on idle) before the request was taken."""
+
+
+class LocalServerClient:
+    """
+    Drop-in replacement for LocalGenAI that forwards work to the server process.
+
+    Exposes the LocalGenAI surface used by LocalTranslationService and
+    TranslationService (load_model, generate_response, count_tokens, n_ctx, ...).
+    Tokenization runs in-process on a vocab-only model when llama_cpp is
+    available, so chunk budgeting does not pay a round-trip per paragraph.
+    """
+
+    _instance = None
+
+    @classmethod
+    def get_instance(cls, port: int = DEFAULT_PORT, n_slots: int = 0,
+                     idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        if cls._instance is None:
+            cls._instance = LocalServerClient(port, n_slots, idle_timeout)
+        return cls._instance
+
+    def __init__(self, port: int = DEFAULT_PORT, n_slots: int = 0,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.port = port
+        self.n_slots = n_slots
+        self.idle_timeout = idle_timeout
+        self.model_loaded = False
+        self.prefix_cache_enabled = True
+        self.last_usage: Dict[str, int] = {}  # Last finished call; use generate_with_usage when concurrent
+        self.slots = 1
+        self._model_path = ""
+        self._n_ctx = 4096
+        self.draft_spec = (None, DEFAULT_DRAFT_TOKENS)
+        self._authkey: Optional[bytes] = None
+        self._vocab = None  # Vocab-only llama_cpp.Llama for local token counting
+        self._load_args: Optional[Dict[str, Any]] = None  # Last load, replayed after a restart
+        self._restart_lock = threading.Lock()
+
+    # ── Connection / process management ──────────────────────────────
+
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(get_state_path().read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def _connect(self):
+        state = self._read_state()
+        if not state:
+            raise ConnectionError("Local server is not running")
+        return Client(("127.0.0.1", state["port"]), authkey=bytes.fromhex(state["authkey"]))
+
+    def _request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            conn.send(payload)
+            return conn.recv()
+        finally:
+            conn.close()
+
+    def ping(self) -> Optional[Dict[str, Any]]:
+        """Return server info, or None if no server answers."""
+        try:
+            return self._request({"op": "ping"})
+        except Exception:
+            return None
+
+    def ensure_server(self, timeout: float = 20.0) -> Dict[str, Any]:
+        """Connect to a running server or spawn a detached one."""
+        info = self.ping()
+        if info:
+            return info
+
+        authkey = secrets.token_hex(16)
+        write_state(self.port, authkey)
+
+        src_dir = str(Path(__file__).resolve().parents[2])
+        env = dict(os.environ)
+        env.pop(tracing.TRACE_ENV, None)  # The server would overwrite our trace file on exit
+        env[AUTHKEY_ENV] = authkey
+        env["PYTHONPATH"] = src_dir + os.pathsep + env.get("PYTHONPATH", "")
+        cmd = [sys.executable, "-m", "extract_app.core.local_server",
+               "--port", str(self.port), "--slots", str(self.n_slots),
+               "--idle-timeout", str(int(self.idle_timeout))]
+        # Detach so the warm model survives app restarts
+        kwargs: Dict[str, Any] = {"env": env, "stdin": subprocess.DEVNULL,
+                                  "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        subprocess.Popen(cmd, **kwargs)
+        logger.info(f"[LocalServerClient] Spawned local inference server on port {self.port}")
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            info = self.ping()
+            if info:
+                return info
+            time.sleep(0.25)
+        raise TimeoutError("Local inference server did not start in time")
+
+    def shutdown_server(self) -> None:
+        try:
+            self._request({"op": "shutdown"})
+        except Exception:
+            pass
+        self.model_loaded = False
+
+    # ── LocalGenAI-compatible surface ────────────────────────────────
+
+    @tracing.traced("local.server_load_model")
+    def load_model(self, model_path: str, n_ctx: int = 4096, n_gpu_layers: int = -1,
+                   n_threads: Optional[int] = None, draft_model: Optional[str] = None,
+                   draft_tokens: int = DEFAULT_DRAFT_TOKENS, profile: Optional[LoadProfile] = None):
+        """Make the server hold *model_path* (no-op if it already does)."""
+        if profile is None:
+            profile = LoadProfile(n_ctx=n_ctx, n_threads=n_threads)
+        n_ctx = profile.n_ctx
+        info = self.ensure_server()
+        spec = (draft_model or None, draft_tokens)
+        request_key = (model_path, n_gpu_layers, sorted(profile.to_dict().items()), spec)
+        if info.get("load_key") != repr(request_key):
+            logger.info(f"[LocalServerClient] Asking server to load {model_path}...")
+            info = self._request({"op": "load", "model_path": model_path,
+                                  "n_gpu_layers": n_gpu_layers, "profile": profile.to_dict(),
+                                  "draft_model": draft_model, "draft_tokens": draft_tokens})
+            if not info.get("ok"):
+                self.model_loaded = False
+                raise RuntimeError(info.get("error", "Server failed to load model"))
+        self.slots = max(1, int(info.get("slots", 1) or 1))
+        self._model_path = model_path
+        self._n_ctx = n_ctx
+        self.draft_spec = spec
+        self.model_loaded = True
+        self._load_args = {"model_path": model_path, "n_gpu_layers": n_gpu_layers,
+                           "draft_model": draft_model, "draft_tokens": draft_tokens, "profile": profile}
+        self._load_vocab(model_path)
+
+    def _restart(self) -> bool:
+        """Respawn the server (e.g. after its idle exit) and reload the last model."""
+        with self._restart_lock:  # Chunk threads failing together must not spawn several servers
+            self.model_loaded = False
+            if not self._load_args:
+                return False
+            try:
+                self.load_model(**self._load_args)  # ensure_server() + load; no-op if already done
+                return True
+            except Exception as e:
+                logger.error(f"[LocalServerClient] Restarting the server failed: {e}")
+                return False
+
+    def unload_model(self):
+        """Release the client side only — the server keeps the model warm."""
+        self.model_loaded = False
+        self._vocab = None
+
+    def _load_vocab(self, model_path: str) -> None:
+        try:
+            from llama_cpp import Llama
+            self._vocab = Llama(model_path=model_path, vocab_only=True, verbose=False)
+        except Exception:
+            self._vocab = None  # Fallback: tokenize over the socket
+
+    @property
+    def n_ctx(self) -> int:
+        return self._n_ctx
+
+    def count_tokens(self, text: str, special: bool = False) -> int:
+        if not text:
+            return 0
+        if self._vocab is not None:
+            return len(self._vocab.tokenize(text.encode("utf-8"), add_bos=False, special=special))
+        reply = self._request({"op": "tokenize", "text": text, "special": special})
+        return reply.get("count", 0) if reply.get("ok") else 0
+
+    def build_prefix(self, system_instruction: str) -> str:
+        return LocalGenAI.build_prefix(self, system_instruction)
+
+    def build_prompt(self, system_instruction: str, prompt: str) -> str:
+        return LocalGenAI.build_prompt(self, system_instruction, prompt)
+
+    def generate_response(self, system_instruction: str, prompt: str, **kwargs) -> Optional[str]:
+        """Generate on the server (see generate_with_usage)."""
+        text, usage = self.generate_with_usage(system_instruction, prompt, **kwargs)
+        if text is not None:
+            self.last_usage = usage
+        return text
+
+    @tracing.traced("local.server_generate")
+    def generate_with_usage(self,
+                            system_instruction: str,
+                            prompt: str,
+                            max_tokens: int = 4096,
+                            temperature: float = 0.15,
+                            stop: List[str] = None,
+                            on_token: Optional[Callable[[str], None]] = None,
+                            should_stop: Optional[Callable[[], bool]] = None
+                            ) -> Tuple[Optional[str], Dict[str, int]]:
+        """
+        Generate on the server. Closing the connection aborts a stream server-side.
+        If the server has gone away (idle exit, crash), it is respawned, the
+        last model is reloaded and the request is retried once.
+
+        Returns:
+            (text or None, usage of this call). Several chunk threads share one
+            client, so usage is returned rather than kept on the instance.
+        """
+        request = {
+            "op": "generate",
+            "system_instruction": system_instruction,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stop": stop,
+            "stream": bool(on_token or should_stop),
+            "prefix_cache": self.prefix_cache_enabled,
+        }
+        try:
+            return self._generate_once(request, on_token, should_stop)
+        except _ServerUnavailable as e:
+            logger.warning(f"[LocalServerClient] Server gone ({e}), restarting it")
+        if self._restart():
+            try:
+                return self._generate_once(request, on_token, should_stop)
+            except _ServerUnavailable as e:
+                logger.error(f"[LocalServerClient] Cannot reach server: {e}")
+        self.model_loaded = False  # Next load_model() goes through ensure_server() again
+        return None, {}
+
+    def _generate_once(self, request: Dict[str, Any],
+                       on_token: Optional[Callable[[str], None]],
+                       should_stop: Optional[Callable[[], bool]]) -> Tuple[Optional[str], Dict[str, int]]:
+        """One generate request. Raises _ServerUnavailable if no server took it."""
+        try:
+            conn = self._connect()
+        except Exception as e:
+            raise _ServerUnavailable(str(e)) from e
+        received = False
+        try:
+            conn.send(request)
+            while True:
+                msg = conn.recv()
+                received = True
+                if "token" in msg:
+                    if on_token:
+                        on_token(msg["token"])
+                    if should_stop and should_stop():
+                        logger.info("[LocalServerClient] Generation aborted by caller.")
+                        return None, {}
+                    continue
+                if not msg.get("ok"):
+                    logger.error(f"[LocalServerClient] Generation error: {msg.get('error')}")
+                    return None, {}
+                return (msg.get("text") or "").strip(), dict(msg.get("usage") or {})
+        except (EOFError, OSError) as e:
+            if not received:
+                raise _ServerUnavailable(str(e)) from e  # Server exited while accepting
+            logger.error(f"[LocalServerClient] Connection lost: {e}")
+            return None, {}
+        finally:
+            conn.close()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Entry point
+# ─────────────────────────────────────────────────────────────────────
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="ExtractPDF-EPUB local inference server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--slots", type=int, default=0, help="Parallel generation slots (0 = auto)")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="Exit after this many idle seconds (0 = never)")
+    parser.add_argument("--model", default="", help="Optional GGUF to load at startup")
+    parser.add_argument("--n-gpu-layers", type=int, default=-1)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        # Started by hand: create a key and publish it for clients
+        authkey = secrets.token_hex(16)
+        write_state(args.port, authkey)
+
+    server = LocalInferenceServer(args.port, bytes.fromhex(authkey), args.slots, args.idle_timeout)
+    if args.model:
+        server._load(args.model, args.n_gpu_layers)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/core/metrics.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: In-process metrics registry for the translation pipeline:
+#              counters, latency histograms and sliding-window rates, queryable
+#              from the UI and exportable in Prometheus text format (file or
+#              a local HTTP endpoint).
+# --------------------------------------------------------------------------------
+
+import abc
+import os
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+WAIT_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def classify_error(error) -> str:
+    """Retry reason for an error message: '429', '404', 'timeout' or 'other'."""
+    text = str(error).lower()
+    if "429" in text or "quota" in text or "resource exhausted" in text:
+        return "429"
+    if "404" in text or "not found" in text:
+        return "404"
+    if "timeout" in text or "timed out" in text or "deadline" in text:
+        return "timeout"
+    return "other"
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for this metric's values, one per sample."""
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Sum over all label sets matching the given labels."""
+        with self._lock:
+            items = list(self._values.items())
+        return sum(v for key, v in items
+                   if all(key[self.labelnames.index(n)] == str(val) for n, val in labels.items()))
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set (cumulative buckets on export)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def stats(self, **labels) -> Dict[str, float]:
+        """count, mean and an approximate p90 (bucket upper bound) over matching label sets."""
+        with self._lock:
+            rows = [list(s) for key, s in self._series.items()
+                    if all(key[self.labelnames.index(n)] == str(v) for n, v in labels.items())]
+        if not rows:
+            return {"count": 0, "mean": 0.0, "p90": 0.0}
+        counts = [sum(col) for col in zip(*(r[:-1] for r in rows))]
+        total = sum(counts)
+        p90 = float("inf")
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            if running >= 0.9 * total:
+                p90 = bound
+                break
+        return {"count": total, "mean": sum(r[-1] for r in rows) / total if total else 0.0, "p90": p90}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(s)) for key, s in self._series.items())
+        lines = []
+        for key, series in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-1]):
+                running += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {running}")
+        return lines
+
+
+class RateMeter:
+    """Amount per minute over a sliding window (e.g. words translated per minute)."""
+
+    def __init__(self, window_seconds: float = 300.0):
+        self.window = window_seconds
+        self._events: "deque[Tuple[float, float]]" = deque()
+        self._first: float = None  # Time of the first event ever (short history = shorter window)
+        self._lock = threading.Lock()
+
+    def add(self, amount: float, now: float = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._first is None:
+                self._first = now
+            self._events.append((now, amount))
+            self._trim(now)
+
+    def per_minute(self, now: float = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._trim(now)
+            if not self._events:
+                return 0.0
+            span = max(min(now - self._first, self.window), 60.0)  # Avoid spikes from the first event
+            return sum(a for _, a in self._events) * 60.0 / span
+
+    def _trim(self, now: float) -> None:
+        while self._events and now - self._events[0][0] > self.window:
+            self._events.popleft()
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus sliding-window rates, rendered together for Prometheus.
+    Rates are exported as gauges named ``<rate>_per_minute``.
+    """
+
+    def __init__(self, prefix: str = "extractpdf_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._rates: Dict[str, RateMeter] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = cls(full_name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def rate(self, name: str, window_seconds: float = 300.0) -> RateMeter:
+        with self._lock:
+            meter = self._rates.get(name)
+            if meter is None:
+                meter = self._rates[name] = RateMeter(window_seconds)
+            return meter
+
+    def to_prometheus(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            rates = sorted(self._rates.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, meter in rates:
+            full_name = f"{self.prefix}{name}_per_minute"
+            lines += [f"# HELP {full_name} {name} per minute over the last {meter.window:g}s",
+                      f"# TYPE {full_name} gauge",
+                      f"{full_name} {meter.per_minute():g}"]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path) -> None:
+        """Writes the Prometheus text atomically (node_exporter textfile collector style)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp.replace(path)
+
+    def start_textfile_writer(self, path, interval: float = 15.0) -> threading.Thread:
+        """Rewrites *path* every *interval* seconds on a daemon thread."""
+        def loop():
+            while True:
+                try:
+                    self.write_textfile(path)
+                except OSError as e:
+                    logger.warning(f"Metrics textfile write failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="MetricsTextfile", daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Serves GET /metrics on a local HTTP port (daemon thread). Returns the server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="MetricsHTTP", daemon=True).start()
+        logger.info(f"Metrics served on http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Translation pipeline metrics (shared by the queue, service and clients)
+# ─────────────────────────────────────────────────────────────────────
+
+REGISTRY = MetricsRegistry()
+
+CHUNKS = REGISTRY.counter("chunks_total", "Chunks translated", ("engine", "model"))
+CHUNK_LATENCY = REGISTRY.histogram("chunk_latency_seconds", "Time per model call", ("engine", "model"))
+RETRIES = REGISTRY.counter("retries_total", "Failed model calls that were retried or skipped",
+                           ("engine", "model", "reason"))
+TOKENS = REGISTRY.counter("tokens_total", "Tokens sent and generated", ("engine", "model", "direction"))
+ARTICLES = REGISTRY.counter("articles_total", "Articles finished by the queue", ("engine", "result"))
+WORDS = REGISTRY.counter("words_total", "Source words of translated articles", ("engine",))
+QUEUE_WAIT = REGISTRY.histogram("queue_wait_seconds", "Time from enqueue to translation start", (),
+                                buckets=WAIT_BUCKETS)
+CHUNK_RATE = REGISTRY.rate("chunks")
+WORD_RATE = REGISTRY.rate("words")
+
+
+def record_chunk(engine: str, model: str, seconds: float, tokens_in: int = 0, tokens_out: int = 0) -> None:
+    """One successful model call."""
+    CHUNKS.inc(engine=engine, model=model)
+    CHUNK_LATENCY.observe(seconds, engine=engine, model=model)
+    CHUNK_RATE.add(1)
+    if tokens_in:
+        TOKENS.inc(tokens_in, engine=engine, model=model, direction="in")
+    if tokens_out:
+        TOKENS.inc(tokens_out, engine=engine, model=model, direction="out")
+
+
+def record_retry(engine: str, model: str, error) -> str:
+    """One failed model call; returns the reason it was counted under."""
+    reason = classify_error(error)
+    RETRIES.inc(engine=engine, model=model, reason=reason)
+    return reason
+
+
+def summary() -> Dict[str, float]:
+    """Compact numbers for the UI status bar."""
+    latency = CHUNK_LATENCY.stats()
+    return {
+        "chunks_per_min": CHUNK_RATE.per_minute(),
+        "words_per_min": WORD_RATE.per_minute(),
+        "chunk_latency_mean": latency["mean"],
+        "chunk_latency_p90": latency["p90"],
+        "retries": RETRIES.value(),
+        "retries_429": RETRIES.value(reason="429"),
+        "tokens_in": TOKENS.value(direction="in"),
+        "tokens_out": TOKENS.value(direction="out"),
+        "queue_wait_mean": QUEUE_WAIT.stats()["mean"],
+    }
@@ -21,6 +21,7 @@ from typing import List, Dict, Any
 
 import fitz  # PyMuPDF
 from ..shared import debug_logger
+from ..shared import tracing
 
 
 def _parse_toc_from_text(doc: fitz.Document) -> List:
@@ -89,6 +90,7 @@ def _extract_flat_chapter(doc, start_page, end_page, chapter_title, temp_image_d
                 content.append(('image', {'anchor': str(img_path), 'caption': ''}))
     return [{'title': chapter_title, 'content': content, 'children': []}]
 
+@tracing.traced("parse.pdf.chapter")
 def _extract_chapter_with_heuristics(doc, start_page, end_page, chapter_title, temp_image_dir, debug_logger=None):
     """Extracts pages and splits them into child articles based on font-size + bold heuristics.
     
@@ -124,7 +126,7 @@ def _extract_chapter_with_heuristics(doc, start_page, end_page, chapter_title, t
     minor_threshold = baseline_size + 2.0   # e.g. 15 + 2.0 = 17.0
 
     if debug_logger:
-        debug_logger.log(f"  [Heuristic] Baseline={baseline_size}pt, Major≥{major_threshold}pt, Minor≥{minor_threshold}pt+Bold")
+        debug_logger.debug("  [Heuristic] Baseline=%spt, Major≥%spt, Minor≥%spt+Bold", baseline_size, major_threshold, minor_threshold)
 
     current_title = chapter_title
     current_content = []
@@ -208,6 +210,7 @@ def _extract_chapter_with_heuristics(doc, start_page, end_page, chapter_title, t
     return articles
 
 # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+@tracing.traced("parse.pdf")
 def parse_pdf(filepath: str) -> Dict[str, Any]:
     """
     Parses a PDF file and extracts its structure, metadata, and content.
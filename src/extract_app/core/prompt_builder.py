@@ -10,6 +10,8 @@
 import re
 from typing import Optional
 
+from ..shared import tracing
+
 
 class PromptBuilder:
     """
@@ -22,6 +24,7 @@ class PromptBuilder:
     # Translation Prompt
     # ─────────────────────────────────────────────────────────────────
 
+    @tracing.traced("prompt.build")
     def build_translation_prompt(self, text: str, glossary_str: str = "") -> str:
         """Build the standard Archive-style translation prompt (EN → VI)."""
         glossary_prompt = (
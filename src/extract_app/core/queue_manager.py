@@ -1,7 +1,7 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/core/queue_manager.py
-# Version: 1.0.0
+# Version: 1.2.0
 # Author: Antigravity
 # Description: Chapter-level translation queue manager with background thread worker.
 # --------------------------------------------------------------------------------
@@ -12,7 +12,8 @@ import queue
 import logging
 from typing import Optional, Callable, List, Dict, Any
 
-from .eta_calculator import update_dynamic_wpm
+from .eta_calculator import update_dynamic_wpm, ThroughputModel
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +25,18 @@ class QueueStatus:
 
 
 class ChapterQueueItem:
-    """Represents a single article/chapter enqueued for translation."""
+    """Represents a single article/chapter enqueued for translation.
 
-    def __init__(self, article_id: int, subtitle: str, word_count: int, content: str):
+    *content* may be None: the worker then reads it from the database when the
+    article's turn comes, so large queues do not hold every body in memory.
+    """
+
+    def __init__(self, article_id: int, subtitle: str, word_count: int, content: Optional[str] = None):
         self.article_id = article_id
         self.subtitle = subtitle
         self.word_count = word_count
         self.content = content
+        self.enqueued_at = time.monotonic()  # For the queue wait metric
 
     def __repr__(self) -> str:
         return f"<QueueItem id={self.article_id} '{self.subtitle[:30]}' {self.word_count}w>"
@@ -40,7 +46,8 @@ class ChapterQueueManager:
     """
     Manages a chapter-level translation queue for a single book.
 
-    The queue processes articles sequentially in a background daemon thread.
+    The queue processes articles in background daemon threads — one by default
+    (sequential), or `workers` threads pulling from the same queue.
     UI updates are dispatched safely via the `ui_callback` mechanism using
     `widget.after(0, fn)` from the calling view.
 
@@ -51,6 +58,9 @@ class ChapterQueueManager:
         on_item_done:        Callback(article_id, success) fired on each completion.
         on_queue_done:       Callback() fired when the entire queue is empty.
         on_status_change:    Callback(status: str) fired when queue status changes.
+        on_progress:         Callback(article_id, current, total, message) fired while
+                             an article is translating (streamed tokens, tok/s).
+        workers:             Number of articles translated concurrently.
     """
 
     def __init__(
@@ -61,6 +71,8 @@ class ChapterQueueManager:
         on_item_done: Optional[Callable[[int, bool], None]] = None,
         on_queue_done: Optional[Callable[[], None]] = None,
         on_status_change: Optional[Callable[[str], None]] = None,
+        on_progress: Optional[Callable[[int, int, int, str], None]] = None,
+        workers: int = 1,
     ):
         self.translation_service = translation_service
         self.db_manager = db_manager
@@ -69,6 +81,7 @@ class ChapterQueueManager:
         self.on_item_done = on_item_done
         self.on_queue_done = on_queue_done
         self.on_status_change = on_status_change
+        self.on_progress = on_progress
 
         self._queue: queue.Queue[ChapterQueueItem] = queue.Queue()
         self._pending_ids: List[int] = []   # Ordered list of article_ids still queued
@@ -79,9 +92,13 @@ class ChapterQueueManager:
         self._pause_event.set()             # Un-paused initially (set = not paused)
         self._stop_event = threading.Event()
 
-        self._worker_thread: Optional[threading.Thread] = None
-        self._current_item: Optional[ChapterQueueItem] = None
+        self.workers = max(1, int(workers))
+        self._worker_thread: Optional[threading.Thread] = None  # First worker
+        self._worker_threads: List[threading.Thread] = []
+        self._running_workers = 0
+        self._current_items: Dict[int, ChapterQueueItem] = {}  # article_id -> item in progress
         self.done_count: int = 0  # Tracks items translated in current session
+        self.glossary_tokens_saved: int = 0  # Cloud input tokens saved by glossary filtering
 
     # ─────────────────────────────────────────────────────────────────
     # Public API
@@ -99,16 +116,30 @@ class ChapterQueueManager:
 
     @property
     def current_article_id(self) -> Optional[int]:
-        item = self._current_item
-        return item.article_id if item else None
+        ids = self.current_article_ids
+        return ids[0] if ids else None
+
+    @property
+    def current_article_ids(self) -> List[int]:
+        """Articles being translated right now (several when workers > 1)."""
+        with self._lock:
+            return list(self._current_items)
+
+    def metrics_summary(self) -> Dict[str, float]:
+        """Throughput, latency, retry and token numbers for the status bar (see core.metrics)."""
+        return metrics.summary()
 
     def enqueue(self, item: ChapterQueueItem) -> None:
         """Add a chapter to the translation queue."""
         with self._lock:
             if item.article_id not in self._pending_ids:
+                item.enqueued_at = time.monotonic()
                 self._pending_ids.append(item.article_id)
                 self._queue.put(item)
                 logger.info(f"Enqueued: {item}")
+                # Workers that left during a lull are replaced, so the new items get full concurrency
+                if self._status == QueueStatus.RUNNING and 0 < self._running_workers < self.workers:
+                    self._spawn_workers(self.workers - self._running_workers)
 
     def remove(self, article_id: int) -> bool:
         """
@@ -137,13 +168,14 @@ class ChapterQueueManager:
         self._stop_event.clear()
         self._pause_event.set()  # ensure un-paused
         self.done_count = 0  # Reset counter for this session
+        self.glossary_tokens_saved = 0
         self._set_status(QueueStatus.RUNNING)
-        if self._worker_thread is None or not self._worker_thread.is_alive():
-            self._worker_thread = threading.Thread(
-                target=self._worker_loop, daemon=True, name="ChapterQueueWorker"
-            )
-            self._worker_thread.start()
-            logger.info("ChapterQueueWorker started")
+        if not any(t.is_alive() for t in self._worker_threads):
+            with self._lock:
+                self._worker_threads = []
+                self._spawn_workers(self.workers)
+            self._worker_thread = self._worker_threads[0]
+            logger.info(f"ChapterQueueWorker started ({self.workers} worker(s))")
 
     def pause(self) -> None:
         """Pause after the current article finishes."""
@@ -159,6 +191,23 @@ class ChapterQueueManager:
             self._set_status(QueueStatus.RUNNING)
             logger.info("Queue resumed")
 
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the worker threads to exit (queue exhausted or stopped).
+
+        Returns:
+            True if every worker finished within *timeout*.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            alive = [t for t in list(self._worker_threads) if t.is_alive()]  # enqueue() may add workers
+            if not alive:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            for thread in alive:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
     def stop(self) -> None:
         """Stop the queue gracefully after current article finishes."""
         self._stop_event.set()
@@ -192,6 +241,18 @@ class ChapterQueueManager:
     # Internal Worker
     # ─────────────────────────────────────────────────────────────────
 
+    def _spawn_workers(self, count: int) -> None:
+        """Start *count* more worker threads. Called with _lock held."""
+        for _ in range(count):
+            i = len(self._worker_threads)
+            thread = threading.Thread(
+                target=self._worker_loop, daemon=True,
+                name="ChapterQueueWorker" if i == 0 else f"ChapterQueueWorker-{i + 1}",
+            )
+            self._worker_threads.append(thread)
+            self._running_workers += 1
+            thread.start()
+
     def _worker_loop(self) -> None:
         """Main loop running on the background daemon thread."""
         logger.info("Worker loop started")
@@ -205,13 +266,24 @@ class ChapterQueueManager:
             try:
                 item: ChapterQueueItem = self._queue.get(timeout=0.5)
             except queue.Empty:
-                # Queue is empty — we're done
-                self._current_item = None
-                self._set_status(QueueStatus.IDLE)
-                if self.on_queue_done:
-                    self.on_queue_done()
-                logger.info("Queue exhausted, worker idle")
-                break
+                # Queue is empty — workers only leave once nothing is in flight, so
+                # items enqueued while an article translates still get every worker;
+                # the last one reports it
+                with self._lock:
+                    if self._current_items:
+                        continue
+                    self._running_workers -= 1
+                    last_worker = self._running_workers == 0
+                if last_worker:
+                    self._set_status(QueueStatus.IDLE)
+                    if self.glossary_tokens_saved:
+                        logger.info(
+                            f"Glossary filtering saved ~{self.glossary_tokens_saved} input tokens for this book"
+                        )
+                    if self.on_queue_done:
+                        self.on_queue_done()
+                    logger.info("Queue exhausted, worker idle")
+                return
 
             # Check if this item was removed while waiting
             with self._lock:
@@ -220,7 +292,9 @@ class ChapterQueueManager:
                     self._queue.task_done()
                     continue
 
-            self._current_item = item
+            with self._lock:
+                self._current_items[item.article_id] = item
+            metrics.QUEUE_WAIT.observe(time.monotonic() - item.enqueued_at)
             logger.info(f"Translating: {item}")
             success = self._translate_item(item)
 
@@ -228,14 +302,16 @@ class ChapterQueueManager:
             with self._lock:
                 if item.article_id in self._pending_ids:
                     self._pending_ids.remove(item.article_id)
+                self._current_items.pop(item.article_id, None)
+                self.done_count += 1  # Increment completed count
 
-            self._current_item = None
             self._queue.task_done()
-            self.done_count += 1  # Increment completed count
 
             if self.on_item_done:
                 self.on_item_done(item.article_id, success)
 
+        with self._lock:
+            self._running_workers -= 1
         logger.info("Worker loop exited")
 
     def _translate_item(self, item: ChapterQueueItem) -> bool:
@@ -250,32 +326,66 @@ class ChapterQueueManager:
             chunk_delay = self.settings_manager.get("chunk_delay", 2.0)
             engine = self.settings_manager.get("translation_engine", "cloud")
 
+            progress_callback = None
+            if self.on_progress:
+                def progress_callback(current: int, total: int, message: str) -> None:
+                    self.on_progress(item.article_id, current, total, message)
+
+            content = item.content
+            if content is None:
+                content = self.db_manager.get_article_content(item.article_id) or ""
+            if not content.strip():
+                logger.warning(f"No content to translate for article_id={item.article_id}")
+                metrics.ARTICLES.inc(engine=engine, result="failed")
+                return False
+
             start_time = time.time()
+            stats: Dict[str, int] = {}  # Per call: the service is shared by all workers
             translation = self.translation_service.translate_text(
-                item.content,
+                content,
                 chunk_size=chunk_size,
                 delay=chunk_delay,
+                progress_callback=progress_callback,
+                should_stop=self._stop_event.is_set,  # Abort mid-chunk on stop()
+                stats=stats,
             )
             translation_time = time.time() - start_time
 
+            saved = stats.get("glossary_tokens_saved", 0)
+            if isinstance(saved, int) and saved:
+                with self._lock:
+                    self.glossary_tokens_saved += saved
+
             if translation:
                 self.db_manager.update_article_translation(
                     item.article_id, translation, "translated"
                 )
                 logger.info(f"Saved translation for article_id={item.article_id}")
+                metrics.ARTICLES.inc(engine=engine, result="ok")
+                metrics.WORDS.inc(item.word_count, engine=engine)
+                metrics.WORD_RATE.add(item.word_count)
                 
                 update_dynamic_wpm(
                     self.settings_manager, engine,
                     item.word_count, translation_time
                 )
-                
+                throughput = getattr(self.translation_service, "throughput", None)
+                if isinstance(throughput, ThroughputModel):
+                    throughput.save(self.settings_manager)
+
                 return True
+            elif self._stop_event.is_set():
+                logger.info(f"Translation aborted for article_id={item.article_id}")
+                metrics.ARTICLES.inc(engine=engine, result="aborted")
+                return False
             else:
                 logger.warning(f"Translation returned None for article_id={item.article_id}")
+                metrics.ARTICLES.inc(engine=engine, result="failed")
                 return False
 
         except Exception as e:
             logger.error(f"Queue worker error on article_id={item.article_id}: {e}")
+            metrics.ARTICLES.inc(engine=self.settings_manager.get("translation_engine", "cloud"), result="failed")
             return False
 
     def _set_status(self, new_status: str) -> None:
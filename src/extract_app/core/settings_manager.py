@@ -6,7 +6,10 @@
 # Description: Manages user configuration and secrets.
 # --------------------------------------------------------------------------------
 
+import os
 import json
+import tempfile
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -26,9 +29,43 @@ class SettingsManager:
         "local_model_path": "",
         "current_style": "standard",
         "n_gpu_layers": -1, # Auto/All
+        # llama.cpp load profile (0 = auto-detect from CPU topology)
+        "local_n_ctx": 4096,
+        "local_n_threads": 0,
+        "local_n_threads_batch": 0,
+        "local_n_batch": 512,
+        "local_use_mmap": True,
+        "local_use_mlock": False,
+        "local_kv_cache_type": "f16", # f16, q8_0, q4_0 (quantized needs flash_attn)
+        "local_flash_attn": True,
+        "local_max_resident_models": 2, # Models kept loaded for instant switching
+        "local_prefix_cache": True, # Reuse the KV cache of the fixed instruction prefix
+        # Speculative decoding: "off", "prompt_lookup" or "model" (uses local_draft_model_path)
+        "local_speculative": "off", # Drafting forces logits_all (n_ctx x n_vocab scores); opt in
+        "local_draft_model_path": "",
+        "local_draft_tokens": 10,
+        # Cloud glossary injection: only chunk-relevant terms are sent
+        "cloud_glossary_max_terms": 80, # 0 = no cap
+        "cloud_glossary_ranking": "frequency", # "frequency", "length" or "order"
+        # Token-aware chunking ("tokens") or legacy character chunking ("chars")
+        "chunking_mode": "tokens",
+        "cloud_max_output_tokens": 0, # 0 = model default; thinking tokens count against a set cap
+        "glossary_token_reserve": 300, # Tokens kept free for the per-chunk glossary
+        "stream_translation": True, # Stream tokens for live progress and early abort
+        # Local inference: "in_process" or "server" (separate warm-model process)
+        "local_inference_mode": "in_process",
+        "local_server_port": 8765,
+        "local_server_slots": 0, # Parallel generation slots, 0 = auto
+        "local_server_idle_timeout": 1800, # Seconds; 0 = keep running
         # ETA Estimation (based on user's benchmark: 1370 words in ~7.5 mins)
         "local_llm_wpm": 180,
         "cloud_llm_wpm": 6000,
+        "eta_model": {}, # Learned per-chunk cost per engine/model (see ThroughputModel)
+        "log_level": "INFO", # DEBUG shows per-node/per-tag parser details
+        "trace_enabled": False, # Chrome trace of parse/save/translate spans in user_data/traces
+        # Prometheus metrics export: text file path and/or local HTTP port (0 = off)
+        "metrics_textfile": "",
+        "metrics_port": 0,
     }
 
     def __init__(self, settings_path: str = None):
@@ -38,6 +75,7 @@ class SettingsManager:
         else:
             self.settings_path = Path(settings_path)
         self.settings: Dict[str, Any] = self.DEFAULT_SETTINGS.copy()
+        self._lock = threading.RLock()  # set() may run on queue worker threads
         self._load_settings()
 
     def _load_settings(self):
@@ -54,20 +92,38 @@ class SettingsManager:
             self._save_settings()
 
     def _save_settings(self):
-        """Saves current settings to JSON file."""
-        self.settings_path.parent.mkdir(parents=True, exist_ok=True)
-        try:
-            with open(self.settings_path, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+        """
+        Saves current settings to JSON file.
+
+        Queue workers save from several threads: writes are serialized and go
+        through a temp file + os.replace, so settings.json (which also holds the
+        API key) is never left truncated or half-written.
+        """
+        with self._lock:
+            self.settings_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.settings_path.parent, prefix=".settings-", suffix=".tmp")
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.settings, f, indent=4)
+                os.replace(tmp_path, self.settings_path)
+                tmp_path = None
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+            finally:
+                if tmp_path:
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
 
     def get(self, key: str, default: Any = None) -> Any:
         return self.settings.get(key, default)
 
     def set(self, key: str, value: Any):
-        self.settings[key] = value
-        self._save_settings()
+        with self._lock:
+            self.settings[key] = value
+            self._save_settings()
 
     def get_api_key(self) -> str:
         return self.settings.get("gemini_api_key", "")
@@ -1,7 +1,7 @@
 # file-path: src/extract_app/core/storage_handler.py
-# version: 5.1 (Pylint Compliance)
-# last-updated: 2025-09-26
-# description: Cleans up the storage handler module to meet Pylint standards.
+# version: 5.4 (Pipelined Save)
+# last-updated: 2026-10-19
+# description: One flattening pass feeds concurrent folder and database writers.
 
 """
 Storage Handler Module.
@@ -10,12 +10,26 @@ This module is responsible for saving the structured content extracted from
 ebooks into a nested folder structure on the local filesystem.
 """
 
+import os
+import re
+import json
 import shutil
+import hashlib
+import threading
 import traceback
+import concurrent.futures
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from PIL import Image
 
+from .database import flatten_book
+from ..shared import tracing
+from ..shared.file_utils import write_if_changed
+
+IMAGE_CACHE_NAME = ".image_cache.json"  # rel image path -> source content hash, per book
+NODE_MANIFEST_NAME = ".nodes.json"  # Source + node folders written by the last save, per book
+NODE_DIR_PATTERN = re.compile(r"^\d{2,} - ")  # Folders created by _node_dir_name
+
 def _convert_to_webp(source_path: Path, dest_path: Path) -> bool:
     """Converts an image to WebP format."""
     try:
@@ -29,93 +43,279 @@ def _convert_to_webp(source_path: Path, dest_path: Path) -> bool:
         return False
 
 
-def _save_node_recursively(node: Dict[str, Any], parent_path: Path, index: int, progress_ctx: Dict = None):
+def _transcode_image(source: str, dest_dir: str, stem: str) -> str:
+    """
+    Worker entry point: converts *source* to ``<stem>.webp`` in *dest_dir*,
+    falling back to a plain copy with the original suffix.
+
+    Returns:
+        The file name that was written.
+    """
+    source_path = Path(source)
+    dest_name = f"{stem}.webp"
+    if _convert_to_webp(source_path, Path(dest_dir) / dest_name):
+        return dest_name
+    dest_name = f"{stem}{source_path.suffix}"
+    shutil.copy2(source_path, Path(dest_dir) / dest_name)
+    return dest_name
+
+
+def _file_digest(path: Path) -> str:
+    """SHA-1 of the file content (used to skip images already converted)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImageTranscoder:
+    """
+    Converts images to WebP in a process pool while the caller keeps writing text.
+
+    ``submit`` returns the final file name immediately (``<stem>.webp``), so the
+    anchor tag can be written into content.txt before the image is encoded.
+    At most ``max_in_flight`` conversions are pending at once; submitting more
+    waits for the oldest to finish. Images whose content hash was already
+    converted (earlier in this save, or in a previous save recorded in the
+    book's image cache) are copied or skipped instead of re-encoded.
+
+    Args:
+        book_dir:       Book root; the image cache lives there.
+        max_workers:    Pool size (None = CPU count, 1 = convert inline).
+        max_in_flight:  Bound on queued conversions (default 4 x workers).
+        progress_callback: Callback(done, total) fired on the submitting thread.
+    """
+
+    def __init__(self, book_dir: Path, max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, progress_callback: Any = None):
+        self.book_dir = Path(book_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 4
+        self.progress_callback = progress_callback
+
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._in_flight: Dict[concurrent.futures.Future, Tuple[Path, str, str]] = {}
+        self._by_digest: Dict[str, Tuple[Path, str]] = {}   # digest -> (dir, stem) converted this save
+        self._copies: List[Tuple[str, Path, str]] = []       # (digest, dest_dir, stem) duplicates
+        self._written: Dict[Tuple[Path, str], str] = {}     # (dir, stem) -> file name actually written
+        self._cache: Dict[str, str] = {}                      # rel path -> digest, saved at finish()
+        self._previous = self._load_cache()
+
+        self.total = 0
+        self.done = 0
+        self.converted = 0
+        self.skipped = 0
+
+    def _load_cache(self) -> Dict[str, str]:
+        try:
+            with open(self.book_dir / IMAGE_CACHE_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def submit(self, source: Path, dest_dir: Path, stem: str, digest: Optional[str] = None) -> str:
+        """Queues *source* for conversion into *dest_dir*; returns the expected file name."""
+        dest_name = f"{stem}.webp"
+        digest = digest or _file_digest(source)
+        self.total += 1
+
+        rel = (dest_dir / dest_name).relative_to(self.book_dir).as_posix()
+        if self._previous.get(rel) == digest and (dest_dir / dest_name).exists():
+            # Same picture already converted by an earlier save
+            self._cache[rel] = digest
+            self._written[(dest_dir, stem)] = dest_name
+            self.skipped += 1
+            self._advance()
+            return dest_name
+
+        if digest in self._by_digest:
+            self._copies.append((digest, dest_dir, stem))
+            self.skipped += 1
+            self._advance()
+            return dest_name
+        self._by_digest[digest] = (dest_dir, stem)
+
+        if self.max_workers <= 1:
+            self._record(dest_dir, stem, digest, _transcode_image(str(source), str(dest_dir), stem))
+            return dest_name
+
+        while len(self._in_flight) >= self.max_in_flight:
+            self._harvest(concurrent.futures.FIRST_COMPLETED)
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        future = self._pool.submit(_transcode_image, str(source), str(dest_dir), stem)
+        self._in_flight[future] = (dest_dir, stem, digest)
+        return dest_name
+
+    def _harvest(self, return_when) -> None:
+        finished, _ = concurrent.futures.wait(list(self._in_flight), return_when=return_when)
+        for future in finished:
+            dest_dir, stem, digest = self._in_flight.pop(future)
+            try:
+                written = future.result()
+            except Exception as e:
+                print(f"[Storage] Image worker failed for {stem}: {e}")
+                written = ""
+            self._record(dest_dir, stem, digest, written)
+
+    def _record(self, dest_dir: Path, stem: str, digest: str, written: str) -> None:
+        if written:
+            self._written[(dest_dir, stem)] = written
+            self._cache[(dest_dir / written).relative_to(self.book_dir).as_posix()] = digest
+            self.converted += 1
+        self._advance()
+
+    def _advance(self) -> None:
+        self.done += 1
+        if self.progress_callback:
+            self.progress_callback(self.done, self.total)
+
+    def finish(self) -> Dict[str, int]:
+        """
+        Waits for pending conversions, materialises duplicates, fixes anchors of
+        images that fell back to a plain copy and saves the image cache.
+
+        Returns:
+            Counters: total, converted, skipped.
+        """
+        try:
+            if self._in_flight:
+                self._harvest(concurrent.futures.ALL_COMPLETED)
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        for digest, dest_dir, stem in self._copies:
+            src_dir, src_stem = self._by_digest[digest]
+            written = self._written.get((src_dir, src_stem))
+            if not written:
+                continue
+            name = stem + Path(written).suffix
+            if (src_dir, src_stem) != (dest_dir, stem):
+                shutil.copy2(src_dir / written, dest_dir / name)
+            self._written[(dest_dir, stem)] = name
+            self._cache[(dest_dir / name).relative_to(self.book_dir).as_posix()] = digest
+
+        # Anchors were written as <stem>.webp; patch the rare plain-copy fallbacks
+        fallbacks: Dict[Path, List[Tuple[str, str]]] = {}
+        for (dest_dir, stem), written in self._written.items():
+            if written != f"{stem}.webp":
+                fallbacks.setdefault(dest_dir, []).append((f"{stem}.webp", written))
+        for dest_dir, renames in fallbacks.items():
+            content_file = dest_dir / "content.txt"
+            if not content_file.exists():
+                continue
+            text = content_file.read_text(encoding="utf-8")
+            for old, new in renames:
+                text = text.replace(f"[Image Anchor: {old}", f"[Image Anchor: {new}")
+            content_file.write_text(text, encoding="utf-8")
+
+        try:
+            with open(self.book_dir / IMAGE_CACHE_NAME, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, indent=0)
+        except OSError as e:
+            print(f"[Storage] Could not write image cache: {e}")
+
+        return {"total": self.total, "converted": self.converted, "skipped": self.skipped}
+
+
+def _prune_stale_nodes(book_dir: Path, written: set, source: str) -> None:
     """
-    Recursively saves a content node and its children.
+    Removes node folders the previous save wrote that this save no longer does.
+
+    Only folders listed in the previous save's manifest are candidates, and only
+    when that save came from the same *source*: folders of another book sharing
+    the title stem, or the user's own numbered folders, are never touched.
     """
-    # 0. Update Progress (Pre-save or Post-save? Pre-save to show "Saving X")
-    if progress_ctx:
-        progress_ctx['processed'] += 1
-        if progress_ctx['callback'] and progress_ctx['total'] > 0:
-             percent = progress_ctx['processed'] / progress_ctx['total']
-             title = node.get('title', 'Untitled')
-             # Throttle updates? No, UI handles it or we can check time.
-             progress_ctx['callback'](percent, f"Saving: {title[:30]}...")
-
-    title = node.get('title', f'Section_{index+1}').strip()
+    manifest_path = book_dir / NODE_MANIFEST_NAME
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+    if isinstance(previous, dict) and previous.get("source") == source:
+        for rel_path in set(previous.get("nodes", [])) - written:
+            entry = book_dir / rel_path
+            if NODE_DIR_PATTERN.match(entry.name) and entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+    try:
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "nodes": sorted(written)}, f, indent=0)
+    except OSError as e:
+        print(f"[Storage] Could not write node manifest: {e}")
+
+
+def _node_dir_name(index: int, title: Optional[str]) -> str:
+    """Folder name for the node at *index* among its siblings."""
+    title = (title if title is not None else f'Section_{index+1}').strip()
     # Sanitize the title to create a valid directory name
     safe_title = "".join([c for c in title if c.isalnum() or c in (' ', '-')]).rstrip()
     if not safe_title:
         safe_title = f"Untitled_{index+1}"
+    return f"{index+1:02d} - {safe_title}"
 
-    current_path = parent_path / f"{index+1:02d} - {safe_title}"
-    current_path.mkdir(exist_ok=True)
 
-    content_list = node.get('content', [])
-    if content_list:
-        full_text_content = []
-        image_counter = 0
-        seen_images = {}  # Map source_anchor_path -> dest_filename
-
-        for content_type, data in content_list:
-            if content_type == 'text':
-                # Ensure text data is a string
-                if isinstance(data, dict):  # Handle dicts from PDF parser
-                    full_text_content.append(data.get('content', ''))
-                else:
-                    full_text_content.append(str(data))
-
-            elif content_type == 'image' and isinstance(data, dict):
-                anchor_path_str = data.get('anchor', '')
-                if not anchor_path_str:
+def _write_book_files(records: List[Dict[str, Any]], book_dir: Path, transcoder: ImageTranscoder,
+                      advance: Any = None, source: str = "") -> None:
+    """
+    Folder writer: one directory + content.txt per record (see database.flatten_book).
+    Images are handed to *transcoder* and converted in the background.
+    Node folders of the previous save from the same *source* that no longer
+    exist are removed (see _prune_stale_nodes).
+    """
+    written = set()  # Node folders of this save, relative to book_dir (posix)
+
+    for record in records:
+        rel_path = ""
+        for index, title in record['path']:
+            rel_path = f"{rel_path}/{_node_dir_name(index, title)}" if rel_path else _node_dir_name(index, title)
+            written.add(rel_path)
+        current_path = book_dir / rel_path if rel_path else book_dir
+        current_path.mkdir(exist_ok=True)
+
+        if record['parts']:
+            full_text_content = []
+            image_counter = 0
+            seen_images = {}  # Map source_anchor_path -> dest_filename
+            digests = {img['path']: img['digest'] for img in record['images']}
+
+            for part in record['parts']:
+                if part[0] == 'text':
+                    full_text_content.append(part[1])
                     continue
 
+                _, anchor_path_str, caption = part
                 anchor_path = Path(anchor_path_str)
                 if anchor_path.exists():
                     # Check if we've already saved this image in this folder
                     if anchor_path_str in seen_images:
                         dest_filename = seen_images[anchor_path_str]
                     else:
-                        # Convert/Copy the image file
-                        # Use .webp extension
-                        dest_filename = f"image_{image_counter:03d}.webp"
-                        dest_path = current_path / dest_filename
-                        
-                        if _convert_to_webp(anchor_path, dest_path):
-                            pass
-                        else:
-                            # Fallback to original if conversion fails
-                            dest_filename = f"image_{image_counter:03d}{anchor_path.suffix}"
-                            shutil.copy2(anchor_path, current_path / dest_filename)
-                            
+                        # Convert in the background; the .webp name is known up front
+                        # (plain-copy fallbacks are patched in ImageTranscoder.finish)
+                        dest_filename = transcoder.submit(anchor_path, current_path, f"image_{image_counter:03d}",
+                                                          digests.get(anchor_path_str))
                         seen_images[anchor_path_str] = dest_filename
                         image_counter += 1
 
                     # Create a formatted Image Anchor tag
-                    caption = data.get('caption', '').strip()
+                    caption = caption.strip()
                     anchor_tag = f"[Image Anchor: {dest_filename}"
                     if caption:
                         anchor_tag += f" - Caption: {caption}"
                     anchor_tag += "]"
                     full_text_content.append(anchor_tag)
 
-        if full_text_content:
-            with open(current_path / "content.txt", "w", encoding="utf-8") as f:
-                f.write("\n\n".join(full_text_content))
+            if full_text_content:
+                write_if_changed(current_path / "content.txt", "\n\n".join(full_text_content))
 
-    # Recursively save children nodes
-    children = node.get('children', [])
-    for i, child_node in enumerate(children):
-        _save_node_recursively(child_node, current_path, i, progress_ctx)
+        if advance:
+            advance(f"Saving: {record['subtitle'][:30]}...")
 
+    _prune_stale_nodes(book_dir, written, source)
 
-def _count_total_nodes(nodes: List[Dict[str, Any]]) -> int:
-    """Helper to count total nodes for progress tracking."""
-    count = 0
-    for node in nodes:
-        count += 1
-        count += _count_total_nodes(node.get('children', []))
-    return count
 
 def _save_db_recursively(node: Dict[str, Any], db_manager: Any, chapter_id: int, order_index: int):
     """
@@ -166,6 +366,26 @@ def _save_db_recursively(node: Dict[str, Any], db_manager: Any, chapter_id: int,
         _save_db_recursively(child_node, db_manager, chapter_id, order_index + 1000 + i) 
 
 
+def copy_cover(cover_path: str, book_dir: Path) -> str:
+    """
+    Copies the cover image into the book directory.
+
+    Returns:
+        The copied cover path, the original path if copying failed, or "" if there is no cover.
+    """
+    if not cover_path or not Path(cover_path).exists():
+        return ""
+    try:
+        cover_src = Path(cover_path)
+        cover_dest = book_dir / f"cover{cover_src.suffix}"
+        shutil.copy2(cover_src, cover_dest)
+        return str(cover_dest)
+    except Exception as e:
+        print(f"[Storage] Failed to copy cover: {e}")
+        return cover_path  # Fallback
+
+
+@tracing.traced("save.folders")
 def save_as_folders(
     structured_content: List[Dict[str, Any]], 
     base_path: Path, 
@@ -175,55 +395,77 @@ def save_as_folders(
     author: str = "Unknown",
     original_path: str = "",
     cover_path: str = "",
-    published_year: str = ""
+    published_year: str = "",
+    image_workers: Optional[int] = None,
+    book_dir_name: Optional[str] = None
 ) -> tuple[bool, str]:
     """
     Saves the structured content with optional progress reporting and DB integration.
+
+    Images are converted to WebP in a process pool of *image_workers* processes
+    (None = CPU count, 1 = inline, e.g. when already running inside a worker).
+    *book_dir_name* overrides the folder name (default: stem of *book_name*).
     """
     try:
-        book_dir = base_path / Path(book_name).stem
+        book_dir = base_path / (book_dir_name or Path(book_name).stem)
         book_dir.mkdir(exist_ok=True)
-        
-        # Setup progress context
-        progress_ctx = None
+
+        # Single pass over the tree; both writers consume the same records
+        with tracing.span("save.flatten"):
+            records = flatten_book(structured_content)
+
+        # Progress covers both writers: one unit per record per writer
+        total = len(records) * (2 if db_manager else 1)
+        done = [0]
+        progress_lock = threading.Lock()
+
+        def advance(message: str) -> None:
+            with progress_lock:
+                done[0] += 1
+                percent = done[0] / total if total else 1.0
+            if progress_callback:
+                progress_callback(percent, message)
+
         if progress_callback:
-            total = _count_total_nodes(structured_content)
-            progress_ctx = {
-                'total': total,
-                'processed': 0,
-                'callback': progress_callback
-            }
             progress_callback(0.0, "Starting save...")
 
-        # 1. Save to File System first (fast)
-        for i, root_node in enumerate(structured_content):
-            _save_node_recursively(root_node, book_dir, i, progress_ctx)
-        
-        # 2. DB Batch Save (single transaction - fast)
-        if db_manager:
+        def write_files() -> Dict[str, int]:
+            # Images encode in a process pool while this thread keeps writing text
+            transcoder = ImageTranscoder(book_dir, max_workers=image_workers)
+            try:
+                with tracing.span("save.write_files", records=len(records)):
+                    _write_book_files(records, book_dir, transcoder, advance, source=original_path)
+            finally:
+                if progress_callback and transcoder.done < transcoder.total:
+                    transcoder.progress_callback = lambda n, of: progress_callback(
+                        min(done[0] / total, 1.0) if total else 1.0, f"Converting images: {n}/{of}")
+                with tracing.span("save.wait_images", images=transcoder.total):
+                    stats = transcoder.finish()
+            return stats
+
+        def write_db() -> int:
             # Handle Cover Persistence
-            final_cover_path = ""
-            if cover_path and Path(cover_path).exists():
-                try:
-                    # Copy cover to book directory
-                    cover_src = Path(cover_path)
-                    cover_dest = book_dir / f"cover{cover_src.suffix}"
-                    shutil.copy2(cover_src, cover_dest)
-                    final_cover_path = str(cover_dest)
-                except Exception as e:
-                    print(f"[Storage] Failed to copy cover: {e}")
-                    final_cover_path = cover_path # Fallback
-            
-            # cover_path is now passed in argument
-            book_id = db_manager.save_book_batch(
-                book_name, author, original_path, final_cover_path, structured_content, published_year
+            final_cover_path = copy_cover(cover_path, book_dir)
+            return db_manager.save_book_records(
+                book_name, author, original_path, final_cover_path, records, published_year,
+                progress_callback=lambda n, of: advance(f"Database: {n}/{of}"),
             )
-            if book_id == -1:
-                print("[Storage] Warning: Database save failed, but files were saved.")
 
-        return True, str(book_dir)
-             
+        # Folder and DB writers run concurrently; latency ~ the slower of the two
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="BookSave") as pool:
+            files_future = pool.submit(write_files)
+            db_future = pool.submit(write_db) if db_manager else None
+            stats = files_future.result()
+            book_id = db_future.result() if db_future else None
+
+        if stats["total"]:
+            print(f"[Storage] Images: {stats['converted']} converted, {stats['skipped']} reused")
+        if book_id == -1:
+            print("[Storage] Warning: Database save failed, but files were saved.")
+        elif db_manager and db_manager.last_import_stats.get("unchanged"):
+            print(f"[Storage] Re-import: {db_manager.last_import_stats}")
 
+        return True, str(book_dir)
 
     except Exception as e:
         traceback.print_exc()
@@ -0,0 +1,148 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/core/thumbnail_cache.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Persistent cache of pre-resized book cover thumbnails.
+#              Covers are resized once and stored under user_data/thumbnails,
+#              keyed by source path, mtime and size, so the library grid never
+#              decodes a full-size cover twice.
+# --------------------------------------------------------------------------------
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from .config import get_user_data_dir
+
+logger = logging.getLogger(__name__)
+
+COVER_THUMB_SIZE = (400, 440)  # 2x the 200x220 card cover, for HiDPI
+
+
+class ThumbnailCache:
+    """
+    Two-level cover cache: small PNG files on disk plus an in-memory LRU.
+
+    The key includes the source file's mtime and size, so replacing a cover
+    produces a new entry; stale files are left for `prune`.
+
+    Args:
+        cache_dir:    Directory holding the thumbnail files.
+        size:         Thumbnail size in pixels (cover is cropped to fit).
+        memory_items: Number of decoded thumbnails kept in memory.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, size: Tuple[int, int] = COVER_THUMB_SIZE,
+                 memory_items: int = 64):
+        self.cache_dir = Path(cache_dir) if cache_dir else get_user_data_dir() / "thumbnails"
+        self.size = size
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, path: str) -> Optional[str]:
+        """Cache key for *path*, or None if the file does not exist."""
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+        raw = f"{Path(path).resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.size[0]}x{self.size[1]}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path: str, create: bool = True) -> Optional[Image.Image]:
+        """
+        Returns the thumbnail for the cover at *path*, creating it if needed.
+
+        Args:
+            create: False returns None instead of decoding and resizing the cover
+                    when no thumbnail exists yet (for callers on the UI thread).
+
+        Returns:
+            A PIL image of `size`, or None if the cover is missing or unreadable.
+        """
+        if not path:
+            return None
+        key = self.key_for(path)
+        if key is None:
+            return None
+
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                return image
+
+        thumb_path = self.cache_dir / f"{key}.png"
+        image = None
+        if thumb_path.exists():
+            try:
+                with Image.open(thumb_path) as cached:
+                    image = cached.copy()
+            except Exception as e:
+                logger.warning(f"Discarding unreadable thumbnail {thumb_path.name}: {e}")
+        if image is None:
+            if not create:
+                return None
+            image = self._create(path, thumb_path)
+            if image is None:
+                return None
+
+        with self._lock:
+            self._memory[key] = image
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return image
+
+    def _create(self, path: str, thumb_path: Path) -> Optional[Image.Image]:
+        try:
+            with Image.open(path) as source:
+                source.draft("RGB", self.size)  # Lets JPEG decode at reduced scale
+                image = ImageOps.fit(source.convert("RGB"), self.size, method=Image.LANCZOS)
+        except Exception as e:
+            logger.warning(f"Error loading cover {path}: {e}")
+            return None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = thumb_path.with_suffix(".tmp")
+            image.save(tmp_path, "PNG")
+            tmp_path.replace(thumb_path)
+        except OSError as e:
+            logger.warning(f"Could not write thumbnail for {path}: {e}")  # Still usable this session
+        return image
+
+    def prune(self, keep_paths) -> int:
+        """
+        Deletes thumbnail files not belonging to any path in *keep_paths*.
+
+        Returns:
+            Number of files removed.
+        """
+        keep = {self.key_for(p) for p in keep_paths if p}
+        removed = 0
+        if not self.cache_dir.exists():
+            return 0
+        for thumb in self.cache_dir.glob("*.png"):
+            if thumb.stem not in keep:
+                try:
+                    thumb.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+_default_cache: Optional[ThumbnailCache] = None
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Process-wide cache in the user data directory."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ThumbnailCache()
+    return _default_cache
@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/core/token_budget.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Token estimation and per-chunk token budgeting for translation.
+#              Pure arithmetic — no network or model dependencies.
+# --------------------------------------------------------------------------------
+
+import math
+import threading
+
+# English prose averages ~4 characters per token on Gemini / Gemma tokenizers.
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Vietnamese output needs noticeably more tokens than the English input
+# (diacritics split words into several byte-level pieces).
+DEFAULT_OUTPUT_RATIO = 1.4
+
+# Never build chunks smaller than this, whatever the budget says.
+MIN_CHUNK_TOKENS = 128
+
+
+class TokenEstimator:
+    """
+    Character-based token estimator that calibrates itself from real usage.
+
+    Two numbers are learned with an exponential moving average:
+      - chars_per_token : characters of prompt text per input token
+      - output_ratio    : output tokens produced per source token
+    """
+
+    def __init__(
+        self,
+        chars_per_token: float = DEFAULT_CHARS_PER_TOKEN,
+        output_ratio: float = DEFAULT_OUTPUT_RATIO,
+        smoothing: float = 0.3,
+    ):
+        self.chars_per_token = chars_per_token
+        self.output_ratio = output_ratio
+        self.smoothing = smoothing
+        self._lock = threading.Lock()  # Cloud chunks report usage from worker threads
+
+    def count(self, text: str) -> int:
+        """Estimate the number of tokens in *text*."""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def observe_prompt(self, chars: int, tokens: int) -> None:
+        """Calibrate chars_per_token from a prompt of *chars* characters that cost *tokens*."""
+        if chars <= 0 or tokens <= 0:
+            return
+        observed = chars / tokens
+        with self._lock:
+            self.chars_per_token += self.smoothing * (observed - self.chars_per_token)
+
+    def observe_output(self, source_tokens: int, output_tokens: int) -> None:
+        """Calibrate output_ratio from one translated chunk."""
+        if source_tokens <= 0 or output_tokens <= 0:
+            return
+        observed = output_tokens / source_tokens
+        with self._lock:
+            self.output_ratio += self.smoothing * (observed - self.output_ratio)
+
+
+def chunk_token_budget(
+    context_tokens: int,
+    reserved_tokens: int,
+    output_ratio: float,
+    shared_context: bool = True,
+    safety_margin: float = 0.1,
+) -> int:
+    """
+    Compute how many source tokens a single chunk may hold.
+
+    Args:
+        context_tokens:  Local: the model context (n_ctx).
+                         Cloud: the max_output_tokens limit of a response.
+        reserved_tokens: Tokens already taken by the prompt template, style
+                         instruction and glossary (only counted when the
+                         context is shared between input and output).
+        output_ratio:    Expected output tokens per source token.
+        shared_context:  True when input and output share one window (llama.cpp);
+                         False when only the output is limited (Gemini).
+        safety_margin:   Fraction of the window kept free for estimation error.
+
+    Returns:
+        Source-token budget per chunk (never below MIN_CHUNK_TOKENS).
+    """
+    usable = context_tokens * (1.0 - safety_margin)
+    if shared_context:
+        budget = (usable - reserved_tokens) / (1.0 + output_ratio)
+    else:
+        budget = usable / max(output_ratio, 0.1)
+    return max(MIN_CHUNK_TOKENS, int(budget))
@@ -14,26 +14,74 @@
 
 import time
 import logging
+import threading
 from pathlib import Path
-from typing import Optional, List, Callable, Tuple
+from typing import Optional, Dict, List, Callable, Tuple
 
 from .chunking_strategy import ChunkingStrategy
 from .prompt_builder import PromptBuilder
 from .cloud_client import CloudAIClient
-from .local_genai import LocalTranslationService
+from .local_genai import LocalGenAI, LoadProfile, LocalTranslationService, draft_spec_from_settings
 from .style_manager import StyleManager
-from .glossary_manager import GlossaryManager
+from .glossary_manager import GlossaryManager, RANKING_MODES
+from .token_budget import TokenEstimator, chunk_token_budget
+from .eta_calculator import ThroughputModel
+from . import metrics
+from ..shared import tracing
 
 logger = logging.getLogger(__name__)
 
 
+class _TokenMeter:
+    """
+    Counts streamed tokens across chunks and forwards throttled progress
+    updates ("N tokens, X tok/s") to a translate_text progress_callback.
+    Thread-safe: Cloud chunks stream from several workers at once.
+    """
+
+    INTERVAL = 0.5  # Seconds between streamed progress updates
+
+    def __init__(self, progress_callback: Callable[[int, int, str], None], total: int, label: str):
+        self.progress_callback = progress_callback
+        self.total = total
+        self.label = label
+        self.tokens = 0
+        self.done = 0
+        self._start = time.time()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens_per_sec(self) -> float:
+        elapsed = time.time() - self._start
+        return self.tokens / elapsed if elapsed > 0 else 0.0
+
+    def chunk_done(self) -> None:
+        with self._lock:
+            self.done += 1
+
+    def add(self, n_tokens: int) -> None:
+        with self._lock:
+            self.tokens += n_tokens
+            now = time.time()
+            if now - self._last_emit < self.INTERVAL:
+                return
+            self._last_emit = now
+            done, tokens = self.done, self.tokens
+        self.progress_callback(
+            done, self.total,
+            f"Đang dịch {done + 1}/{self.total} ({self.label}) — "
+            f"{tokens} tokens, {self.tokens_per_sec:.1f} tok/s"
+        )
+
+
 class TranslationService:
     """
     Hybrid Translation Service.
     Routes requests to Google Gemini (Cloud) or TranslateGemma (Local).
 
     Public API (unchanged from v3):
-        translate_text(text, chunk_size, delay, progress_callback) -> str | None
+        translate_text(text, chunk_size, delay, progress_callback, should_stop) -> str | None
         transform_text(archive_text, original_text, variant_type)  -> (str, err)
         extract_glossary_from_text(text, subject)                  -> (list, err)
         set_api_key(key)
@@ -53,6 +101,16 @@ class TranslationService:
         self.local_service = LocalTranslationService()
         self.style_manager = StyleManager()
         self.glossary_manager = GlossaryManager()
+        # Local token counts come from llama.cpp; this only learns the output ratio
+        self.local_estimator = TokenEstimator()
+        self._local_load_key = None  # Arguments of the last successful local load
+        # Per-chunk cost model behind book ETAs (persisted by the queue manager)
+        self.throughput = ThroughputModel.from_dict(settings_manager.get("eta_model", {}))
+
+        # Glossary filtering stats (Cloud path): tokens NOT sent thanks to filtering
+        self._stats_lock = threading.Lock()
+        self.last_glossary_tokens_saved: int = 0   # Last finished translate_text() call (see `stats`)
+        self.glossary_tokens_saved: int = 0        # Whole session
 
     # ── Backward-compat properties ────────────────────────────────────
 
@@ -69,26 +127,72 @@ class TranslationService:
         """Update API Key at runtime."""
         self.cloud_client.setup(api_key)
 
+    def eta_model_name(self, engine: str) -> str:
+        """Model name the throughput model keys *engine* observations by."""
+        if engine == "local":
+            return Path(self.settings.get("local_model_path", "")).name
+        return self.settings.get("cloud_model_name", "gemini-2.5-pro")
+
+    def eta_chunk_workers(self, engine: str) -> int:
+        """Chunks of one article translated concurrently by *engine*."""
+        if engine == "local":
+            return max(1, getattr(self.local_service.engine, "slots", 1) or 1)
+        return self.MAX_CLOUD_WORKERS
+
     # ── Main translation entry point ──────────────────────────────────
 
+    @tracing.traced("translate.text")
     def translate_text(
         self,
         text: str,
         chunk_size: int = None,
         delay: float = None,
         progress_callback: Callable[[int, int, str], None] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        stats: Optional[Dict[str, int]] = None,
     ) -> Optional[str]:
         """Translate *text* from English to Vietnamese.
 
         Uses Cloud (Gemini) or Local (TranslateGemma) depending on settings.
         Supports parallel Cloud execution via ThreadPoolExecutor.
+
+        With streaming enabled (``stream_translation`` setting), progress_callback
+        also fires while a chunk is being generated, reporting tokens and
+        tokens/sec. When *should_stop* returns True, in-flight generation is
+        abandoned and None is returned.
+
+        In "tokens" chunking mode chunks are sized by the engine's token budget;
+        a given *chunk_size* (characters) still caps them.
+
+        *stats* (optional dict) receives this call's "glossary_tokens_saved";
+        unlike last_glossary_tokens_saved it is safe with concurrent callers.
         """
         import concurrent.futures
+        import functools
+
+        stats = stats if stats is not None else {}
+        stats["glossary_tokens_saved"] = 0
 
         engine = self.settings.get("translation_engine", "cloud")
 
+        # The inference server can generate several chunks at once (one per slot).
+        # Loading first also lets the token budget below use exact llama.cpp counts.
+        local_workers = 1
+        if engine == "local" and self._ensure_local_model() is None:
+            local_workers = getattr(self.local_service.engine, "slots", 1)
+
         # Determine effective chunk size
-        if engine == "cloud":
+        length_fn = len
+        if self.settings.get("chunking_mode", "tokens") == "tokens":
+            budget, count_fn = self._get_token_budget(engine)
+            length_fn = count_fn
+            if chunk_size:
+                # The caller's chunk_size (characters) stays an upper bound: a
+                # length within budget means both limits hold (conservative when packing)
+                scale = budget / chunk_size
+                length_fn = lambda s: max(count_fn(s), len(s) * scale)
+            chunk_size = budget
+        elif engine == "cloud":
             chunk_size = chunk_size or 15000  # Large context is fine for Gemini
         else:
             # Local LLM: leave comfortable headroom within 4096-token context
@@ -96,28 +200,54 @@ class TranslationService:
 
         # Protect image anchors before chunking
         protected_text, anchors_map = self.chunker.protect_anchors(text)
-        chunks = self.chunker.chunk_text(protected_text, chunk_size)
+        chunks = self.chunker.chunk_text(protected_text, chunk_size, length_fn=length_fn)
         total = len(chunks)
         results: List[Optional[str]] = [None] * total
 
+        # Internal abort: set on first chunk error so other workers stop early
+        abort = threading.Event()
+
+        def stop_requested() -> bool:
+            return abort.is_set() or bool(should_stop and should_stop())
+
+        meter = None
+        if progress_callback and self.settings.get("stream_translation", True) is True:
+            meter = _TokenMeter(progress_callback, total, "Local" if engine == "local" else "Cloud")
+
         if progress_callback:
             progress_callback(0, total, f"Engine: {engine.upper()} | Chunks: {total}")
 
-        if engine == "local":
+        if engine == "local" and local_workers <= 1:
+            on_token = (lambda piece: meter.add(1)) if meter else None
             for i, chunk in enumerate(chunks):
                 if progress_callback:
                     progress_callback(i, total, f"Đang dịch phần {i + 1}/{total} (Local)...")
-                res, err = self._translate_local_chunk(chunk)
+                res, err = self._translate_local_chunk(chunk, on_token=on_token, should_stop=should_stop)
+                if stop_requested():
+                    logger.info("[Local] Translation aborted by caller.")
+                    return None
                 if err:
                     logger.error(f"[Local] Chunk {i} error: {err}")
                     return None
                 results[i] = res
+                if meter:
+                    meter.chunk_done()
                 if progress_callback:
                     progress_callback(i + 1, total, f"Đã dịch {i + 1}/{total} (Local)...")
         else:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_CLOUD_WORKERS) as exc:
+            if engine == "local":
+                label, workers = "Local", local_workers
+                translate_chunk = self._translate_local_chunk
+                on_token = (lambda piece: meter.add(1)) if meter else None
+            else:
+                label, workers = "Cloud", self.MAX_CLOUD_WORKERS
+                translate_chunk = functools.partial(self._translate_cloud_chunk, stats=stats)
+                estimator = self.cloud_client.token_estimator
+                on_token = (lambda piece: meter.add(estimator.count(piece))) if meter else None
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as exc:
+                stop_fn = stop_requested if (meter or should_stop) else None
                 future_to_idx = {
-                    exc.submit(self._translate_cloud_chunk, chunk): idx
+                    exc.submit(translate_chunk, chunk, on_token, stop_fn): idx
                     for idx, chunk in enumerate(chunks)
                 }
                 completed = 0
@@ -125,17 +255,31 @@ class TranslationService:
                     idx = future_to_idx[future]
                     try:
                         res, err = future.result()
+                        if should_stop and should_stop():
+                            abort.set()
+                            logger.info(f"[{label}] Translation aborted by caller.")
+                            return None
                         if err:
-                            logger.error(f"[Cloud] Chunk {idx} error: {err}")
+                            abort.set()
+                            logger.error(f"[{label}] Chunk {idx} error: {err}")
                             return None
                         results[idx] = res
                         completed += 1
+                        if meter:
+                            meter.chunk_done()
                         if progress_callback:
-                            progress_callback(completed, total, f"Đã dịch {completed}/{total} (Cloud)...")
+                            progress_callback(completed, total, f"Đã dịch {completed}/{total} ({label})...")
                     except Exception as e:
-                        logger.error(f"[Cloud] Execution error: {e}")
+                        abort.set()
+                        logger.error(f"[{label}] Execution error: {e}")
                         return None
 
+        self.last_glossary_tokens_saved = stats["glossary_tokens_saved"]
+        if stats["glossary_tokens_saved"]:
+            logger.info(
+                f"[Cloud] Glossary filtering saved ~{stats['glossary_tokens_saved']} input tokens"
+            )
+
         if progress_callback:
             progress_callback(total, total, "Hoàn thành!")
 
@@ -174,40 +318,167 @@ class TranslationService:
 
     # ── Internal helpers ──────────────────────────────────────────────
 
-    def _translate_cloud_chunk(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+    def _translate_cloud_chunk(
+        self,
+        text: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
         """Route a single chunk to the Cloud AI client."""
-        glossary_str = self.glossary_manager.get_active_glossary_string()
-        return self.cloud_client.translate_chunk(text, glossary_str)
+        glossary_str = self._get_cloud_glossary(text, stats)
+        call: Dict[str, float] = {}
+        result, err = self.cloud_client.translate_chunk(
+            text, glossary_str, on_token=on_token, should_stop=should_stop, stats=call
+        )
+        if result and not err and "seconds" in call:
+            # Successful attempt only: retries and back-off sleeps would inflate the fit
+            self.throughput.observe("cloud", self.eta_model_name("cloud"),
+                                    len(text.split()), call["seconds"])
+        return result, err
+
+    def _get_cloud_glossary(self, text: str, stats: Optional[Dict[str, int]] = None) -> str:
+        """Build the chunk-relevant glossary for a Cloud prompt and record the savings in *stats*."""
+        max_terms = self.settings.get("cloud_glossary_max_terms", 80)
+        if not isinstance(max_terms, int) or max_terms <= 0:
+            max_terms = None
+        ranking = self.settings.get("cloud_glossary_ranking", "frequency")
+        if ranking not in RANKING_MODES:
+            ranking = "frequency"
+
+        glossary_str = self.glossary_manager.get_relevant_glossary_string(
+            text, max_terms=max_terms, ranking=ranking, quoted=True
+        )
+        full_str = self.glossary_manager.get_active_glossary_string()
+        estimator = self.cloud_client.token_estimator
+        saved = max(0, estimator.count(full_str) - estimator.count(glossary_str))
+        if saved:
+            with self._stats_lock:
+                if stats is not None:
+                    stats["glossary_tokens_saved"] = stats.get("glossary_tokens_saved", 0) + saved
+                self.glossary_tokens_saved += saved
+        return glossary_str
+
+    def _get_token_budget(self, engine: str) -> Tuple[int, Callable[[str], int]]:
+        """Return (chunk budget in source tokens, token counting function) for *engine*.
+
+        Cloud: only the response is limited, so the budget is the visible
+        output allowed per chunk (see CloudAIClient.chunk_output_tokens, which
+        leaves room for thinking tokens) divided by the calibrated expansion ratio.
+        Local: prompt template, style instruction, glossary reserve, input and
+        output all share the llama.cpp context window.
+        """
+        reserve = self.settings.get("glossary_token_reserve", 300)
+        if not isinstance(reserve, int) or reserve < 0:
+            reserve = 300
 
-    def _translate_local_chunk(self, text: str) -> Tuple[Optional[str], Optional[str]]:
-        """Route a single chunk to the Local LLM."""
+        if engine == "cloud":
+            estimator = self.cloud_client.token_estimator
+            max_output = self.cloud_client.chunk_output_tokens()
+            budget = chunk_token_budget(max_output, 0, estimator.output_ratio, shared_context=False)
+            return budget, estimator.count
+
+        # Sizing alone never loads the model: without the configured model in
+        # memory, the estimator and the configured context size are used instead
+        llm = self.local_service.engine
+        instruction = self.local_service.build_instruction(self._get_style_instruction())
+        model_path = self.settings.get("local_model_path", "")
+        if llm.model_loaded and getattr(llm, "_model_path", None) == model_path:
+            count_fn, n_ctx = llm.count_tokens, llm.n_ctx
+        else:
+            count_fn = self.local_estimator.count
+            n_ctx = LoadProfile.from_settings(self.settings).n_ctx
+        reserved = count_fn(llm.build_prompt(instruction, "")) + reserve
+        budget = chunk_token_budget(n_ctx, reserved, self.local_estimator.output_ratio)
+        return budget, count_fn
+
+    def _ensure_local_model(self) -> Optional[str]:
+        """Load the configured GGUF model if needed. Returns an error message or None."""
         model_path = self.settings.get("local_model_path", "")
         n_gpu = self.settings.get("n_gpu_layers", -1)
 
         if not model_path:
-            return None, "Chưa chọn file Model Local (.gguf)"
+            return "Chưa chọn file Model Local (.gguf)"
 
         try:
+            self._select_local_engine()
             engine = self.local_service.engine
-            if not engine.model_loaded or engine._model_path != model_path:
-                engine.load_model(model_path, n_gpu_layers=n_gpu)
+            draft = draft_spec_from_settings(self.settings)
+            profile = LoadProfile.from_settings(self.settings)
+            load_key = (id(engine), model_path, n_gpu, profile.key(), draft)
+            if not engine.model_loaded or engine._model_path != model_path \
+                    or self._local_load_key != load_key:
+                if hasattr(engine, "max_resident_models"):
+                    engine.max_resident_models = self.settings.get("local_max_resident_models", 2)
+                engine.load_model(model_path, n_gpu_layers=n_gpu, draft_model=draft[0],
+                                  draft_tokens=draft[1], profile=profile)
+                self._local_load_key = load_key
+            engine.prefix_cache_enabled = bool(self.settings.get("local_prefix_cache", True))
         except Exception as e:
-            return None, f"Lỗi load model: {e}"
-
+            return f"Lỗi load model: {e}"
+        return None
+
+    def _select_local_engine(self) -> None:
+        """Point the local service at the in-process model or the inference server."""
+        from .local_server import LocalServerClient
+
+        using_server = isinstance(self.local_service.engine, LocalServerClient)
+        if self.settings.get("local_inference_mode", "in_process") == "server":
+            if not using_server:
+                self.local_service.engine = LocalServerClient.get_instance(
+                    port=self.settings.get("local_server_port", 8765),
+                    n_slots=self.settings.get("local_server_slots", 0),
+                    idle_timeout=self.settings.get("local_server_idle_timeout", 1800),
+                )
+        elif using_server:
+            self.local_service.engine = LocalGenAI.get_instance()
+
+    def _get_style_instruction(self) -> str:
+        """Resolve the current style instruction for the local prompt."""
         style_name = self.settings.get("current_style", "standard")
         try:
-            instruction = self.style_manager.get_style_instruction(style_name)
+            return self.style_manager.get_style_instruction(style_name)
         except Exception:
-            instruction = "Bạn là biên dịch viên chuyên nghiệp. Hãy dịch văn bản sau sang tiếng Việt."
+            return "Bạn là biên dịch viên chuyên nghiệp. Hãy dịch văn bản sau sang tiếng Việt."
+
+    def _translate_local_chunk(
+        self,
+        text: str,
+        on_token: Optional[Callable[[str], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Route a single chunk to the Local LLM."""
+        err = self._ensure_local_model()
+        if err:
+            return None, err
 
+        instruction = self._get_style_instruction()
         glossary = self.glossary_manager.get_relevant_glossary_string(text)
+        model = Path(self.settings.get("local_model_path", "")).name
 
+        started = time.monotonic()
         try:
-            result = self.local_service.translate(text, system_instruction=instruction, glossary=glossary)
+            result, usage = self.local_service.translate_with_usage(
+                text, system_instruction=instruction, glossary=glossary,
+                on_token=on_token, should_stop=should_stop,
+            )
             if result:
+                engine = self.local_service.engine
+                output_tokens = usage.get('completion_tokens', 0)
+                input_tokens = engine.count_tokens(text)
+                self.local_estimator.observe_output(input_tokens, output_tokens)
+                elapsed = time.monotonic() - started
+                metrics.record_chunk("local", model, elapsed,
+                                     usage.get('prompt_tokens') or input_tokens, output_tokens)
+                self.throughput.observe("local", model, len(text.split()), elapsed)
                 return self.prompt_builder.clean_output(result), None
+            if not self.local_service.engine.model_loaded:
+                self._local_load_key = None  # Server went away and could not be restarted: reload next chunk
+            if not (should_stop and should_stop()):
+                metrics.record_retry("local", model, "empty result")
             return None, "Local generation returned empty result."
         except Exception as e:
+            metrics.record_retry("local", model, e)
             return None, f"Local Inference Error: {e}"
 
     def _load_gem_style_files(self) -> str:
@@ -1,10 +1,22 @@
 
 import os
+import re
 import shutil
+import hashlib
+import unicodedata
 from pathlib import Path
 from typing import Dict, Any
 import json
 
+from ..shared.file_utils import write_if_changed
+
+BUILD_MANIFEST_NAME = "build.json"  # Shard hashes and search terms of the last build
+SEARCH_INDEX_NAME = "search.js"
+IMAGE_TAG_PATTERN = re.compile(r"\[Image[^\]]*\]")
+TOKEN_PATTERN = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 2
+
+
 def generate_webview(
     book_title: str,
     author: str,
@@ -14,6 +26,15 @@ def generate_webview(
 ) -> Path:
     """
     Generates a standalone HTML/JS webview for the book.
+
+    Only the ToC goes into data/manifest.js; each article's text lives in its
+    own data/shards/<key>.js, loaded on demand when the article is opened.
+
+    Rebuilds are incremental: assets are rewritten only when they differ, and
+    shards (plus the images listed in an article's optional 'images' paths,
+    copied to output_dir/images) only for articles whose content hash changed
+    since the last build. The search index re-tokenizes only changed articles
+    and is not rewritten at all when no article changed.
     """
     webview_dir = output_dir / "webview"
     webview_dir.mkdir(parents=True, exist_ok=True)
@@ -27,8 +48,14 @@ def generate_webview(
     # 2. Generate CSS
     _write_css(css_dir)
     
-    # 3. Generate JS
-    _write_js(js_dir, chapters)
+    # 3. Generate JS (static logic) + data (manifest + per-article shards)
+    _write_js(js_dir)
+    data_dir = webview_dir / "data"
+    build = _load_build_cache(data_dir)
+    _write_search_index(data_dir, chapters, build)  # Sets build['search'] for the manifest
+    _write_data(data_dir, chapters, output_dir / "images", build)
+    with open(data_dir / BUILD_MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(build, f, ensure_ascii=False)
     
     # 4. Generate HTML
     index_path = webview_dir / "index.html"
@@ -145,6 +172,25 @@ def _write_css(css_dir: Path):
         color: white;
     }
     
+    .search-box {
+        padding: 10px 10px 0 10px;
+    }
+
+    .search-box input {
+        width: 100%;
+        box-sizing: border-box;
+        padding: 8px 10px;
+        border: 1px solid var(--sidebar-border);
+        border-radius: 5px;
+        background-color: var(--card-bg);
+        color: var(--text-color);
+        font-size: 0.9rem;
+    }
+
+    .toc[hidden] {
+        display: none;
+    }
+
     .toc-chapter {
         font-weight: bold;
         padding: 15px 10px 5px 10px;
@@ -332,18 +378,346 @@ def _write_css(css_dir: Path):
         }
     }
     """
-    with open(css_dir / "style.css", "w", encoding="utf-8") as f:
-        f.write(css_content)
+    write_if_changed(css_dir / "style.css", css_content)
 
-def _write_js(js_dir: Path, chapters: list):
-    js_data = f"const bookData = {json.dumps(chapters)};"
-    
+def _shard_key(article: dict, c_idx: int, a_idx: int) -> str:
+    """Stable shard name: the DB id when known, else the ToC position."""
+    if article.get('id') is not None:
+        return f"a{article['id']}"
+    return f"c{c_idx}_{a_idx}"
+
+
+def fold_text(text: str) -> str:
+    """Lower-cases and strips Vietnamese diacritics ("Lợn rừng" -> "lon rung"); mirrored by foldText() in app.js."""
+    text = text.lower().replace("đ", "d")
+    return "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+
+
+def _tokens(text: str) -> set:
+    text = IMAGE_TAG_PATTERN.sub(" ", text or "")
+    return {t for t in TOKEN_PATTERN.findall(fold_text(text)) if len(t) >= MIN_TOKEN_LENGTH}
+
+
+def _search_docs(chapters: list) -> list:
+    """(chapter_idx, article_idx, shard key, searchable text, text hash) per article in ToC order."""
+    docs = []
+    for c_idx, chapter in enumerate(chapters):
+        for a_idx, article in enumerate(chapter.get('articles', [])):
+            text = " ".join((article.get('subtitle') or '', article.get('content_text') or '',
+                             article.get('translation_text') or ''))
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+            docs.append((c_idx, a_idx, _shard_key(article, c_idx, a_idx), text, digest))
+    return docs
+
+
+def build_search_index(chapters: list, term_cache: Dict[str, list] = None,
+                       docs: list = None) -> Dict[str, Any]:
+    """
+    Inverted index over subtitle, original and translated text of every article.
+
+    Format (kept compact for the browser):
+        docs:     [[chapter_idx, article_idx], ...] in ToC order
+        terms:    sorted folded terms (binary-searchable for prefix queries)
+        postings: per term, ascending doc numbers delta-encoded ([3, 5, 9] -> [3, 2, 4])
+
+    Args:
+        term_cache: shard key -> [text hash, terms] from the previous build;
+                    articles whose hash matches are not re-tokenized. Replaced
+                    in place with the entries of this build.
+        docs:       Precomputed _search_docs(chapters).
+    """
+    if docs is None:
+        docs = _search_docs(chapters)
+    fresh: Dict[str, list] = {}
+    postings: Dict[str, list] = {}
+    for doc, (_, _, key, text, digest) in enumerate(docs):
+        cached = term_cache.get(key) if term_cache else None
+        terms = cached[1] if cached and cached[0] == digest else sorted(_tokens(text))
+        fresh[key] = [digest, terms]
+        for term in terms:
+            postings.setdefault(term, []).append(doc)
+    if term_cache is not None:
+        term_cache.clear()
+        term_cache.update(fresh)
+
+    terms = sorted(postings)
+    encoded = []
+    for term in terms:
+        previous = 0
+        deltas = []
+        for doc in postings[term]:
+            deltas.append(doc - previous)
+            previous = doc
+        encoded.append(deltas)
+    return {'docs': [[c_idx, a_idx] for c_idx, a_idx, _, _, _ in docs], 'terms': terms, 'postings': encoded}
+
+
+def _write_search_index(data_dir: Path, chapters: list, build: dict) -> None:
+    """Writes data/search.js unless no article changed since the last build."""
+    docs = _search_docs(chapters)
+    version = hashlib.sha1(json.dumps([[d[2], d[4]] for d in docs]).encode("utf-8")).hexdigest()[:12]
+    path = data_dir / SEARCH_INDEX_NAME
+    if build.get('search') == version and path.exists():
+        return
+    data_dir.mkdir(parents=True, exist_ok=True)
+    index = build_search_index(chapters, build['terms'], docs)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"window.__onSearchIndex({json.dumps(index, ensure_ascii=False)});\n")
+    build['search'] = version
+
+
+def _load_build_cache(data_dir: Path) -> dict:
+    """
+    State of the previous build (data/build.json):
+        shards: shard key -> content hash
+        terms:  shard key -> [text hash, search terms]
+        search: hash of the doc list the search index was built from
+    """
+    try:
+        with open(data_dir / BUILD_MANIFEST_NAME, "r", encoding="utf-8") as f:
+            build = json.load(f)
+    except (OSError, ValueError):
+        build = {}
+    if not isinstance(build, dict):
+        build = {}
+    if 'shards' not in build:
+        build = {'shards': build}  # Older builds stored only the shard hashes
+    if not isinstance(build.get('terms'), dict):
+        build['terms'] = {}
+    return build
+
+
+def _copy_image(src_path: Path, images_dir: Path):
+    """Copies an article image unless an identical-looking copy is already there."""
+    if not src_path.exists():
+        return
+    dest = images_dir / src_path.name
+    try:
+        src_stat = src_path.stat()
+        if dest.exists() and dest.stat().st_size == src_stat.st_size:
+            return
+        images_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src_path, dest)
+    except OSError as e:
+        print(f"[Webview] Image copy failed for {src_path}: {e}")
+
+
+def _write_data(data_dir: Path, chapters: list, images_dir: Path = None, build: dict = None):
+    """
+    Writes the ToC manifest and one shard per article.
+
+    Shards are JS files (``window.__onShard(key, {...})``) rather than .json
+    because the webview is opened from file://, where fetch() is blocked but
+    <script> tags still load. Each ToC entry carries a short content hash
+    (``v``) that is appended to the shard URL, so the browser never shows a
+    stale cached shard after a rebuild.
+
+    The hashes of the previous build are kept in data/build.json (*build*, see
+    _load_build_cache); shards whose hash is unchanged are not rewritten and
+    their images are not touched. build['shards'] is updated for the caller to save.
+    build['search'] (the search index version) goes into the manifest as well, as
+    the ``?v=`` of data/search.js.
+    """
+    shards_dir = data_dir / "shards"
+    shards_dir.mkdir(parents=True, exist_ok=True)
+    if build is None:
+        build = _load_build_cache(data_dir)
+    previous = build['shards'] if isinstance(build['shards'], dict) else {}
+
+    manifest = []
+    hashes = {}
+    for c_idx, chapter in enumerate(chapters):
+        toc_articles = []
+        for a_idx, article in enumerate(chapter.get('articles', [])):
+            key = _shard_key(article, c_idx, a_idx)
+            payload = json.dumps({
+                'content_text': article.get('content_text') or '',
+                'translation_text': article.get('translation_text') or '',
+            }, ensure_ascii=False)
+            images = [str(path) for path in article.get('images', [])]
+            version = hashlib.sha1("\0".join([payload] + images).encode("utf-8")).hexdigest()[:12]
+            toc_articles.append({'subtitle': article.get('subtitle'), 'key': key, 'v': version})
+            hashes[key] = version
+
+            shard_path = shards_dir / f"{key}.js"
+            if previous.get(key) == version and shard_path.exists():
+                continue  # Unchanged since the last build
+            with open(shard_path, "w", encoding="utf-8") as f:
+                f.write(f"window.__onShard({json.dumps(key)}, {payload});\n")
+            if images_dir is not None:
+                for image in images:
+                    _copy_image(Path(image), images_dir)
+        manifest.append({'title': chapter.get('title'), 'articles': toc_articles})
+
+    # Drop shards of articles that no longer exist
+    for shard in shards_dir.glob("*.js"):
+        if shard.stem not in hashes:
+            shard.unlink()
+
+    book_manifest = {'chapters': manifest, 'search': build.get('search')}
+    write_if_changed(data_dir / "manifest.js",
+                     f"window.bookManifest = {json.dumps(book_manifest, ensure_ascii=False)};\n")
+    build['shards'] = hashes
+
+
+def _write_js(js_dir: Path):
     js_logic = r"""
+    const bookData = window.bookManifest.chapters; // ToC only; text is in shards
     let currentViewMode = 'dual'; // 'original', 'translation', 'dual'
     let isSidebarOpen = true; // Desktop default
+    let renderToken = 0; // Guards against a slow shard overwriting a newer click
+
+    // ── Shard loading (JSONP-style: works from file://) ──
+    const shardCache = {};
+    const shardWaiters = {};
+
+    window.__onShard = (key, data) => {
+        shardCache[key] = data;
+        (shardWaiters[key] || []).forEach(w => w.resolve(data));
+        delete shardWaiters[key];
+    };
+
+    function loadShard(article) {
+        const key = article.key;
+        if (shardCache[key]) return Promise.resolve(shardCache[key]);
+        return new Promise((resolve, reject) => {
+            if (shardWaiters[key]) { shardWaiters[key].push({resolve, reject}); return; }
+            shardWaiters[key] = [{resolve, reject}];
+            const script = document.createElement('script');
+            script.src = `data/shards/${key}.js?v=${article.v}`;
+            script.onload = () => script.remove();
+            script.onerror = () => {
+                script.remove();
+                (shardWaiters[key] || []).forEach(w => w.reject(new Error(key)));
+                delete shardWaiters[key];
+            };
+            document.head.appendChild(script);
+        });
+    }
+
+    // ── Search (index in data/search.js, loaded on first use) ──
+    const MAX_RESULTS = 200;
+    let searchIndex = null;
+    let searchIndexPromise = null;
+    let searchTimer = null;
+
+    window.__onSearchIndex = (index) => { searchIndex = index; };
+
+    function loadSearchIndex() {
+        if (!searchIndexPromise) {
+            searchIndexPromise = new Promise((resolve, reject) => {
+                const script = document.createElement('script');
+                const version = window.bookManifest.search;
+                script.src = version ? `data/search.js?v=${version}` : 'data/search.js';
+                script.onload = () => { script.remove(); resolve(searchIndex); };
+                script.onerror = () => { searchIndexPromise = null; reject(new Error('search.js')); };
+                document.head.appendChild(script);
+            });
+        }
+        return searchIndexPromise;
+    }
+
+    function foldText(text) {
+        // Must match fold_text() in webview_generator.py
+        return text.toLowerCase().replace(/đ/g, 'd').normalize('NFD').replace(/[\u0300-\u036f]/g, '');
+    }
+
+    function decodePostings(i) {
+        const docs = [];
+        let doc = 0;
+        searchIndex.postings[i].forEach(delta => { doc += delta; docs.push(doc); });
+        return docs;
+    }
+
+    function lowerBound(terms, value) {
+        let lo = 0, hi = terms.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (terms[mid] < value) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    function docsForToken(token, prefix) {
+        const terms = searchIndex.terms;
+        const found = new Set();
+        let i = lowerBound(terms, token);
+        if (!prefix) {
+            if (terms[i] === token) decodePostings(i).forEach(d => found.add(d));
+            return found;
+        }
+        for (; i < terms.length && terms[i].startsWith(token); i++) {
+            decodePostings(i).forEach(d => found.add(d));
+        }
+        return found;
+    }
+
+    function runSearch(query) {
+        const tokens = foldText(query).split(/[^\p{L}\p{N}_]+/u).filter(t => t.length >= 2);
+        if (!tokens.length) return [];
+        let result = null;
+        tokens.forEach((token, i) => {
+            // Last word is a prefix (search-as-you-type); earlier words must match whole terms
+            const docs = docsForToken(token, i === tokens.length - 1);
+            result = result === null ? docs : new Set([...result].filter(d => docs.has(d)));
+        });
+        return [...result].sort((a, b) => a - b);
+    }
+
+    function renderSearchResults(query) {
+        const toc = document.getElementById('toc-list');
+        const results = document.getElementById('search-results');
+        if (!query.trim()) {
+            results.hidden = true;
+            toc.hidden = false;
+            return;
+        }
+        loadSearchIndex().then(() => {
+            const docs = runSearch(query);
+            results.innerHTML = '';
+            const summary = document.createElement('div');
+            summary.className = 'toc-chapter';
+            summary.textContent = `${docs.length} kết quả`;
+            results.appendChild(summary);
+            docs.slice(0, MAX_RESULTS).forEach(doc => {
+                const [cIdx, aIdx] = searchIndex.docs[doc];
+                const item = document.createElement('div');
+                item.className = 'toc-item';
+                item.textContent = bookData[cIdx].articles[aIdx].subtitle || 'Section ' + (aIdx + 1);
+                item.title = bookData[cIdx].title || '';
+                item.onclick = () => {
+                    loadArticle(cIdx, aIdx, document.getElementById(`toc-${cIdx}-${aIdx}`));
+                    if (window.innerWidth <= 768) toggleSidebar();
+                };
+                results.appendChild(item);
+            });
+            toc.hidden = true;
+            results.hidden = false;
+        }).catch(() => {
+            results.innerHTML = '<div class="toc-chapter">Không tải được chỉ mục tìm kiếm</div>';
+            results.hidden = false;
+        });
+    }
+
+    function setupSearch() {
+        const input = document.getElementById('search-input');
+        input.addEventListener('focus', () => loadSearchIndex().catch(() => {}), { once: true });
+        input.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => renderSearchResults(input.value), 80);
+        });
+    }
+
+    function prefetchNext(cIdx, aIdx) {
+        const chapter = bookData[cIdx];
+        const next = aIdx + 1 < chapter.articles.length ? chapter.articles[aIdx + 1]
+            : (bookData[cIdx + 1] && bookData[cIdx + 1].articles[0]);
+        if (next) loadShard(next).catch(() => {});
+    }
 
     document.addEventListener('DOMContentLoaded', () => {
         renderTOC();
+        setupSearch();
         renderWelcome();
         checkResponsive();
         window.addEventListener('resize', checkResponsive);
@@ -389,6 +763,7 @@ def _write_js(js_dir: Path, chapters: list):
             chapter.articles.forEach((article, aIdx) => {
                 const item = document.createElement('div');
                 item.className = 'toc-item';
+                item.id = `toc-${cIdx}-${aIdx}`;
                 item.textContent = article.subtitle || 'Section ' + (aIdx + 1);
                 item.onclick = () => { loadArticle(cIdx, aIdx, item); if(window.innerWidth<=768) toggleSidebar(); };
                 tocContainer.appendChild(item);
@@ -400,7 +775,24 @@ def _write_js(js_dir: Path, chapters: list):
         document.querySelectorAll('.toc-item').forEach(el => el.classList.remove('active'));
         if(domItem) domItem.classList.add('active');
         
-        const article = bookData[cIdx].articles[aIdx];
+        const entry = bookData[cIdx].articles[aIdx];
+        const container = document.getElementById('content-display');
+        const token = ++renderToken;
+        if (!shardCache[entry.key]) {
+            container.innerHTML = '<div class="placeholder"><p>Đang tải...</p></div>';
+        }
+        loadShard(entry).then(data => {
+            if (token !== renderToken) return; // A newer article was opened meanwhile
+            renderArticle(cIdx, aIdx, {subtitle: entry.subtitle, ...data});
+            prefetchNext(cIdx, aIdx);
+        }).catch(() => {
+            if (token === renderToken) {
+                container.innerHTML = '<div class="placeholder"><p>Không tải được nội dung.</p></div>';
+            }
+        });
+    }
+
+    function renderArticle(cIdx, aIdx, article) {
         const container = document.getElementById('content-display');
         container.innerHTML = '';
         
@@ -556,8 +948,7 @@ def _write_js(js_dir: Path, chapters: list):
     window.toggleSidebar = toggleSidebar;
     """
     
-    with open(js_dir / "app.js", "w", encoding="utf-8") as f:
-        f.write(js_data + "\n" + js_logic)
+    write_if_changed(js_dir / "app.js", js_logic)
 
 def _write_html(path: Path, title: str, author: str):
     html = f"""
@@ -575,7 +966,11 @@ def _write_html(path: Path, title: str, author: str):
                 <h1 title="{title}">{title}</h1>
                 <button class="close-btn" onclick="toggleSidebar()">×</button>
             </div>
+            <div class="search-box">
+                <input id="search-input" type="search" placeholder="Tìm kiếm..." autocomplete="off">
+            </div>
             <div class="toc" id="toc-list"></div>
+            <div class="toc" id="search-results" hidden></div>
         </div>
         
         <div class="main-content">
@@ -596,9 +991,9 @@ def _write_html(path: Path, title: str, author: str):
             </div>
         </div>
         
+        <script src="data/manifest.js"></script>
         <script src="js/app.js"></script>
     </body>
     </html>
     """
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+    write_if_changed(path, html)
@@ -33,7 +33,9 @@ from ..core.history_manager import HistoryManager # New Import
 from ..core.database import DatabaseManager # New Import
 from ..core.settings_manager import SettingsManager # New Import
 from ..core.translation_service import TranslationService # New Import
-from ..shared import debug_logger
+from ..core import metrics
+from ..shared import debug_logger, tracing
+from ..core.config import get_user_data_dir
 from .ui.sidebar import SidebarFrame
 from .ui.top_bar import TopBarFrame
 from .ui.dashboard_view import DashboardView
@@ -123,15 +125,13 @@ class MainWindow(ctk.CTk):
         self.log_panel = LogPanel(self.right_container, height=120)
         self.log_panel.grid(row=2, column=0, sticky="ew", padx=Spacing.XL, pady=(0, Spacing.LG))
         
-        # Connect Logger
-        # Use lambda or direct method to route messages to the UI panel on the main thread.
-        # Since tkinter is not thread-safe for GUI updates from workers, we should technically use queue/after.
-        # However, for simple appending, many tk implementations handle it or crash. 
-        # Best practice: Wrapper. But for now direct call (assuming writer uses after/event if needed, or risked).
-        # We will use .after logic in write_log if crashes occur. 
-        # Re-check LogPanel implementation... it uses direct calls. 
-        # Let's wrap it in an `after` call to be safe from threads.
-        debug_logger.register_listener(lambda msg: self.after(0, self.log_panel.write_log, msg))
+        # Connect Logger: the panel polls the logger's ring buffer on the main thread
+        debug_logger.set_level(self.settings_manager.get("log_level", "INFO"))
+        self.log_panel.follow_logger()
+        if self.settings_manager.get("trace_enabled", False) and not tracing.is_enabled():
+            # Written at exit; open in chrome://tracing or ui.perfetto.dev
+            tracing.enable(get_user_data_dir() / "traces" / time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        self._start_metrics_export()
 
         # 6. Views
         self.dashboard_view = DashboardView(self.content_area, on_import=self._on_select_file)
@@ -199,8 +199,22 @@ class MainWindow(ctk.CTk):
         elif view_name == "settings":
             self._show_view("settings")
 
+    def _start_metrics_export(self):
+        """Exports translation metrics in Prometheus format if configured."""
+        textfile = self.settings_manager.get("metrics_textfile", "")
+        port = int(self.settings_manager.get("metrics_port", 0) or 0)
+        if textfile:
+            metrics.REGISTRY.start_textfile_writer(textfile)
+        if port:
+            try:
+                metrics.REGISTRY.serve(port)
+            except OSError as e:
+                debug_logger.warning(f"Không thể mở cổng metrics {port}: {e}")
+
     def _show_view(self, view_name: str):
         """Switch the visible view in the content area."""
+        if view_name != "library":
+            self.library_view.cancel_pending()  # Don't deliver stale library loads
         # Hide all
         self.dashboard_view.grid_forget()
         self.results_view.grid_forget()
@@ -0,0 +1,128 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/modules/ui/async_db.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: AsyncDB — runs database calls on a worker pool and hands the
+#              results back to the Tk main thread with after(). A newer request
+#              with the same key supersedes the older one, and all requests of
+#              a widget can be cancelled when the user navigates away.
+# --------------------------------------------------------------------------------
+
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DBRequest:
+    """Handle for one pending call; `cancel()` drops its result (and skips it if not started)."""
+
+    def __init__(self, owner, key: Hashable):
+        self.owner = owner
+        self.key = key
+        self.cancelled = False
+        self.future: Optional[concurrent.futures.Future] = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class AsyncDB:
+    """
+    Off-main-thread access to a DatabaseManager.
+
+    DatabaseManager opens one SQLite connection per call, so calls are safe to
+    run on any worker thread. Results are delivered via ``owner.after(0, ...)``
+    only if the request is still current and the owner widget still exists.
+
+    Args:
+        db_manager:  The DatabaseManager the calls go to (exposed as `.db`).
+        max_workers: Size of the worker pool.
+    """
+
+    def __init__(self, db_manager, max_workers: int = 2):
+        self.db = db_manager
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+        self._lock = threading.Lock()
+        self._current: Dict[Tuple[int, Hashable], DBRequest] = {}
+
+    def call(
+        self,
+        owner,
+        key: Hashable,
+        func: Callable[..., Any],
+        *args,
+        on_result: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> DBRequest:
+        """
+        Runs ``func(*args)`` on the pool; `on_result(value)` then runs on the Tk thread.
+
+        Args:
+            owner:     Widget the result belongs to (its `after` delivers the result).
+            key:       Requests from the same owner with the same key supersede each other.
+            func:      Usually a bound DatabaseManager method, or a function doing several calls.
+            on_result: Called with the return value on the main thread.
+            on_error:  Called with the exception on the main thread (default: logged).
+
+        Returns:
+            The request handle.
+        """
+        request = DBRequest(owner, key)
+        slot = (id(owner), key)
+        with self._lock:
+            previous = self._current.get(slot)
+            if previous is not None:
+                previous.cancel()
+            self._current[slot] = request
+        request.future = self._executor.submit(self._run, request, func, args, on_result, on_error)
+        return request
+
+    def cancel(self, owner, key: Hashable = None) -> None:
+        """Cancels the owner's request for *key*, or all of its requests if no key is given."""
+        with self._lock:
+            for slot in [s for s in self._current if s[0] == id(owner) and (key is None or s[1] == key)]:
+                self._current.pop(slot).cancel()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, request: DBRequest, func, args, on_result, on_error) -> None:
+        if request.cancelled:
+            return
+        try:
+            value, error = func(*args), None
+        except Exception as e:
+            value, error = None, e
+        if request.cancelled:
+            return
+
+        def deliver():
+            with self._lock:
+                if self._current.get((id(request.owner), request.key)) is request:
+                    del self._current[(id(request.owner), request.key)]
+            if request.cancelled:
+                return
+            try:
+                if not request.owner.winfo_exists():
+                    return
+            except Exception:
+                return  # Owner already destroyed
+            if error is None:
+                on_result(value)
+            elif on_error is not None:
+                on_error(error)
+            else:
+                logger.error(f"DB call {getattr(func, '__name__', func)} failed: {error}")
+
+        try:
+            request.owner.after(0, deliver)
+        except Exception:
+            pass  # Owner destroyed while the query ran
@@ -1,11 +1,14 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/modules/ui/book_detail_window.py
-# Version: 1.0.0
+# Version: 1.1.0
 # Author: Antigravity
 # Description: BookDetailWindow — popup showing chapters, articles, queue controls,
 #              export options and AI glossary extraction for a single book.
 #              Extracted from library_view.py (Phase 3B refactor).
+#              The article list is virtualized (VirtualList) and status changes
+#              update single rows in place. Database reads and exports run off
+#              the main thread through AsyncDB.
 # --------------------------------------------------------------------------------
 
 import tkinter as tk
@@ -13,15 +16,16 @@ import tkinter.filedialog as fd
 import threading
 import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import customtkinter as ctk
-import shutil
 import webbrowser
 
 from .theme import Colors, Fonts, Spacing
 from .custom_dialog import ask_yes_no, show_info, show_warning, show_error
 from .tooltip import ToolTip
 from .editor_view import DualViewEditor
+from .virtual_list import VirtualList
+from .async_db import AsyncDB
 from ...core import webview_generator
 from ...core.eta_calculator import calculate_book_eta, update_dynamic_wpm
 from ...core.queue_manager import ChapterQueueManager, ChapterQueueItem, QueueStatus
@@ -40,7 +44,10 @@ class BookDetailWindow(ctk.CTkToplevel):
       - Webview preview
     """
 
-    def __init__(self, master, book_details: Dict, translation_service, db_manager, settings_manager):
+    ROW_HEIGHTS = {"chapter": 52, "parent": 42, "leaf": 40}
+
+    def __init__(self, master, book_details: Dict, translation_service, db_manager, settings_manager,
+                 async_db: AsyncDB = None):
         super().__init__(master, fg_color=Colors.BG_APP)
         self.title(book_details.get('title', 'Chi tiết sách'))
         self.geometry("900x700")
@@ -48,6 +55,7 @@ class BookDetailWindow(ctk.CTkToplevel):
         self.translation_service = translation_service
         self.db_manager = db_manager
         self.settings_manager = settings_manager
+        self.async_db = async_db or AsyncDB(db_manager)
 
         # Data
         self.book_id = book_details.get('id')
@@ -64,7 +72,9 @@ class BookDetailWindow(ctk.CTkToplevel):
             on_item_done=lambda art_id, ok: self.after(0, lambda: self._on_queue_item_done(art_id, ok)),
             on_queue_done=lambda: self.after(0, self._on_queue_done),
             on_status_change=lambda s: self.after(0, lambda: self._on_queue_status_change(s)),
+            on_progress=lambda art_id, cur, tot, msg: self.after(0, lambda: self._on_queue_progress(msg)),
         )
+        self._queue_progress_msg = ""  # Live streamed progress of the current article
 
         # ── Header ────────────────────────────────────────────────────
         ctk.CTkLabel(
@@ -98,11 +108,7 @@ class BookDetailWindow(ctk.CTkToplevel):
         self.btn_ai_glossary.pack(side="left", padx=Spacing.MD)
 
         # ETA label
-        engine = settings_manager.get("translation_engine", "cloud")
-        wpm_key = f"{engine}_llm_wpm"
-        default_wpm = 6000 if engine == "cloud" else 180
-        wpm = int(settings_manager.get(wpm_key, default_wpm))
-        eta_text = calculate_book_eta(book_details.get('chapters', []), wpm=wpm, engine=engine)
+        eta_text = self._eta_text(book_details.get('chapters', []))
         self.lbl_eta = ctk.CTkLabel(
             self.tools_frame, text=f"⏱ Ước tính dịch: {eta_text}",
             font=Fonts.SMALL, text_color=Colors.TEXT_MUTED
@@ -147,9 +153,12 @@ class BookDetailWindow(ctk.CTkToplevel):
         self.btn_queue_start.pack(side="right", padx=(2, Spacing.MD), pady=Spacing.SM)
 
         # ── Article List ──────────────────────────────────────────────
-        self.list_frame = ctk.CTkScrollableFrame(
-            self, fg_color=Colors.BG_CARD, corner_radius=Spacing.CARD_RADIUS,
-            scrollbar_button_color=Colors.BORDER, scrollbar_button_hover_color=Colors.TEXT_MUTED
+        # Only rows in view get widgets; they are recycled while scrolling
+        self._articles_by_id: Dict[int, Dict] = {}
+        self.list_frame = VirtualList(
+            self, row_heights=self.ROW_HEIGHTS,
+            create_row=self._create_row, bind_row=self._bind_row, row_key=lambda row: row['key'],
+            fg_color=Colors.BG_CARD, corner_radius=Spacing.CARD_RADIUS,
         )
         self.list_frame.pack(fill="both", expand=True, padx=Spacing.XL, pady=(Spacing.XL, 0))
 
@@ -188,7 +197,7 @@ class BookDetailWindow(ctk.CTkToplevel):
         )
         self.lbl_export_status.pack(side="right", padx=Spacing.SM)
 
-        self._render_content()
+        self._build_rows()  # book_details is fresh: no reload needed
 
         # Ensure window appears on top (Windows fix)
         self.attributes('-topmost', True)
@@ -199,40 +208,36 @@ class BookDetailWindow(ctk.CTkToplevel):
     # Content Rendering
     # ─────────────────────────────────────────────────────────────────
 
+    def destroy(self):
+        self.async_db.cancel(self)  # Results for a closed window are dropped
+        super().destroy()
+
     def _render_content(self):
-        """Refresh chapter/article list from DB."""
-        if self.book_id:
-            fresh_data = self.db_manager.get_book_details(self.book_id)
-            if fresh_data:
-                self.chapters = fresh_data.get('chapters', [])
+        """Reload chapter/article list from DB (off the main thread), then rebuild the rows."""
+        if not self.book_id:
+            self._build_rows()
+            return
+        self.async_db.call(self, "details", self.db_manager.get_book_details, self.book_id,
+                           on_result=self._on_details_loaded)
+
+    def _on_details_loaded(self, fresh_data: Dict) -> None:
+        if fresh_data:
+            self.chapters = fresh_data.get('chapters', [])
+        self._build_rows()
 
+    def _build_rows(self):
+        """Rebuild the row model from self.chapters (widgets are recycled)."""
         if not self.winfo_exists() or not self.list_frame.winfo_exists():
             return
 
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-
+        rows = []
+        self._articles_by_id = {}
         for chapter in self.chapters:
             all_articles = chapter.get('articles', [])
-
-            total_words = sum(a.get('word_count', 0) or 0 for a in all_articles)
-            total_translated = sum(1 for a in all_articles if a.get('status') == 'translated' and a.get('is_leaf', 1))
-            total_leaf = sum(1 for a in all_articles if a.get('is_leaf', 1))
-
-            # Chapter Header
-            chap_frame = ctk.CTkFrame(self.list_frame, fg_color=Colors.BG_CARD_HOVER, corner_radius=Spacing.BUTTON_RADIUS)
-            chap_frame.pack(fill="x", pady=(Spacing.MD, Spacing.XS), padx=0)
-
-            ctk.CTkLabel(
-                chap_frame, text=f"📂 {chapter.get('title', 'Unknown Chapter')}",
-                font=Fonts.H3, text_color=Colors.TEXT_PRIMARY, anchor="w"
-            ).pack(side="left", fill="x", expand=True, padx=Spacing.MD, pady=Spacing.SM)
-
-            progress_text = f"{total_translated}/{total_leaf}" if total_leaf > 0 else "0"
-            ctk.CTkLabel(
-                chap_frame, text=f"{total_words:,} từ | {progress_text} đã dịch",
-                font=Fonts.TINY, text_color=Colors.TEXT_MUTED
-            ).pack(side="right", padx=Spacing.MD, pady=Spacing.SM)
+            rows.append({'kind': 'chapter', 'key': ('chapter', chapter.get('id')), 'chapter': chapter})
+            for article in all_articles:
+                article['chapter_id'] = chapter.get('id')
+                self._articles_by_id[article.get('id')] = article
 
             parent_articles = [a for a in all_articles if not a.get('is_leaf', 1)]
             leaf_articles = [a for a in all_articles if a.get('is_leaf', 1)]
@@ -240,159 +245,56 @@ class BookDetailWindow(ctk.CTkToplevel):
             if parent_articles and leaf_articles:
                 for parent in parent_articles:
                     if (parent.get('word_count', 0) or 0) > 0:
-                        self._render_article_row(parent, indent=Spacing.MD, is_parent=True)
+                        rows.append(self._article_row(parent, 'parent', Spacing.MD))
                 for article in leaf_articles:
-                    self._render_article_row(article, indent=Spacing.XL + Spacing.MD)
+                    rows.append(self._article_row(article, 'leaf', Spacing.XL + Spacing.MD))
             else:
                 for article in all_articles:
-                    self._render_article_row(article, indent=Spacing.MD)
-
-    def _render_article_row(self, article, indent=0, is_parent=False):
-        """Render a single article row with status dot, buttons and optional checkbox."""
-        status = article.get('status', 'new')
-        is_translated = status == 'translated'
-        is_leaf = article.get('is_leaf', 1)
-        article_id = article.get('id')
-
-        if is_parent:
-            art_frame = ctk.CTkFrame(self.list_frame, fg_color=Colors.BG_CARD, corner_radius=Spacing.BUTTON_RADIUS)
-            art_frame.pack(fill="x", pady=(Spacing.SM, 1), padx=indent)
-
-            word_count = article.get('word_count', 0) or 0
-            ctk.CTkLabel(
-                art_frame, text=f"  📄 {article.get('subtitle', '')}",
-                font=Fonts.BODY_BOLD, text_color=Colors.TEXT_SECONDARY, anchor="w"
-            ).pack(side="left", padx=Spacing.SM, fill="x", expand=True)
-
-            right_frame = ctk.CTkFrame(art_frame, fg_color="transparent")
-            right_frame.pack(side="right", fill="y", padx=Spacing.SM)
-
-            ctk.CTkLabel(
-                right_frame, text=f"{word_count:,} từ (giới thiệu)",
-                text_color=Colors.TEXT_MUTED, font=Fonts.TINY
-            ).pack(side="left", padx=(Spacing.SM, Spacing.MD))
-
-            if is_translated:
-                ctk.CTkButton(
-                    right_frame, text="Biên tập", width=72, height=26,
-                    fg_color="transparent", border_width=1, border_color=Colors.SUCCESS,
-                    text_color=Colors.SUCCESS, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._open_dual_view(a)
-                ).pack(side="left", padx=2, pady=4)
-            elif word_count > 50:
-                ctk.CTkButton(
-                    right_frame, text="📥 Dịch Lưu trữ", width=110, height=26,
-                    fg_color=Colors.PRIMARY, text_color=Colors.TEXT_PRIMARY, hover_color=Colors.PRIMARY_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._translate_article(a)
-                ).pack(side="left", padx=2, pady=4)
+                    rows.append(self._article_row(article, 'leaf', Spacing.MD))
+
+        # Selection lives here for every checkbox row, not only those scrolled into view
+        default = self.select_all_var.get()
+        old_checks = self.article_checks
+        self.article_checks = {}
+        for row in rows:
+            if row['kind'] == 'leaf':
+                article_id = row['article'].get('id')
+                self.article_checks[article_id] = old_checks.get(article_id) or tk.BooleanVar(value=default)
+
+        self.list_frame.set_rows(rows)
+
+    @staticmethod
+    def _article_row(article: Dict, kind: str, indent: int) -> Dict:
+        return {'kind': kind, 'key': ('article', article.get('id')), 'article': article, 'indent': indent}
+
+    def _update_article(self, article_id: int) -> None:
+        """Refresh one article from the DB and re-bind only its row, its chapter header and the ETA."""
+        self.async_db.call(self, ('article', article_id), self.db_manager.get_article_summary, article_id,
+                           on_result=lambda fresh: self._on_article_loaded(article_id, fresh))
+
+    def _on_article_loaded(self, article_id: int, fresh: Dict) -> None:
+        article = self._articles_by_id.get(article_id)
+        if article is None or fresh is None:
+            self._render_content()  # Unknown article: fall back to a full reload
             return
+        article.update(fresh)  # Same dict is referenced by self.chapters (export, ETA)
+        if self.list_frame.winfo_exists():
+            self.list_frame.update_row(('article', article_id))
+            self.list_frame.update_row(('chapter', article.get('chapter_id')))
+        self._refresh_eta()
 
-        # Leaf article row
-        art_frame = ctk.CTkFrame(self.list_frame, fg_color=Colors.BG_APP, corner_radius=Spacing.BUTTON_RADIUS)
-        art_frame.pack(fill="x", pady=2, padx=indent)
-
-        status_color = Colors.SUCCESS if is_translated else Colors.TEXT_MUTED
-
-        # Checkbox
-        if article_id not in self.article_checks:
-            self.article_checks[article_id] = tk.BooleanVar(value=True)
-        ctk.CTkCheckBox(
-            art_frame, text="", variable=self.article_checks[article_id],
-            fg_color=Colors.PRIMARY, hover_color=Colors.PRIMARY_HOVER,
-            width=20, height=20, checkbox_width=16, checkbox_height=16
-        ).pack(side="left", padx=(Spacing.SM, 2))
-
-        # Status dot
-        canvas = ctk.CTkCanvas(art_frame, width=10, height=10, bg=Colors.BG_APP, highlightthickness=0)
-        canvas.create_oval(2, 2, 8, 8, fill=status_color)
-        canvas.pack(side="left", padx=(0, Spacing.SM))
-
-        # Right side
-        right_frame = ctk.CTkFrame(art_frame, fg_color="transparent")
-        right_frame.pack(side="right", fill="y", padx=Spacing.SM)
-
-        word_count = article.get('word_count', 0) or 0
-        translated_at = article.get('translated_at')
-        meta_str = f"{word_count:,} từ"
-        if translated_at:
-            meta_str += f" | {str(translated_at)[:10]}"
-        ctk.CTkLabel(right_frame, text=meta_str, text_color=Colors.TEXT_MUTED, font=Fonts.TINY).pack(
-            side="left", padx=(Spacing.SM, Spacing.MD)
-        )
-
-        ctk.CTkLabel(
-            art_frame, text=article.get('subtitle', 'No Subtitle'),
-            font=Fonts.BODY, text_color=Colors.TEXT_PRIMARY, anchor="w"
-        ).pack(side="left", padx=Spacing.SM, fill="x", expand=True)
-
-        if is_leaf:
-            if is_translated:
-                ctk.CTkButton(
-                    right_frame, text="Biên tập", width=72, height=26,
-                    fg_color="transparent", border_width=1, border_color=Colors.SUCCESS,
-                    text_color=Colors.SUCCESS, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._open_dual_view(a)
-                ).pack(side="left", padx=2, pady=4)
+    def _create_row(self, parent, kind: str):
+        if kind == 'chapter':
+            return _ChapterRow(parent)
+        if kind == 'parent':
+            return _ParentArticleRow(parent, self)
+        return _ArticleRow(parent, self)
 
-                engine = self.settings_manager.get("translation_engine", "cloud")
-                btn_state = "normal" if engine == "cloud" else "disabled"
-
-                has_web = bool(article.get('website_text'))
-                btn_web = ctk.CTkButton(
-                    right_frame, text="🌐", width=32, height=26, state=btn_state,
-                    fg_color=Colors.BG_CARD if has_web else "transparent",
-                    border_width=1, border_color=Colors.PRIMARY,
-                    text_color=Colors.PRIMARY, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._transform_article(a, 'website')
-                )
-                btn_web.pack(side="left", padx=2, pady=4)
-                ToolTip(btn_web, "Chuyển thành bài viết Website SEO")
-
-                has_fb = bool(article.get('facebook_text'))
-                btn_fb = ctk.CTkButton(
-                    right_frame, text="📱", width=32, height=26, state=btn_state,
-                    fg_color=Colors.BG_CARD if has_fb else "transparent",
-                    border_width=1, border_color=Colors.WARNING,
-                    text_color=Colors.WARNING, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._transform_article(a, 'facebook')
-                )
-                btn_fb.pack(side="left", padx=2, pady=4)
-                ToolTip(btn_fb, "Chuyển thành bài viết Facebook")
-
-                ctk.CTkButton(
-                    right_frame, text="🔄 Dịch Lại", width=80, height=26,
-                    fg_color="transparent", border_width=1, border_color=Colors.WARNING,
-                    text_color=Colors.WARNING, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._translate_article(a, force_retranslate=True)
-                ).pack(side="left", padx=2, pady=4)
-            else:
-                ctk.CTkButton(
-                    right_frame, text="📥 Dịch Lưu trữ", width=110, height=26,
-                    fg_color=Colors.PRIMARY, text_color=Colors.TEXT_PRIMARY, hover_color=Colors.PRIMARY_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._translate_article(a)
-                ).pack(side="left", padx=2, pady=4)
-
-                is_queued = self.queue_manager.is_queued(article_id)
-                q_text = "✖ Hủy Queue" if is_queued else "➕ Thêm Queue"
-                q_color = Colors.DANGER if is_queued else Colors.TEXT_MUTED
-                ctk.CTkButton(
-                    right_frame, text=q_text, width=90, height=26,
-                    fg_color="transparent", border_width=1, border_color=q_color,
-                    text_color=q_color, hover_color=Colors.BG_CARD_HOVER,
-                    font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
-                    command=lambda a=article: self._toggle_article_queue(a)
-                ).pack(side="left", padx=2, pady=4)
+    def _bind_row(self, widget, row: Dict) -> None:
+        if row['kind'] == 'chapter':
+            widget.bind_chapter(row['chapter'])
         else:
-            ctk.CTkLabel(right_frame, text="(Mục lục)", text_color=Colors.TEXT_MUTED, font=Fonts.TINY).pack(
-                side="left", padx=Spacing.MD, pady=2
-            )
+            widget.bind_article(row['article'])
 
     # ─────────────────────────────────────────────────────────────────
     # Export / Selection Methods
@@ -417,20 +319,35 @@ class BookDetailWindow(ctk.CTkToplevel):
         if not save_path:
             return
 
-        lines = []
+        # Pick the articles here; fetching their text and writing the file happen off the main thread
+        chapters = []
         for chapter in self.chapters:
-            chapter_articles = [a for a in chapter.get('articles', []) if a.get('id') in selected_ids and a.get('is_leaf', 1)]
-            if not chapter_articles:
-                continue
+            chapter_articles = [dict(a) for a in chapter.get('articles', []) if a.get('id') in selected_ids and a.get('is_leaf', 1)]
+            if chapter_articles:
+                chapters.append((chapter.get('title', 'Chapter'), chapter_articles))
+
+        self.lbl_export_status.configure(text="Đang xuất...", text_color=Colors.TEXT_MUTED)
+        self.async_db.call(
+            self, "export", self._write_export, chapters, fmt, save_path,
+            on_result=self._on_export_done,
+            on_error=self._on_export_failed,
+        )
 
+    def _write_export(self, chapters: List, fmt: str, save_path: str) -> int:
+        """Worker: loads the articles' text in one query and writes the export file."""
+        contents = self.db_manager.get_articles_content([a['id'] for _, arts in chapters for a in arts])
+        lines = []
+        count = 0
+        for chapter_title, chapter_articles in chapters:
             if fmt == "Markdown":
-                lines.append(f"# {chapter.get('title', 'Chapter')}\n")
+                lines.append(f"# {chapter_title}\n")
             elif fmt == "TXT":
-                lines.append(f"=== {chapter.get('title', 'Chapter')} ===\n")
+                lines.append(f"=== {chapter_title} ===\n")
 
             for art in chapter_articles:
+                count += 1
                 subtitle = art.get('subtitle', '')
-                content = self.db_manager.get_article_content(art['id']) or ''
+                content = contents.get(art['id'], '')
                 translation = art.get('translation_text', '') or ''
 
                 if fmt == "Markdown":
@@ -452,12 +369,16 @@ class BookDetailWindow(ctk.CTkToplevel):
                     if text:
                         lines.append(f"# {subtitle}\n\n{text}\n\n---\n")
 
-        try:
-            Path(save_path).write_text("\n".join(lines), encoding="utf-8")
-            self.lbl_export_status.configure(text=f"✓ Đã xuất {len(selected_ids)} bài", text_color=Colors.SUCCESS)
-            self.after(3000, lambda: self.lbl_export_status.configure(text=""))
-        except Exception as e:
-            show_error(self, "Lỗi xuất file", str(e))
+        Path(save_path).write_text("\n".join(lines), encoding="utf-8")
+        return count
+
+    def _on_export_done(self, count: int) -> None:
+        self.lbl_export_status.configure(text=f"✓ Đã xuất {count} bài", text_color=Colors.SUCCESS)
+        self.after(3000, lambda: self.lbl_export_status.configure(text=""))
+
+    def _on_export_failed(self, error: Exception) -> None:
+        self.lbl_export_status.configure(text="")
+        show_error(self, "Lỗi xuất file", str(error))
 
     # ─────────────────────────────────────────────────────────────────
     # Queue Control Methods
@@ -467,18 +388,26 @@ class BookDetailWindow(ctk.CTkToplevel):
         article_id = article.get('id')
         if self.queue_manager.is_queued(article_id):
             self.queue_manager.remove(article_id)
-        else:
-            content = self.db_manager.get_article_content(article_id) or ""
-            if not content:
-                show_warning(self, "Nội dung trống", "Bài viết này không có nội dung để dịch.")
-                return
-            self.queue_manager.enqueue(ChapterQueueItem(
-                article_id=article_id,
-                subtitle=article.get('subtitle', ''),
-                word_count=article.get('word_count', 0) or 0,
-                content=content,
-            ))
-        self._render_content()
+            self._on_queue_toggled(article_id)
+            return
+        # The article body is read on the pool; the item is enqueued once it arrives
+        self.async_db.call(self, ('enqueue', article_id), self.db_manager.get_article_content, article_id,
+                           on_result=lambda content: self._enqueue_article(article, content))
+
+    def _enqueue_article(self, article: Dict, content: Optional[str]) -> None:
+        if not content:
+            show_warning(self, "Nội dung trống", "Bài viết này không có nội dung để dịch.")
+            return
+        self.queue_manager.enqueue(ChapterQueueItem(
+            article_id=article.get('id'),
+            subtitle=article.get('subtitle', ''),
+            word_count=article.get('word_count', 0) or 0,
+            content=content,
+        ))
+        self._on_queue_toggled(article.get('id'))
+
+    def _on_queue_toggled(self, article_id: int) -> None:
+        self.list_frame.update_row(('article', article_id))
         self._update_queue_status_label()
 
     def _start_queue(self) -> None:
@@ -495,12 +424,18 @@ class BookDetailWindow(ctk.CTkToplevel):
 
     def _stop_queue(self) -> None:
         self.queue_manager.stop()
-        self._render_content()
+        self.list_frame.refresh_visible()  # Queue buttons of every row changed
+        self._update_queue_status_label()
+
+    def _on_queue_progress(self, message: str) -> None:
+        self._queue_progress_msg = message
         self._update_queue_status_label()
 
     def _on_queue_item_done(self, article_id: int, success: bool) -> None:
-        self._render_content()
-        self._refresh_eta()
+        self._queue_progress_msg = ""
+        if not self.winfo_exists():
+            return
+        self._update_article(article_id)
         self._update_queue_status_label()
 
     def _on_queue_done(self) -> None:
@@ -527,6 +462,15 @@ class BookDetailWindow(ctk.CTkToplevel):
         elif status == "running":
             pct = int(done / total * 100) if total > 0 else 0
             text = f"🖥️ Đang dịch bài {done + 1}/{total}  ({pct}% hoàn thành)"
+            if self._queue_progress_msg:
+                text += f"  •  {self._queue_progress_msg}"
+            stats = self.queue_manager.metrics_summary()
+            if stats["words_per_min"]:
+                text += f"  •  {stats['words_per_min']:.0f} từ/phút"
+            if stats["retries"]:
+                text += f"  •  {stats['retries']:.0f} lần thử lại"
+                if stats["retries_429"]:
+                    text += f" ({stats['retries_429']:.0f} do quota)"
         elif status == "paused":
             pct = int(done / total * 100) if total > 0 else 0
             text = f"⏸ Tạm dừng ({pct}% — {pending} bài còn lại)"
@@ -711,6 +655,7 @@ class BookDetailWindow(ctk.CTkToplevel):
                 translation_time = time.time() - start_time
                 if translation:
                     update_dynamic_wpm(self.settings_manager, engine, article.get('word_count', 0) or 0, translation_time)
+                    self.translation_service.throughput.save(self.settings_manager)
                 self.after(0, lambda: self._on_translation_complete(article_id, translation))
             except Exception as e:
                 print(f"[Translation Worker Error] {e}")
@@ -731,21 +676,28 @@ class BookDetailWindow(ctk.CTkToplevel):
         if translation:
             self.db_manager.update_article_translation(article_id, translation, 'translated')
             show_info(self, "Thành công", "Dịch thành công! Bản dịch đã được lưu.")
-            self._render_content()
-            self._refresh_eta()
+            self._update_article(article_id)
         else:
             show_error(self, "Lỗi", "Dịch thất bại. Vui lòng kiểm tra API Key và thử lại.")
 
     def _refresh_eta(self):
         if not self.winfo_exists() or not hasattr(self, 'lbl_eta') or not self.lbl_eta.winfo_exists():
             return
-        fresh_data = self.db_manager.get_book_details(self.book_id)
-        if not fresh_data:
-            return
+        # self.chapters is kept current by _update_article; no full reload needed
+        self.lbl_eta.configure(text=f"⏱ Ước tính dịch: {self._eta_text(self.chapters)}")
+
+    def _eta_text(self, chapters: List[Dict]) -> str:
+        """ETA from the learned per-chunk model, or the engine's WPM until it has data."""
         engine = self.settings_manager.get("translation_engine", "cloud")
         wpm = int(self.settings_manager.get(f"{engine}_llm_wpm", 6000 if engine == "cloud" else 180))
-        eta_text = calculate_book_eta(fresh_data.get('chapters', []), wpm=wpm, engine=engine)
-        self.lbl_eta.configure(text=f"⏱ Ước tính dịch: {eta_text}")
+        service = self.translation_service
+        return calculate_book_eta(
+            chapters, wpm=wpm, engine=engine,
+            throughput=getattr(service, "throughput", None),
+            model=service.eta_model_name(engine),
+            workers=getattr(self.queue_manager, "workers", 1),
+            chunk_workers=service.eta_chunk_workers(engine),
+        )
 
     # ─────────────────────────────────────────────────────────────────
     # Variant Transformation
@@ -787,7 +739,7 @@ class BookDetailWindow(ctk.CTkToplevel):
         if result:
             self.db_manager.update_article_variant(article_id, variant_type, result)
             show_info(self, "Thành công", f"Bản {label} đã được tạo và lưu!")
-            self._render_content()
+            self._update_article(article_id)
         else:
             show_error(self, "Lỗi", f"Chuyển thể {label} thất bại: {error}")
 
@@ -804,38 +756,233 @@ class BookDetailWindow(ctk.CTkToplevel):
 
     def _save_translation_update(self, article_id, new_text):
         self.db_manager.update_article_translation(article_id, new_text, 'translated')
-        self._render_content()
+        self._update_article(article_id)
 
     # ─────────────────────────────────────────────────────────────────
     # Webview
     # ─────────────────────────────────────────────────────────────────
 
     def _generate_and_open_webview(self):
-        try:
-            output_dir = get_user_data_dir() / "webviews" / str(self.book_id)
-            images_dir = output_dir / "images"
-            images_dir.mkdir(parents=True, exist_ok=True)
-
-            full_chapters = []
-            for chap_lite in self.chapters:
-                full_articles = []
-                for art_lite in chap_lite.get('articles', []):
-                    art_id = art_lite['id']
-                    content = self.db_manager.get_article_content(art_id)
-                    trans = art_lite.get('translation_text', '')
-                    for img in self.db_manager.get_article_images(art_id):
-                        src_path = Path(img['path'])
-                        if src_path.exists():
-                            dest = images_dir / src_path.name
-                            if not dest.exists():
-                                try:
-                                    shutil.copy2(src_path, dest)
-                                except Exception:
-                                    pass
-                    full_articles.append({'subtitle': art_lite.get('subtitle'), 'content_text': content, 'translation_text': trans})
-                full_chapters.append({'title': chap_lite.get('title'), 'articles': full_articles})
-
-            index_path = webview_generator.generate_webview(self.title(), "Author", full_chapters, output_dir)
-            webbrowser.open(index_path.resolve().as_uri())
-        except Exception as e:
-            show_error(self, "Lỗi Webview", f"Không thể tạo webview: {e}")
+        output_dir = get_user_data_dir() / "webviews" / str(self.book_id)
+        self.btn_webview.configure(state="disabled")
+        self.async_db.call(
+            self, "webview", self._build_webview, self.title(), output_dir,
+            on_result=self._on_webview_built,
+            on_error=self._on_webview_failed,
+        )
+
+    def _build_webview(self, title: str, output_dir: Path) -> Path:
+        """Worker: one bulk query, then the generator rewrites only shards/images that changed."""
+        full_chapters = self.db_manager.get_book_webview_data(self.book_id)
+        return webview_generator.generate_webview(title, "Author", full_chapters, output_dir)
+
+    def _on_webview_built(self, index_path: Path) -> None:
+        self.btn_webview.configure(state="normal")
+        webbrowser.open(index_path.resolve().as_uri())
+
+    def _on_webview_failed(self, error: Exception) -> None:
+        self.btn_webview.configure(state="normal")
+        show_error(self, "Lỗi Webview", f"Không thể tạo webview: {error}")
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Recyclable rows for the virtualized article list
+# ─────────────────────────────────────────────────────────────────────
+
+class _ChapterRow(ctk.CTkFrame):
+    """Chapter header: title + word count / translated progress."""
+
+    def __init__(self, master):
+        super().__init__(master, fg_color=Colors.BG_CARD_HOVER, corner_radius=Spacing.BUTTON_RADIUS)
+        self.lbl_title = ctk.CTkLabel(self, text="", font=Fonts.H3, text_color=Colors.TEXT_PRIMARY, anchor="w")
+        self.lbl_stats = ctk.CTkLabel(self, text="", font=Fonts.TINY, text_color=Colors.TEXT_MUTED)
+        self.lbl_stats.pack(side="right", padx=Spacing.MD, pady=Spacing.SM)
+        self.lbl_title.pack(side="left", fill="x", expand=True, padx=Spacing.MD, pady=Spacing.SM)
+
+    def bind_chapter(self, chapter: Dict) -> None:
+        all_articles = chapter.get('articles', [])
+        total_words = sum(a.get('word_count', 0) or 0 for a in all_articles)
+        total_translated = sum(1 for a in all_articles if a.get('status') == 'translated' and a.get('is_leaf', 1))
+        total_leaf = sum(1 for a in all_articles if a.get('is_leaf', 1))
+        progress_text = f"{total_translated}/{total_leaf}" if total_leaf > 0 else "0"
+        self.lbl_title.configure(text=f"📂 {chapter.get('title', 'Unknown Chapter')}")
+        self.lbl_stats.configure(text=f"{total_words:,} từ | {progress_text} đã dịch")
+
+
+class _ParentArticleRow(ctk.CTkFrame):
+    """Introductory text of a section that also has child articles."""
+
+    def __init__(self, master, window: "BookDetailWindow"):
+        super().__init__(master, fg_color=Colors.BG_CARD, corner_radius=Spacing.BUTTON_RADIUS)
+        self.window = window
+        self.article: Dict = {}
+
+        right_frame = ctk.CTkFrame(self, fg_color="transparent")
+        right_frame.pack(side="right", fill="y", padx=Spacing.SM)
+        self.lbl_subtitle = ctk.CTkLabel(
+            self, text="", font=Fonts.BODY_BOLD, text_color=Colors.TEXT_SECONDARY, anchor="w"
+        )
+        self.lbl_subtitle.pack(side="left", padx=Spacing.SM, fill="x", expand=True)
+
+        self.lbl_meta = ctk.CTkLabel(right_frame, text="", text_color=Colors.TEXT_MUTED, font=Fonts.TINY)
+        self.lbl_meta.pack(side="left", padx=(Spacing.SM, Spacing.MD))
+        self.btn_edit = ctk.CTkButton(
+            right_frame, text="Biên tập", width=72, height=26,
+            fg_color="transparent", border_width=1, border_color=Colors.SUCCESS,
+            text_color=Colors.SUCCESS, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._open_dual_view(self.article)
+        )
+        self.btn_translate = ctk.CTkButton(
+            right_frame, text="📥 Dịch Lưu trữ", width=110, height=26,
+            fg_color=Colors.PRIMARY, text_color=Colors.TEXT_PRIMARY, hover_color=Colors.PRIMARY_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._translate_article(self.article)
+        )
+
+    def bind_article(self, article: Dict) -> None:
+        self.article = article
+        word_count = article.get('word_count', 0) or 0
+        self.lbl_subtitle.configure(text=f"  📄 {article.get('subtitle', '')}")
+        self.lbl_meta.configure(text=f"{word_count:,} từ (giới thiệu)")
+        self.btn_edit.pack_forget()
+        self.btn_translate.pack_forget()
+        if article.get('status') == 'translated':
+            self.btn_edit.pack(side="left", padx=2, pady=4)
+        elif word_count > 50:
+            self.btn_translate.pack(side="left", padx=2, pady=4)
+
+
+class _ArticleRow(ctk.CTkFrame):
+    """
+    Leaf article row: checkbox, status dot, subtitle, metadata and actions.
+    All buttons are created once; binding only reconfigures and re-packs the
+    subset that applies to the article's current state.
+    """
+
+    def __init__(self, master, window: "BookDetailWindow"):
+        super().__init__(master, fg_color=Colors.BG_APP, corner_radius=Spacing.BUTTON_RADIUS)
+        self.window = window
+        self.article: Dict = {}
+        self._mode = None  # Which set of buttons is packed
+
+        self.checkbox = ctk.CTkCheckBox(
+            self, text="",
+            fg_color=Colors.PRIMARY, hover_color=Colors.PRIMARY_HOVER,
+            width=20, height=20, checkbox_width=16, checkbox_height=16
+        )
+        self.checkbox.pack(side="left", padx=(Spacing.SM, 2))
+
+        self.dot = ctk.CTkCanvas(self, width=10, height=10, bg=Colors.BG_APP, highlightthickness=0)
+        self.dot_id = self.dot.create_oval(2, 2, 8, 8, fill=Colors.TEXT_MUTED)
+        self.dot.pack(side="left", padx=(0, Spacing.SM))
+
+        self.right_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.right_frame.pack(side="right", fill="y", padx=Spacing.SM)
+        self.lbl_meta = ctk.CTkLabel(self.right_frame, text="", text_color=Colors.TEXT_MUTED, font=Fonts.TINY)
+        self.lbl_meta.pack(side="left", padx=(Spacing.SM, Spacing.MD))
+
+        self.lbl_subtitle = ctk.CTkLabel(
+            self, text="", font=Fonts.BODY, text_color=Colors.TEXT_PRIMARY, anchor="w"
+        )
+        self.lbl_subtitle.pack(side="left", padx=Spacing.SM, fill="x", expand=True)
+
+        frame = self.right_frame
+        self.btn_edit = ctk.CTkButton(
+            frame, text="Biên tập", width=72, height=26,
+            fg_color="transparent", border_width=1, border_color=Colors.SUCCESS,
+            text_color=Colors.SUCCESS, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._open_dual_view(self.article)
+        )
+        self.btn_web = ctk.CTkButton(
+            frame, text="🌐", width=32, height=26,
+            border_width=1, border_color=Colors.PRIMARY,
+            text_color=Colors.PRIMARY, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._transform_article(self.article, 'website')
+        )
+        ToolTip(self.btn_web, "Chuyển thành bài viết Website SEO")
+        self.btn_fb = ctk.CTkButton(
+            frame, text="📱", width=32, height=26,
+            border_width=1, border_color=Colors.WARNING,
+            text_color=Colors.WARNING, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._transform_article(self.article, 'facebook')
+        )
+        ToolTip(self.btn_fb, "Chuyển thành bài viết Facebook")
+        self.btn_retranslate = ctk.CTkButton(
+            frame, text="🔄 Dịch Lại", width=80, height=26,
+            fg_color="transparent", border_width=1, border_color=Colors.WARNING,
+            text_color=Colors.WARNING, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._translate_article(self.article, force_retranslate=True)
+        )
+        self.btn_translate = ctk.CTkButton(
+            frame, text="📥 Dịch Lưu trữ", width=110, height=26,
+            fg_color=Colors.PRIMARY, text_color=Colors.TEXT_PRIMARY, hover_color=Colors.PRIMARY_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._translate_article(self.article)
+        )
+        self.btn_queue = ctk.CTkButton(
+            frame, text="➕ Thêm Queue", width=90, height=26,
+            fg_color="transparent", border_width=1, border_color=Colors.TEXT_MUTED,
+            text_color=Colors.TEXT_MUTED, hover_color=Colors.BG_CARD_HOVER,
+            font=Fonts.SMALL, corner_radius=Spacing.BUTTON_RADIUS,
+            command=lambda: self.window._toggle_article_queue(self.article)
+        )
+        self.lbl_toc = ctk.CTkLabel(frame, text="(Mục lục)", text_color=Colors.TEXT_MUTED, font=Fonts.TINY)
+
+        self._buttons = {
+            'translated': [self.btn_edit, self.btn_web, self.btn_fb, self.btn_retranslate],
+            'new': [self.btn_translate, self.btn_queue],
+            'toc': [self.lbl_toc],
+        }
+
+    def bind_article(self, article: Dict) -> None:
+        self.article = article
+        article_id = article.get('id')
+        is_translated = article.get('status', 'new') == 'translated'
+
+        self.checkbox.configure(variable=self.window.article_checks[article_id])
+        self.dot.itemconfigure(self.dot_id, fill=Colors.SUCCESS if is_translated else Colors.TEXT_MUTED)
+
+        word_count = article.get('word_count', 0) or 0
+        translated_at = article.get('translated_at')
+        meta_str = f"{word_count:,} từ"
+        if translated_at:
+            meta_str += f" | {str(translated_at)[:10]}"
+        self.lbl_meta.configure(text=meta_str)
+        self.lbl_subtitle.configure(text=article.get('subtitle', 'No Subtitle'))
+
+        if not article.get('is_leaf', 1):
+            mode = 'toc'
+        else:
+            mode = 'translated' if is_translated else 'new'
+        if mode != self._mode:
+            for widgets in self._buttons.values():
+                for widget in widgets:
+                    widget.pack_forget()
+            for widget in self._buttons[mode]:
+                if widget is self.lbl_toc:
+                    widget.pack(side="left", padx=Spacing.MD, pady=2)
+                else:
+                    widget.pack(side="left", padx=2, pady=4)
+            self._mode = mode
+
+        if mode == 'translated':
+            engine = self.window.settings_manager.get("translation_engine", "cloud")
+            btn_state = "normal" if engine == "cloud" else "disabled"
+            self.btn_web.configure(
+                state=btn_state, fg_color=Colors.BG_CARD if article.get('website_text') else "transparent"
+            )
+            self.btn_fb.configure(
+                state=btn_state, fg_color=Colors.BG_CARD if article.get('facebook_text') else "transparent"
+            )
+        elif mode == 'new':
+            is_queued = self.window.queue_manager.is_queued(article_id)
+            q_color = Colors.DANGER if is_queued else Colors.TEXT_MUTED
+            self.btn_queue.configure(
+                text="✖ Hủy Queue" if is_queued else "➕ Thêm Queue",
+                border_color=q_color, text_color=q_color,
+            )
@@ -1,17 +1,18 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/modules/ui/library_view.py
-# Version: 2.0.0 (Phase 3B refactor)
+# Version: 2.1.0
 # Author: Antigravity
 # Description: Displays the Library of extracted books with search and management.
 #              BookDetailWindow has been extracted to book_detail_window.py.
+#              The grid is virtualized (cards recycled per row) and covers come
+#              from the persistent thumbnail cache. Database reads run off the
+#              main thread through AsyncDB.
 # --------------------------------------------------------------------------------
 
 import tkinter as tk
 from typing import Callable, List, Dict, Any
 import customtkinter as ctk
-from PIL import Image, ImageOps, ImageTk
-from pathlib import Path
 from .custom_dialog import ask_yes_no, show_info, show_warning, show_error
 from ...core import webview_generator
 import os
@@ -20,18 +21,32 @@ import shutil
 import datetime
 import threading
 import time
+import concurrent.futures
 from .theme import Colors, Fonts, Spacing
 from .editor_view import DualViewEditor
 from .tooltip import ToolTip
 from ...core.eta_calculator import calculate_book_eta, update_dynamic_wpm
 from ...core.queue_manager import ChapterQueueManager, ChapterQueueItem, QueueStatus
+from ...core.thumbnail_cache import get_thumbnail_cache
 from .book_detail_window import BookDetailWindow  # noqa: F401 — re-exported
+from .virtual_list import VirtualList
+from .async_db import AsyncDB
+
+CARD_WIDTH, CARD_HEIGHT = 220, 385
+SEARCH_DEBOUNCE_MS = 250
+
+# Creates missing cover thumbnails (full decode + resize) off the Tk thread
+_THUMBNAIL_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="Thumbnail")
 
 class BookCard(ctk.CTkFrame):
     """
     A card widget representing a single book in the grid (Dark Navy theme).
+    Cards are recycled by the virtualized grid: `bind_book` refills one in place.
     """
-    def __init__(self, master, book_data: Dict, on_click: Callable[[int], None], on_delete: Callable[[int], None], **kwargs):
+    COVER_SIZE = (200, 220)
+
+    def __init__(self, master, book_data: Dict = None, on_click: Callable[[int], None] = None,
+                 on_delete: Callable[[int], None] = None, **kwargs):
         super().__init__(
             master, 
             fg_color=Colors.BG_CARD, 
@@ -40,20 +55,14 @@ class BookCard(ctk.CTkFrame):
             border_color=Colors.BORDER,
             **kwargs
         )
-        self.book_data = book_data
+        self.book_data = None
+        self.item_id = None
         self.on_click = on_click
         self.on_delete = on_delete
-        
-        self.item_id = book_data['id']
-        full_title = book_data.get('title', 'Unknown Title')
-        author = book_data.get('author', 'Unknown Author')
-        cover_path = book_data.get('cover_path', '')
-        published_year = book_data.get('published_year', '')
-        category = book_data.get('category', '')
-        added_date = book_data.get('added_date', '')
+        self._cover_key = None
         
         # Fixed card size
-        self.configure(width=220, height=385)
+        self.configure(width=CARD_WIDTH, height=CARD_HEIGHT)
         self.pack_propagate(False)
         
         # Hover Effect Triggers
@@ -61,109 +70,66 @@ class BookCard(ctk.CTkFrame):
         self.bind("<Leave>", self._on_leave)
         
         # ===== PACK LAYOUT (top to bottom) =====
+        cover_w, cover_h = self.COVER_SIZE
         
-        # 1. Cover Image
+        # 1. Cover Image (placeholder text shown when there is no cover)
         self.cover_image = None
-        cover_w, cover_h = 200, 220
-        if cover_path and Path(cover_path).exists():
-            try:
-                img = Image.open(cover_path)
-                img = ImageOps.fit(img, (cover_w * 2, cover_h * 2), method=Image.LANCZOS)
-                self.cover_image = ctk.CTkImage(light_image=img, dark_image=img, size=(cover_w, cover_h))
-            except Exception as e:
-                print(f"Error loading cover: {e}")
-        
-        if self.cover_image:
-            self.lbl_cover = ctk.CTkLabel(self, text="", image=self.cover_image, width=cover_w, height=cover_h)
-        else:
-            self.lbl_cover = ctk.CTkLabel(
-                self, text="📚\nNo Cover", 
-                font=Fonts.H3,
-                fg_color=Colors.BG_APP,
-                text_color=Colors.TEXT_MUTED,
-                corner_radius=10,
-                width=cover_w, height=cover_h
-            )
-            
+        self.lbl_cover = ctk.CTkLabel(
+            self, text="📚\nNo Cover", 
+            font=Fonts.H3,
+            fg_color=Colors.BG_APP,
+            text_color=Colors.TEXT_MUTED,
+            corner_radius=10,
+            width=cover_w, height=cover_h
+        )
         self.lbl_cover.pack(side="top", pady=(8, 4), padx=10)
         self._bind_click(self.lbl_cover)
         
         # 2. Title (truncated, max 2 lines)
-        display_title = full_title
-        if len(display_title) > 42:
-            display_title = display_title[:39] + "..."
-            
         self.title_label = ctk.CTkLabel(
-            self, text=display_title, font=Fonts.BODY_BOLD, 
+            self, text="", font=Fonts.BODY_BOLD, 
             text_color=Colors.TEXT_PRIMARY,
             anchor="center", justify="center", wraplength=190
         )
         self.title_label.pack(side="top", fill="x", padx=8, pady=(0, 2))
         self._bind_click(self.title_label)
         
-        # Tooltip for full title
-        if len(full_title) > 42:
-             ToolTip(self.title_label, full_title)
+        # Tooltip for full title (empty text = no tooltip)
+        self.title_tooltip = ToolTip(self.title_label, "")
         
         # 3. Author & Year
-        author_text = author
-        if published_year:
-             author_text = f"{author} • {published_year}"
-             
         self.author_label = ctk.CTkLabel(
-            self, text=author_text, font=Fonts.SMALL,
+            self, text="", font=Fonts.SMALL,
             text_color=Colors.TEXT_MUTED
         )
         self.author_label.pack(side="top", fill="x", padx=8, pady=(0, 2))
         self._bind_click(self.author_label)
 
-        # 4. Category tag (if present)
-        if category:
-            lbl_cat = ctk.CTkLabel(
-                self, text=category, font=Fonts.TINY,
-                fg_color=Colors.BG_APP, text_color=Colors.PRIMARY,
-                corner_radius=4, padx=6, pady=2
-            )
-            lbl_cat.pack(side="top", pady=(0, 2))
+        # 4. Category tag (packed only if present)
+        self.category_label = ctk.CTkLabel(
+            self, text="", font=Fonts.TINY,
+            fg_color=Colors.BG_APP, text_color=Colors.PRIMARY,
+            corner_radius=4, padx=6, pady=2
+        )
 
-        # 5. Added date (relative time)
-        if added_date:
-            date_display = self._format_relative_date(added_date)
-            self.date_label = ctk.CTkLabel(
-                self, text=f"📅 {date_display}", font=Fonts.TINY,
-                text_color=Colors.TEXT_MUTED
-            )
-            self.date_label.pack(side="top", pady=(0, 2))
+        # 5. Added date (relative time, packed only if present)
+        self.date_label = ctk.CTkLabel(
+            self, text="", font=Fonts.TINY,
+            text_color=Colors.TEXT_MUTED
+        )
 
         # 5b. Translation Progress Bar
-        total_leaf = book_data.get('total_leaf', 0) or 0
-        translated_count = book_data.get('translated_count', 0) or 0
-        
-        progress_frame = ctk.CTkFrame(self, fg_color="transparent")
-        progress_frame.pack(side="top", fill="x", padx=10, pady=(0, 4))
-        
-        if total_leaf > 0:
-            ratio = translated_count / total_leaf
-            bar_color = Colors.SUCCESS if ratio >= 1.0 else Colors.PRIMARY
-            prog_bar = ctk.CTkProgressBar(
-                progress_frame, width=180, height=6,
-                fg_color=Colors.BG_APP, progress_color=bar_color,
-                corner_radius=3
-            )
-            prog_bar.set(ratio)
-            prog_bar.pack(side="top")
-            
-            prog_text = f"{translated_count}/{total_leaf} bài đã dịch"
-            lbl_prog = ctk.CTkLabel(
-                progress_frame, text=prog_text, font=Fonts.TINY,
-                text_color=bar_color if ratio >= 1.0 else Colors.TEXT_MUTED
-            )
-            lbl_prog.pack(side="top")
-        else:
-            ctk.CTkLabel(
-                progress_frame, text="Chưa có nội dung", font=Fonts.TINY,
-                text_color=Colors.TEXT_MUTED
-            ).pack(side="top")
+        self.progress_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.progress_frame.pack(side="top", fill="x", padx=10, pady=(0, 4))
+        self.prog_bar = ctk.CTkProgressBar(
+            self.progress_frame, width=180, height=6,
+            fg_color=Colors.BG_APP, progress_color=Colors.PRIMARY,
+            corner_radius=3
+        )
+        self.lbl_prog = ctk.CTkLabel(
+            self.progress_frame, text="", font=Fonts.TINY,
+            text_color=Colors.TEXT_MUTED
+        )
 
         # 6. Delete Button (hidden by default, positioned top-right on hover)
         self.btn_delete = ctk.CTkButton(
@@ -176,6 +142,92 @@ class BookCard(ctk.CTkFrame):
         self.btn_delete.bind("<Enter>", self._on_enter)
         self.btn_delete.bind("<Leave>", self._on_leave)
 
+        if book_data is not None:
+            self.bind_book(book_data)
+
+    def bind_book(self, book_data: Dict) -> None:
+        """Fills the card with *book_data* (a row from get_all_books/search_books)."""
+        self.book_data = book_data
+        self.item_id = book_data['id']
+        full_title = book_data.get('title', 'Unknown Title')
+        author = book_data.get('author', 'Unknown Author')
+        published_year = book_data.get('published_year', '')
+        category = book_data.get('category', '')
+        added_date = book_data.get('added_date', '')
+
+        self._bind_cover(book_data.get('cover_path', ''))
+
+        display_title = full_title
+        if len(display_title) > 42:
+            display_title = display_title[:39] + "..."
+        self.title_label.configure(text=display_title)
+        self.title_tooltip.text = full_title if len(full_title) > 42 else ""
+
+        author_text = author
+        if published_year:
+             author_text = f"{author} • {published_year}"
+        self.author_label.configure(text=author_text)
+
+        if category:
+            self.category_label.configure(text=category)
+            self.category_label.pack(side="top", pady=(0, 2), after=self.author_label)
+        else:
+            self.category_label.pack_forget()
+
+        if added_date:
+            self.date_label.configure(text=f"📅 {self._format_relative_date(added_date)}")
+            self.date_label.pack(side="top", pady=(0, 2), before=self.progress_frame)
+        else:
+            self.date_label.pack_forget()
+
+        total_leaf = book_data.get('total_leaf', 0) or 0
+        translated_count = book_data.get('translated_count', 0) or 0
+        if total_leaf > 0:
+            ratio = translated_count / total_leaf
+            bar_color = Colors.SUCCESS if ratio >= 1.0 else Colors.PRIMARY
+            self.prog_bar.configure(progress_color=bar_color)
+            self.prog_bar.set(ratio)
+            if self.lbl_prog.winfo_manager():
+                self.prog_bar.pack(side="top", before=self.lbl_prog)
+            else:
+                self.prog_bar.pack(side="top")
+            self.lbl_prog.configure(
+                text=f"{translated_count}/{total_leaf} bài đã dịch",
+                text_color=bar_color if ratio >= 1.0 else Colors.TEXT_MUTED
+            )
+        else:
+            self.prog_bar.pack_forget()
+            self.lbl_prog.configure(text="Chưa có nội dung", text_color=Colors.TEXT_MUTED)
+        if not self.lbl_prog.winfo_manager():
+            self.lbl_prog.pack(side="top")
+
+        self._on_leave()
+
+    def _bind_cover(self, cover_path: str) -> None:
+        """Shows the cached thumbnail for *cover_path* (or the placeholder)."""
+        cache = get_thumbnail_cache()
+        key = cache.key_for(cover_path) if cover_path else None
+        if key is not None and key == self._cover_key:
+            return  # Same cover still shown
+        self._cover_key = key
+        thumb = cache.get(cover_path, create=False) if key else None
+        self._show_cover(thumb)
+        if key is not None and thumb is None:
+            # Cache miss: build the thumbnail on a worker, show it if the card still holds this cover
+            def build():
+                image = cache.get(cover_path)
+                if image is not None:
+                    self.after(0, lambda: self._cover_key == key and self.winfo_exists() and self._show_cover(image))
+            _THUMBNAIL_POOL.submit(build)
+
+    def _show_cover(self, thumb) -> None:
+        if thumb is not None:
+            self.cover_image = ctk.CTkImage(light_image=thumb, dark_image=thumb, size=self.COVER_SIZE)
+            self.lbl_cover.configure(image=self.cover_image, text="", fg_color="transparent")
+        else:
+            self.cover_image = None
+            self.lbl_cover.configure(image=None, text="📚\nNo Cover", fg_color=Colors.BG_APP)
+
     def _bind_click(self, widget):
         widget.bind("<Button-1>", self._handle_click_event)
         widget.bind("<Enter>", self._on_enter)
@@ -190,7 +242,7 @@ class BookCard(ctk.CTkFrame):
         self.btn_delete.place_forget()
 
     def _handle_click_event(self, event=None):
-        if self.on_click:
+        if self.on_click and self.item_id is not None:
             self.on_click(self.item_id)
 
     @staticmethod
@@ -213,22 +265,50 @@ class BookCard(ctk.CTkFrame):
             return date_str[:10] if len(date_str) >= 10 else date_str
             
     def _handle_delete(self):
-        if self.on_delete:
+        if self.on_delete and self.item_id is not None:
             self.on_delete(self.item_id)
 
 
+class _CardRow(ctk.CTkFrame):
+    """One grid row of BookCards; cards are created on demand and reused."""
+
+    def __init__(self, master, on_click, on_delete):
+        super().__init__(master, fg_color="transparent", corner_radius=0)
+        self.on_click = on_click
+        self.on_delete = on_delete
+        self.cards: List[BookCard] = []
+
+    def bind_books(self, books: List[Dict], cols: int) -> None:
+        while len(self.cards) < cols:
+            card = BookCard(self, on_click=self.on_click, on_delete=self.on_delete)
+            self.cards.append(card)
+        for col in range(len(self.cards)):
+            self.grid_columnconfigure(col, weight=1 if col < cols else 0, uniform="card" if col < cols else "")
+        for col, card in enumerate(self.cards):
+            if col < len(books):
+                card.bind_book(books[col])
+                card.grid(row=0, column=col, sticky="n", padx=Spacing.MD, pady=Spacing.MD)
+            else:
+                card.grid_remove()
+
+
 class LibraryView(ctk.CTkFrame):
     """
     The main view for the Library tab (Dark Navy).
     Displays a grid of books and a detail view.
     """
+    ROW_HEIGHT = CARD_HEIGHT + 2 * Spacing.MD
+
     def __init__(self, master, db_manager, settings_manager, translation_service, **kwargs):
         super().__init__(master, fg_color="transparent", **kwargs)
         self.db_manager = db_manager
         self.settings_manager = settings_manager
         self.translation_service = translation_service
         
+        self.async_db = AsyncDB(db_manager)
         self.books: List[Dict] = []
+        self.cols = 4
+        self._search_job = None
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -259,67 +339,97 @@ class LibraryView(ctk.CTkFrame):
         )
         self.btn_refresh.pack(side="right", padx=Spacing.XL)
         
-        # 2. Content Area (Scrollable Grid)
-        self.scroll_frame = ctk.CTkScrollableFrame(
-            self, fg_color="transparent",
-            scrollbar_button_color=Colors.BORDER,
-            scrollbar_button_hover_color=Colors.TEXT_MUTED
+        # 2. Content Area (virtualized grid: one list row per row of cards)
+        self.grid_list = VirtualList(
+            self,
+            row_heights={"cards": self.ROW_HEIGHT},
+            create_row=lambda parent, kind: _CardRow(parent, self._open_book_detail, self._delete_book),
+            bind_row=lambda widget, row: widget.bind_books(row['books'], self.cols),
+            row_gap=0,
+            fg_color="transparent",
+        )
+        self.grid_list.grid(row=1, column=0, sticky="nsew")
+        self.grid_list.viewport.bind("<Configure>", self._on_grid_resize, add="+")
+
+        self.lbl_empty = ctk.CTkLabel(
+            self, text="Không tìm thấy sách nào trong thư viện.",
+            text_color=Colors.TEXT_MUTED, font=Fonts.BODY
         )
-        self.scroll_frame.grid(row=1, column=0, sticky="nsew")
-        self.scroll_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
 
+        self._thumbnails_pruned = False
         self.refresh_library()
 
     def refresh_library(self):
+        """Reloads the book list off the main thread; a newer refresh supersedes a pending one."""
         query = self.search_var.get()
         if query:
-            self.books = self.db_manager.search_books(query)
+            self.async_db.call(self, "books", self.db_manager.search_books, query, on_result=self._on_books_loaded)
         else:
-            self.books = self.db_manager.get_all_books()
-            
+            self.async_db.call(self, "books", self.db_manager.get_all_books, on_result=self._on_books_loaded)
+
+    def _on_books_loaded(self, books: List[Dict]):
+        self.books = books
         self._render_books()
+        if not self._thumbnails_pruned and not self.search_var.get():
+            self._thumbnails_pruned = True
+            self._prune_thumbnails()
+
+    def cancel_pending(self):
+        """Drops pending loads (e.g. when another view is shown)."""
+        self.async_db.cancel(self)
 
     def _on_search_change(self, *args):
+        # Debounced: query once typing pauses instead of on every keystroke
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
         self.refresh_library()
 
+    def _on_grid_resize(self, event=None):
+        cols = max(1, self.grid_list.viewport.winfo_width() // (CARD_WIDTH + 2 * Spacing.MD))
+        if cols != self.cols:
+            self.cols = cols
+            self._render_books()
+
     def _render_books(self):
-        # Clear existing
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
-            
         if not self.books:
-            lbl = ctk.CTkLabel(
-                self.scroll_frame, text="Không tìm thấy sách nào trong thư viện.",
-                text_color=Colors.TEXT_MUTED, font=Fonts.BODY
-            )
-            lbl.pack(pady=50)
+            self.grid_list.set_rows([])
+            self.lbl_empty.place(relx=0.5, y=100, anchor="n")
             return
+        self.lbl_empty.place_forget()
 
-        # Render Grid (4 columns)
-        cols = 4
-        for i, book in enumerate(self.books):
-            row = i // cols
-            col = i % cols
-            
-            card = BookCard(
-                self.scroll_frame, 
-                book_data=book, 
-                on_click=self._open_book_detail,
-                on_delete=self._delete_book
-            )
-            card.grid(row=row, column=col, sticky="n", padx=Spacing.MD, pady=Spacing.MD)
+        # Only the rows in view get (recycled) cards
+        rows = [
+            {"kind": "cards", "books": self.books[i:i + self.cols]}
+            for i in range(0, len(self.books), self.cols)
+        ]
+        self.grid_list.set_rows(rows)
+
+    def _prune_thumbnails(self):
+        """Drops cached thumbnails of covers no longer in the library (background)."""
+        cover_paths = [b.get('cover_path') for b in self.books]
+        threading.Thread(
+            target=get_thumbnail_cache().prune, args=(cover_paths,), daemon=True
+        ).start()
 
     def _delete_book(self, book_id: int):
         if ask_yes_no(self, "Xác nhận xóa", "Bạn có chắc muốn xóa sách này khỏi thư viện?\n(File gốc vẫn được giữ nguyên)", is_danger=True):
-            self.db_manager.delete_book(book_id)
-            self.refresh_library()
+            self.async_db.call(self, ("delete", book_id), self.db_manager.delete_book, book_id,
+                               on_result=lambda _: self.refresh_library())
 
     def _open_book_detail(self, book_id: int):
-        book_details = self.db_manager.get_book_details(book_id)
+        # Clicking another book before this one loads supersedes it
+        self.async_db.call(self, "open_book", self.db_manager.get_book_details, book_id,
+                           on_result=self._show_book_detail)
+
+    def _show_book_detail(self, book_details: Dict):
         if not book_details:
             return
-            
-        BookDetailWindow(self, book_details, self.translation_service, self.db_manager, self.settings_manager)
+        BookDetailWindow(self, book_details, self.translation_service, self.db_manager, self.settings_manager,
+                         async_db=self.async_db)
 
     def _open_settings(self):
         from .settings_window import SettingsWindow
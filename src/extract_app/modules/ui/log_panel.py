@@ -1,14 +1,20 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/modules/ui/log_panel.py
-# Version: 2.0.0
+# Version: 2.1.0
 # Description: Themed log panel with Dark Navy style.
+#              Follows debug_logger's ring buffer at a fixed frame rate and
+#              inserts each batch of new lines at once.
 # --------------------------------------------------------------------------------
 
 import tkinter as tk
 from datetime import datetime
 import customtkinter as ctk
 from .theme import Colors, Fonts, Spacing
+from ...shared import debug_logger
+
+FOLLOW_INTERVAL_MS = 66  # ~15 UI updates per second, however fast lines arrive
+MAX_LINES = 2000  # Older lines are trimmed from the textbox
 
 class LogPanel(ctk.CTkFrame):
     """A panel for displaying application logs."""
@@ -52,9 +58,31 @@ class LogPanel(ctk.CTkFrame):
 
     def write_log(self, message: str):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
+        self._append(f"[{timestamp}] {message}\n")
+
+    def follow_logger(self, interval_ms: int = FOLLOW_INTERVAL_MS):
+        """Polls debug_logger for new records and shows them in one insert per frame."""
+        self._log_seq, _ = debug_logger.get_since(0)
+        self._follow_interval = interval_ms
+        self._poll_logger()
+
+    def _poll_logger(self):
+        if not self.winfo_exists():
+            return
+        self._log_seq, records = debug_logger.get_since(self._log_seq)
+        if records:
+            self._append("".join(
+                f"[{datetime.fromtimestamp(created).strftime('%H:%M:%S')}] {message}\n"
+                for _, created, _, message in records
+            ))
+        self.after(self._follow_interval, self._poll_logger)
+
+    def _append(self, text: str):
         self.log_text.configure(state="normal")
-        self.log_text.insert("end", formatted_message)
+        self.log_text.insert("end", text)
+        lines = int(self.log_text.index("end-1c").split(".")[0])
+        if lines > MAX_LINES:
+            self.log_text.delete("1.0", f"{lines - MAX_LINES}.0")
         self.log_text.see("end")
         self.log_text.configure(state="disabled")
 
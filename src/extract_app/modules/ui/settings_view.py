@@ -334,12 +334,17 @@ class SettingsView(ctk.CTkFrame):
                  self.status_label.configure(text="✗ Chưa chọn file model", text_color=Colors.DANGER)
                  return
             try:
-                from ...core.local_genai import LocalGenAI
+                from ...core.local_genai import LocalGenAI, LoadProfile, draft_spec_from_settings
                 self.status_label.configure(text="⏳ Đang load model vào GPU...", text_color=Colors.WARNING)
                 self.update()
                 
                 gpu_layers = int(self.gpu_layers_var.get())
-                LocalGenAI.get_instance().load_model(model_path, n_gpu_layers=gpu_layers)
+                draft_model, draft_tokens = draft_spec_from_settings(self.settings_manager)
+                LocalGenAI.get_instance().load_model(
+                    model_path, n_gpu_layers=gpu_layers,
+                    draft_model=draft_model, draft_tokens=draft_tokens,
+                    profile=LoadProfile.from_settings(self.settings_manager),
+                )
                 
                 self.status_label.configure(text="✓ Model Loaded Ready!", text_color=Colors.SUCCESS)
             except Exception as e:
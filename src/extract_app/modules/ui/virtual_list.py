@@ -0,0 +1,230 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/modules/ui/virtual_list.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: VirtualList — scrollable list that only creates widgets for the
+#              rows in view and recycles them while scrolling.
+# --------------------------------------------------------------------------------
+
+import bisect
+import weakref
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import customtkinter as ctk
+
+from .theme import Colors
+
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Fixed-height-per-kind virtualized list.
+
+    Rows are plain dicts with a 'kind' (and optional 'indent' in px). Widgets are
+    created per kind by `create_row` only when a row of that kind scrolls into
+    view, filled by `bind_row`, and returned to a pool when they scroll out.
+    A widget that stays in view is only re-placed, not re-bound.
+
+    Args:
+        master:      Parent widget.
+        row_heights: Pixel height per row kind (includes `row_gap`).
+        create_row:  Callback(parent, kind) -> widget.
+        bind_row:    Callback(widget, row) filling a widget with a row's data.
+        row_key:     Callback(row) -> key used by `update_row` (optional).
+        row_gap:     Vertical space between rows.
+    """
+
+    WHEEL_STEP = 60  # px per mouse-wheel notch
+
+    # bind_all handlers cannot be removed one by one, so all lists share a single
+    # global wheel binding that dispatches to the live list under the pointer.
+    _instances: "weakref.WeakSet[VirtualList]" = weakref.WeakSet()
+    _wheel_root = None
+
+    def __init__(
+        self,
+        master,
+        row_heights: Dict[str, int],
+        create_row: Callable[[Any, str], Any],
+        bind_row: Callable[[Any, Dict], None],
+        row_key: Optional[Callable[[Dict], Hashable]] = None,
+        row_gap: int = 4,
+        **kwargs,
+    ):
+        super().__init__(master, **kwargs)
+        self.row_heights = row_heights
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_key = row_key
+        self.row_gap = row_gap
+
+        self._rows: List[Dict] = []
+        self._offsets: List[int] = [0]           # _offsets[i] = y of row i; last = total height
+        self._index_by_key: Dict[Hashable, int] = {}
+        self._top = 0                            # Scroll position in px
+        self._visible: Dict[int, Any] = {}       # row index -> widget
+        self._pool: Dict[str, List[Any]] = {}    # kind -> idle widgets
+
+        self.scrollbar = ctk.CTkScrollbar(
+            self, command=self._on_scrollbar,
+            button_color=Colors.BORDER, button_hover_color=Colors.TEXT_MUTED
+        )
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self._layout())
+
+        VirtualList._instances.add(self)
+        if VirtualList._wheel_root is not self._root():
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.bind_all(sequence, VirtualList._dispatch_wheel, add="+")
+            VirtualList._wheel_root = self._root()
+
+    def destroy(self):
+        VirtualList._instances.discard(self)
+        super().destroy()
+
+    # ─────────────────────────────────────────────────────────────────
+    # Public API
+    # ─────────────────────────────────────────────────────────────────
+
+    def set_rows(self, rows: List[Dict]) -> None:
+        """Replaces all rows, keeping the scroll position where possible."""
+        for index in list(self._visible):
+            self._release(index)
+        self._rows = list(rows)
+        self._index_by_key = {}
+        self._offsets = [0]
+        for index, row in enumerate(self._rows):
+            self._offsets.append(self._offsets[-1] + self.row_heights[row['kind']])
+            if self.row_key:
+                self._index_by_key[self.row_key(row)] = index
+        self._layout()
+
+    def update_row(self, key: Hashable, row: Optional[Dict] = None) -> bool:
+        """
+        Re-binds the row with `key` in place (replacing its dict if given).
+        Off-screen rows cost nothing; they pick up the change when scrolled to.
+
+        Returns:
+            False if no row has that key.
+        """
+        index = self._index_by_key.get(key)
+        if index is None:
+            return False
+        if row is not None:
+            if row['kind'] != self._rows[index]['kind']:
+                if index in self._visible:
+                    self._release(index)  # Pool the widget under its old kind
+                self._rows[index] = row
+                self.set_rows(self._rows)  # Height may change: recompute offsets
+                return True
+            self._rows[index] = row
+        widget = self._visible.get(index)
+        if widget is not None:
+            self.bind_row(widget, self._rows[index])
+        return True
+
+    def refresh_visible(self) -> None:
+        """Re-binds the rows currently on screen (e.g. after a state change many rows share)."""
+        for index, widget in self._visible.items():
+            self.bind_row(widget, self._rows[index])
+
+    def scroll_to(self, key: Hashable) -> None:
+        index = self._index_by_key.get(key)
+        if index is not None:
+            self._top = self._offsets[index]
+            self._layout()
+
+    # ─────────────────────────────────────────────────────────────────
+    # Layout
+    # ─────────────────────────────────────────────────────────────────
+
+    def _layout(self) -> None:
+        if not self.viewport.winfo_exists():
+            return
+        height = max(self.viewport.winfo_height(), 1)
+        total = self._offsets[-1]
+        self._top = max(0, min(self._top, total - height))
+
+        first = max(bisect.bisect_right(self._offsets, self._top) - 1, 0)
+        needed = []
+        index = first
+        while index < len(self._rows) and self._offsets[index] < self._top + height:
+            needed.append(index)
+            index += 1
+
+        for index in [i for i in self._visible if i not in set(needed)]:
+            self._release(index)
+
+        for index in needed:
+            row = self._rows[index]
+            widget = self._visible.get(index)
+            if widget is None:
+                widget = self._acquire(row['kind'])
+                self.bind_row(widget, row)
+                self._visible[index] = widget
+            indent = row.get('indent', 0)
+            widget.place(
+                x=indent, y=self._offsets[index] - self._top,
+                relwidth=1.0, width=-indent,
+                height=self.row_heights[row['kind']] - self.row_gap,
+            )
+
+        if total <= height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._top / total, (self._top + height) / total)
+
+    def _acquire(self, kind: str):
+        pool = self._pool.setdefault(kind, [])
+        return pool.pop() if pool else self.create_row(self.viewport, kind)
+
+    def _release(self, index: int) -> None:
+        widget = self._visible.pop(index)
+        widget.place_forget()
+        self._pool.setdefault(self._rows[index]['kind'], []).append(widget)
+
+    # ─────────────────────────────────────────────────────────────────
+    # Scrolling
+    # ─────────────────────────────────────────────────────────────────
+
+    def _scroll_by(self, pixels: int) -> None:
+        self._top += pixels
+        self._layout()
+
+    def _on_scrollbar(self, *args) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * self._offsets[-1])
+            self._layout()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            step = self.viewport.winfo_height() if args[2] == "pages" else self.WHEEL_STEP
+            self._scroll_by(amount * step)
+
+    @classmethod
+    def _dispatch_wheel(cls, event) -> None:
+        """Global wheel handler: scrolls the list the event's widget belongs to."""
+        path = str(event.widget)
+        for vlist in list(cls._instances):
+            own = str(vlist)
+            # Compare path components: ".!virtuallist" must not match ".!virtuallist2"
+            if path == own or path.startswith(own + "."):
+                vlist._on_wheel(event)
+                return
+
+    def _on_wheel(self, event) -> None:
+        try:
+            if not self.winfo_exists():
+                return
+        except Exception:
+            return  # Event for a widget that is already destroyed
+        if getattr(event, "num", None) == 4:
+            notches = -1
+        elif getattr(event, "num", None) == 5:
+            notches = 1
+        else:
+            notches = -1 if event.delta > 0 else 1
+        self._scroll_by(notches * self.WHEEL_STEP)
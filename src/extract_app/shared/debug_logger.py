@@ -1,59 +1,239 @@
 # --------------------------------------------------------------------------------
 # Project: ExtractPDF-EPUB
 # File: src/extract_app/shared/debug_logger.py
-# Version: 1.1.0
+# Version: 2.0.0
 # Author: Antigravity
-# Description: Enhanced logger with UI callback support (Observer pattern).
+# Description: Queue-backed logger with UI support.
+#              log() only checks the level, appends to an in-memory ring buffer
+#              and enqueues the line; a background writer keeps the log file
+#              open and prints to the console. The UI polls the ring buffer at
+#              a fixed frame rate (get_since) instead of being called per line.
 # --------------------------------------------------------------------------------
 
 import sys
+import time
+import queue
+import atexit
+import threading
+import itertools
+from collections import deque
 from pathlib import Path
-from typing import Callable, List
+from typing import Callable, List, Optional, Tuple
 
 LOG_FILE = Path("ui_test_log.txt")
 
-# List of callback functions to notify on new log message
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+RING_SIZE = 2000  # Records kept in memory for the UI
+
+# (sequence, created, level, message)
+LogRecord = Tuple[int, float, int, str]
+
+_level = INFO
+_ring: "deque[LogRecord]" = deque(maxlen=RING_SIZE)
+_ring_lock = threading.Lock()
+_seq = itertools.count(1)
+_last_seq = 0
+
+_queue: "queue.Queue" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+# Called from the writer thread, one call per message (prefer get_since for UI)
 _listeners: List[Callable[[str], None]] = []
 
+
+# ─────────────────────────────────────────────────────────────────────
+# Levels
+# ─────────────────────────────────────────────────────────────────────
+
+def set_level(level) -> None:
+    """Sets the minimum level logged (an int or a name such as "DEBUG")."""
+    global _level
+    if isinstance(level, str):
+        level = {name: value for value, name in LEVEL_NAMES.items()}.get(level.upper(), INFO)
+    _level = level
+
+
+def is_enabled(level: int) -> bool:
+    """Cheap check for callers that build expensive messages."""
+    return level >= _level
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Logging
+# ─────────────────────────────────────────────────────────────────────
+
+def log(msg: str, *args, level: int = INFO):
+    """
+    Logs a message: ring buffer (UI), console and file (background writer).
+
+    Args:
+        msg:   Message, or a %-format string when `args` are given
+               (only formatted if the level is enabled).
+        level: DEBUG, INFO, WARNING or ERROR.
+    """
+    if level < _level:
+        return
+    global _last_seq
+    try:
+        if args:
+            msg = msg % args
+        created = time.time()
+        with _ring_lock:
+            seq = next(_seq)
+            _ring.append((seq, created, level, msg))
+            _last_seq = seq
+        _ensure_writer()
+        _queue.put(("write", msg))
+    except Exception as e:
+        print(f"!! LOGGING ERROR: {e}")
+
+
+def debug(msg: str, *args):
+    if DEBUG >= _level:
+        log(msg, *args, level=DEBUG)
+
+
+def info(msg: str, *args):
+    log(msg, *args, level=INFO)
+
+
+def warning(msg: str, *args):
+    log(msg, *args, level=WARNING)
+
+
+def error(msg: str, *args):
+    log(msg, *args, level=ERROR)
+
+
+def get_since(seq: int) -> Tuple[int, List[LogRecord]]:
+    """
+    Records newer than sequence number *seq* still in the ring buffer.
+
+    Returns:
+        (latest sequence number, records in order). Pass the returned number
+        back on the next call.
+    """
+    with _ring_lock:
+        if not _ring or _last_seq <= seq:
+            return max(seq, _last_seq), []
+        first_seq = _ring[0][0]
+        start = max(0, seq + 1 - first_seq)
+        return _last_seq, list(itertools.islice(_ring, start, None))
+
+
 def register_listener(callback: Callable[[str], None]):
-    """Register a function to be called when a log message is emitted."""
+    """Register a function called (on the writer thread) for every message."""
     if callback not in _listeners:
         _listeners.append(callback)
 
+
 def unregister_listener(callback: Callable[[str], None]):
     """Unregister a listener."""
     if callback in _listeners:
         _listeners.remove(callback)
 
-def log(msg: str):
-    """
-    Logs a message to stdout, appends it to file, and notifies listeners.
-    """
+
+def clear_log():
+    """Clears the log file."""
+    _ensure_writer()
+    _queue.put(("clear", None))
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Waits until every queued message has been written. Returns False on timeout."""
+    if _writer is None:
+        return True
+    done = threading.Event()
+    _queue.put(("flush", done))
+    return done.wait(timeout)
+
+
+def shutdown() -> None:
+    """Writes pending messages and closes the file (registered with atexit)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.is_alive():
+        _queue.put(("stop", None))
+        writer.join(timeout=5.0)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Background writer
+# ─────────────────────────────────────────────────────────────────────
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="debug-logger", daemon=True)
+            _writer.start()
+
+
+def _print(msg: str) -> None:
     try:
-        # 1. Print to console (handle encoding issues gently)
-        try:
-            print(f"[LOG] {msg}")
-        except UnicodeEncodeError:
-            # Handle surrogates and other unprintable chars safely
-            safe_msg = msg.encode(sys.stdout.encoding or 'utf-8', errors='backslashreplace').decode(sys.stdout.encoding or 'utf-8')
-            print(f"[LOG] {safe_msg}")
-            
-        # 2. Append to file
-        with open(LOG_FILE, "a", encoding="utf-8", errors="backslashreplace") as f:
-            f.write(f"{msg}\n")
-            
-        # 3. Notify Listeners (UI)
-        for listener in _listeners:
+        print(f"[LOG] {msg}")
+    except UnicodeEncodeError:
+        # Handle surrogates and other unprintable chars safely
+        encoding = sys.stdout.encoding or 'utf-8'
+        print(f"[LOG] {msg.encode(encoding, errors='backslashreplace').decode(encoding)}")
+
+
+def _write_loop() -> None:
+    handle = None
+    path = None
+    while True:
+        command, payload = _queue.get()
+        batch = [(command, payload)]
+        try:  # Drain whatever else is queued so the file is written in one go
+            while True:
+                batch.append(_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        for command, payload in batch:
             try:
-                listener(msg)
+                if command == "write":
+                    _print(payload)
+                    if handle is None or path != LOG_FILE:
+                        if handle is not None:
+                            handle.close()
+                        path = LOG_FILE
+                        handle = open(path, "a", encoding="utf-8", errors="backslashreplace")
+                    handle.write(f"{payload}\n")
+                    for listener in list(_listeners):
+                        try:
+                            listener(payload)
+                        except Exception as e:
+                            print(f"!! LISTENER ERROR: {e}")
+                elif command == "clear":
+                    if handle is not None:
+                        handle.close()
+                        handle = None
+                    if LOG_FILE.exists():
+                        with open(LOG_FILE, "w", encoding="utf-8") as f:
+                            f.write("=== LOG STARTED ===\n")
+                elif command == "flush":
+                    if handle is not None:
+                        handle.flush()
+                    payload.set()
+                elif command == "stop":
+                    if handle is not None:
+                        handle.close()
+                    return
             except Exception as e:
-                print(f"!! LISTENER ERROR: {e}")
-                
-    except Exception as e:
-        print(f"!! LOGGING ERROR: {e}")
+                print(f"!! LOGGING ERROR: {e}")
 
-def clear_log():
-    """Clears the log file."""
-    if LOG_FILE.exists():
-        with open(LOG_FILE, "w", encoding="utf-8") as f:
-            f.write("=== LOG STARTED ===\n")
+        if handle is not None:
+            try:
+                handle.flush()
+            except Exception:
+                pass
+
+
+atexit.register(shutdown)
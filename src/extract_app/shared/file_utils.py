@@ -0,0 +1,22 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/shared/file_utils.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Small filesystem helpers shared by the book saver and the webview
+#              generator (incremental rebuilds rewrite only changed files).
+# --------------------------------------------------------------------------------
+
+from pathlib import Path
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Writes *text* unless the file already holds exactly that. Returns True if written."""
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
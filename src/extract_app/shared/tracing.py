@@ -0,0 +1,208 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: src/extract_app/shared/tracing.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Lightweight tracing spans exported as Chrome trace JSON
+#              (open in chrome://tracing or https://ui.perfetto.dev).
+#              When tracing is disabled, span() returns a shared no-op object
+#              and @traced functions only pay one flag check.
+#
+#              Usage:
+#                with tracing.span("cloud.generate", model=name):
+#                    ...
+#                @tracing.traced("parse.pdf")
+#                def parse_pdf(...): ...
+# --------------------------------------------------------------------------------
+
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_EVENTS = 500_000  # Later spans are counted but not kept
+
+_enabled = False
+_output_path: Optional[Path] = None
+_origin_ns = time.perf_counter_ns()
+_events: List[Tuple[str, int, int, int, Dict[str, Any]]] = []  # (name, start_ns, dur_ns, tid, args)
+_thread_names: Dict[int, str] = {}
+_dropped = 0
+_lock = threading.Lock()
+
+
+class _Span:
+    """A timed region; recorded when the `with` block exits."""
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: Dict[str, Any]):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def set(self, **args) -> None:
+        """Adds arguments known only inside the span (e.g. a result size)."""
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _record(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def set(self, **args) -> None:
+        pass
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _record(name: str, start_ns: int, dur_ns: int, args: Dict[str, Any]) -> None:
+    global _dropped
+    if len(_events) >= MAX_EVENTS:
+        _dropped += 1
+        return
+    thread = threading.current_thread()
+    tid = thread.ident or 0
+    if tid not in _thread_names:
+        _thread_names[tid] = thread.name
+    _events.append((name, start_ns, dur_ns, tid, args))  # list.append is atomic
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Public API
+# ─────────────────────────────────────────────────────────────────────
+
+def span(name: str, **args):
+    """
+    Context manager timing a region.
+
+    Args:
+        name: Span name; the part before the first '.' becomes the category.
+        args: Extra values shown in the trace viewer (keep them small).
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name: str = None):
+    """Decorator wrapping every call of the function in a span (default name: qualname)."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(output_path=None) -> None:
+    """
+    Starts recording spans.
+
+    Args:
+        output_path: If given, the trace is written there at exit (see `save`).
+    """
+    global _enabled, _output_path
+    if output_path:
+        _output_path = Path(output_path)
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def reset() -> None:
+    """Drops all recorded spans."""
+    global _dropped, _origin_ns
+    with _lock:
+        _events.clear()
+        _thread_names.clear()
+        _dropped = 0
+        _origin_ns = time.perf_counter_ns()
+
+
+def to_chrome_trace() -> Dict[str, Any]:
+    """Recorded spans as a Chrome trace-event document."""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        names = dict(_thread_names)
+        dropped = _dropped
+    trace_events = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+        for tid, thread_name in names.items()
+    ]
+    for name, start_ns, dur_ns, tid, args in events:
+        trace_events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start_ns - _origin_ns) / 1000.0,
+            "dur": dur_ns / 1000.0,
+            "pid": pid,
+            "tid": tid,
+            "args": {k: v if isinstance(v, (int, float, bool)) or v is None else str(v) for k, v in args.items()},
+        })
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": {"dropped_spans": dropped}}
+
+
+def export(path) -> Path:
+    """Writes the trace to *path* and returns it."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(), f, ensure_ascii=False)
+    return path
+
+
+def save() -> Optional[Path]:
+    """Writes the trace to the path given to `enable` (if any spans were recorded)."""
+    if _output_path is None or not _events:
+        return None
+    try:
+        return export(_output_path)
+    except OSError as e:
+        print(f"[Tracing] Could not write trace: {e}")
+        return None
+
+
+atexit.register(save)
+
+# EXTRACT_TRACE=/path/trace.json traces any entry point (GUI, scripts, tests).
+# Spawned helper processes must not inherit it: their atexit save() would
+# overwrite the parent's trace file (see LocalServerClient.ensure_server).
+TRACE_ENV = "EXTRACT_TRACE"
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
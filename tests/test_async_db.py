@@ -0,0 +1,70 @@
+import threading
+
+from src.extract_app.modules.ui.async_db import AsyncDB
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() queues callbacks for the test to run."""
+
+    def __init__(self):
+        self.pending = []
+        self.alive = True
+        self._lock = threading.Lock()
+
+    def after(self, ms, func):
+        with self._lock:
+            self.pending.append(func)
+
+    def winfo_exists(self):
+        return self.alive
+
+    def drain(self, async_db):
+        async_db._executor.shutdown(wait=True)
+        for func in self.pending:
+            func()
+
+
+def test_result_delivered_through_after():
+    async_db = AsyncDB(db_manager=None)
+    widget = FakeWidget()
+    results = []
+    async_db.call(widget, "books", lambda x: x * 2, 21, on_result=results.append)
+    widget.drain(async_db)
+    assert results == [42]
+
+
+def test_newer_request_with_same_key_supersedes_older():
+    async_db = AsyncDB(db_manager=None, max_workers=1)
+    widget = FakeWidget()
+    gate = threading.Event()
+    results = []
+    async_db.call(widget, "books", lambda: gate.wait(5) and "old", on_result=results.append)
+    async_db.call(widget, "books", lambda: "new", on_result=results.append)
+    async_db.call(widget, "other", lambda: "other", on_result=results.append)
+    gate.set()
+    widget.drain(async_db)
+    assert results == ["new", "other"]
+
+
+def test_cancel_and_destroyed_owner_drop_results():
+    async_db = AsyncDB(db_manager=None, max_workers=1)
+    widget, closed = FakeWidget(), FakeWidget()
+    gate = threading.Event()
+    results = []
+    async_db.call(widget, "a", lambda: gate.wait(5) and "a", on_result=results.append)
+    async_db.call(closed, "b", lambda: "b", on_result=results.append)
+    async_db.cancel(widget)
+    closed.alive = False
+    gate.set()
+    widget.drain(async_db)
+    closed.drain(async_db)
+    assert results == []
+
+
+def test_errors_go_to_on_error():
+    async_db = AsyncDB(db_manager=None)
+    widget = FakeWidget()
+    errors = []
+    async_db.call(widget, "x", lambda: 1 / 0, on_result=lambda v: None, on_error=errors.append)
+    widget.drain(async_db)
+    assert isinstance(errors[0], ZeroDivisionError)
@@ -107,6 +107,25 @@ class TestChunkTextParagraphFallback:
         assert all(len(c) > 0 for c in chunks)
 
 
+class TestChunkTextLengthFn:
+    """chunk_size can be measured in tokens via a custom length_fn."""
+
+    def test_token_budget_packs_by_length_fn(self, chunker):
+        def count_words(s):
+            return len(s.split())
+
+        paragraph = "alpha beta gamma delta " * 25  # 100 words, ~575 chars
+        text = "\n\n".join([paragraph.strip()] * 6)
+        chunks = chunker.chunk_text(text, chunk_size=250, length_fn=count_words)
+        assert len(chunks) == 3
+        assert all(count_words(c) <= 250 for c in chunks)
+
+    def test_length_fn_fits_whole_text(self, chunker):
+        text = "x" * 5000
+        result = chunker.chunk_text(text, chunk_size=10, length_fn=lambda s: len(s) // 1000)
+        assert result == [text]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # protect_anchors
 # ─────────────────────────────────────────────────────────────────────────────
@@ -194,6 +213,13 @@ class TestRestoreAnchors:
         restored = chunker.restore_anchors(mutated_text, mapping)
         assert "[Image: y.png]" in restored
 
+    def test_literal_img_text_kept_when_placeholders_survive(self, chunker):
+        """The relaxed pattern only runs for placeholders that went missing."""
+        mapping = {"__IMG_012__": "[Image: z.jpg]"}
+        text = "See IMG 12 in the caption __IMG_012__"
+        restored = chunker.restore_anchors(text, mapping)
+        assert restored == "See IMG 12 in the caption [Image: z.jpg]"
+
     def test_roundtrip_protect_then_restore(self, chunker):
         """Full roundtrip: protect → translate (no-op here) → restore."""
         original = "Intro [Image: fig1.jpg] middle [Image: fig2.png] end"
@@ -0,0 +1,101 @@
+import pytest
+
+from src.extract_app.core.database import DatabaseManager
+
+
+def _node(title, text, children=None):
+    return {"title": title, "content": [("text", text)], "children": children or []}
+
+
+def _edition(intro_text="Intro text", body_text="Boars root in forests."):
+    return [
+        _node("Chapter 1", "Chapter one", [_node("Intro", intro_text), _node("Body", body_text)]),
+        _node("Chapter 2", "Chapter two"),
+    ]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "test.db"))
+
+
+def _articles(db, book_id):
+    details = db.get_book_details(book_id)
+    return {a["subtitle"]: a for ch in details["chapters"] for a in ch["articles"]}
+
+
+def test_reimport_keeps_unchanged_translations_without_duplicates(db):
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition())
+    before = _articles(db, book_id)
+    db.update_article_translation(before["Intro"]["id"], "Gioi thieu", "translated")
+    db.update_article_translation(before["Body"]["id"], "Than bai", "translated")
+
+    again = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition(body_text="Wild boars root."))
+    assert again == book_id
+    assert db.last_import_stats == {"added": 0, "updated": 1, "unchanged": 3, "removed": 0}
+
+    after = _articles(db, book_id)
+    assert len(db.get_book_details(book_id)["chapters"]) == 2
+    assert after["Intro"]["id"] == before["Intro"]["id"]
+    assert after["Intro"]["status"] == "translated"
+    assert after["Intro"]["translation_text"] == "Gioi thieu"
+    # Changed article keeps its row and old translation but is queued again
+    assert after["Body"]["id"] == before["Body"]["id"]
+    assert after["Body"]["status"] == "new"
+    assert db.get_article_content(after["Body"]["id"]) == "Wild boars root."
+
+
+def test_reimport_removes_dropped_nodes(db):
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition())
+    db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition()[:1])
+    assert db.last_import_stats["removed"] == 1
+    assert [ch["title"] for ch in db.get_book_details(book_id)["chapters"]] == ["Chapter 1"]
+
+
+def test_webview_data_includes_text_translation_and_images(db):
+    edition = _edition()
+    edition[1]["content"].append(("image", {"anchor": "/tmp/boar.png", "caption": "Boar"}))
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", edition)
+    intro = _articles(db, book_id)["Intro"]
+    db.update_article_translation(intro["id"], "Gioi thieu", "translated")
+
+    chapters = db.get_book_webview_data(book_id)
+    assert [ch["title"] for ch in chapters] == ["Chapter 1", "Chapter 2"]
+    assert [a["subtitle"] for a in chapters[0]["articles"]] == ["Chapter 1", "Intro", "Body"]
+    assert chapters[0]["articles"][1]["translation_text"] == "Gioi thieu"
+    assert chapters[1]["articles"][0]["images"] == ["/tmp/boar.png"]
+
+
+def test_article_summary_matches_book_details_row(db):
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition())
+    intro = _articles(db, book_id)["Intro"]
+    db.update_article_translation(intro["id"], "Gioi thieu", "translated")
+    summary = db.get_article_summary(intro["id"])
+    assert summary["status"] == "translated" and summary["translation_text"] == "Gioi thieu"
+    assert summary["chapter_id"] and summary["subtitle"] == "Intro"
+    assert db.get_article_summary(-1) is None
+
+
+def test_articles_content_bulk_lookup(db):
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition())
+    articles = _articles(db, book_id)
+    ids = [a["id"] for a in articles.values()]
+    contents = db.get_articles_content(ids + [999999])
+    assert set(contents) == set(ids)
+    assert contents[articles["Body"]["id"]] == db.get_article_content(articles["Body"]["id"])
+    assert db.get_articles_content([]) == {}
+
+
+def test_reimport_matches_rows_stored_without_fingerprint(db):
+    book_id = db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition())
+    intro = _articles(db, book_id)["Intro"]
+    db.update_article_translation(intro["id"], "Gioi thieu", "translated")
+    conn = db._get_connection()
+    conn.execute("UPDATE articles SET fingerprint = NULL")
+    conn.commit()
+    conn.close()
+
+    db.save_book_batch("Boars", "A", "/books/boars.pdf", "", _edition(body_text="Wild boars root."))
+    assert db.last_import_stats == {"added": 0, "updated": 1, "unchanged": 3, "removed": 0}
+    after = _articles(db, book_id)
+    assert after["Intro"]["id"] == intro["id"] and after["Intro"]["status"] == "translated"
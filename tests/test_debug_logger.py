@@ -0,0 +1,47 @@
+import pytest
+
+from src.extract_app.shared import debug_logger
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_logger, "LOG_FILE", tmp_path / "log.txt")
+    debug_logger.set_level(debug_logger.INFO)
+    yield debug_logger
+    debug_logger.flush()
+    debug_logger.set_level(debug_logger.INFO)
+
+
+def test_messages_reach_file_and_ring_buffer_in_order(logger):
+    seq, _ = logger.get_since(0)
+    for i in range(50):
+        logger.log("line %d", i)
+    assert logger.flush()
+
+    seq, records = logger.get_since(seq)
+    assert [r[3] for r in records] == [f"line {i}" for i in range(50)]
+    assert logger.get_since(seq) == (seq, [])
+    assert logger.LOG_FILE.read_text(encoding="utf-8").splitlines() == [f"line {i}" for i in range(50)]
+
+
+def test_disabled_level_is_not_formatted_or_recorded(logger):
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted although DEBUG is disabled")
+
+    seq, _ = logger.get_since(0)
+    logger.debug("value %s", Exploding())
+    assert logger.get_since(seq)[1] == []
+
+    logger.set_level("DEBUG")
+    logger.debug("shown %s", 1)
+    assert [r[3] for r in logger.get_since(seq)[1]] == ["shown 1"]
+
+
+def test_ring_buffer_keeps_latest_records(logger):
+    seq, _ = logger.get_since(0)
+    for i in range(logger.RING_SIZE + 10):
+        logger.info("n%d", i)
+    _, records = logger.get_since(seq)
+    assert len(records) == logger.RING_SIZE
+    assert records[-1][3] == f"n{logger.RING_SIZE + 9}"
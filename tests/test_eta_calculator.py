@@ -1,5 +1,5 @@
 import pytest
-from src.extract_app.core.eta_calculator import calculate_book_eta
+from src.extract_app.core.eta_calculator import calculate_book_eta, ThroughputModel
 
 def test_calculate_book_eta_empty():
     """Test with empty chapters list."""
@@ -92,3 +92,45 @@ def test_calculate_book_eta_zero_wpm():
     ]
     assert calculate_book_eta(chapters, wpm=0) == "N/A"
     assert calculate_book_eta(chapters, wpm=-10) == "N/A"
+
+
+def _trained_model(overhead=5.0, per_word=0.01, model="m"):
+    tm = ThroughputModel()
+    for words in (500, 1000, 1500, 2000, 800, 1200):
+        tm.observe("cloud", model, words, overhead + per_word * words)
+    return tm
+
+def test_throughput_model_recovers_overhead_and_per_word_cost():
+    fit = _trained_model().fit("cloud", "m")
+    assert fit["overhead"] == pytest.approx(5.0, rel=1e-3)
+    assert fit["per_word"] == pytest.approx(0.01, rel=1e-3)
+
+def test_throughput_model_falls_back_to_engine_then_none():
+    tm = _trained_model()
+    assert tm.fit("cloud", "unseen-model") is not None
+    assert tm.fit("local", "m") is None
+    assert tm.estimate("local", "m", [1000]) is None
+
+def test_throughput_model_estimate_scales_with_workers():
+    tm = _trained_model()
+    serial, low, high = tm.estimate("cloud", "m", [1000] * 4)
+    parallel = tm.estimate("cloud", "m", [1000] * 4, workers=2)[0]
+    assert serial == pytest.approx(4 * (5.0 + 10.0), rel=1e-2)
+    assert parallel == pytest.approx(serial / 2, rel=1e-2)
+    assert low <= serial <= high
+
+def test_throughput_model_roundtrip_and_bad_input():
+    tm = _trained_model()
+    restored = ThroughputModel.from_dict(tm.to_dict())
+    assert restored.fit("cloud", "m")["per_word"] == pytest.approx(0.01, rel=1e-2)
+    assert ThroughputModel.from_dict("").to_dict() == {}
+
+def test_calculate_book_eta_uses_throughput_range():
+    chapters = [{"articles": [{"word_count": 6000, "status": "new", "is_leaf": 1}]}]
+    tm = ThroughputModel()
+    for i in range(10):
+        tm.observe("cloud", "m", 1000 + 100 * (i % 3), 60 + 10 * (i % 2))
+    text = calculate_book_eta(chapters, wpm=6000, engine="cloud", throughput=tm, model="m")
+    assert text.startswith("~") and "(Cloud, " in text and "–" in text
+    # Unknown engine data: WPM fallback unchanged
+    assert calculate_book_eta(chapters, wpm=6000, engine="local", throughput=tm) == "~1m (Local)"
@@ -298,5 +298,52 @@ class TestRelevantGlossaryString(unittest.TestCase):
         self.assertIn("wild boar", result)
 
 
+class TestRankedRelevantTerms(unittest.TestCase):
+    """Tests for find_relevant_terms() — capping, ranking and memoization."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.gm = GlossaryManager(data_path=str(Path(self.tmp) / "g.json"))
+        self.gm.bulk_add_terms({
+            "sow": "lợn nái",
+            "wild boar": "lợn rừng",
+            "snout": "mõm",
+            "habitat": "môi trường sống",
+        })
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_frequency_ranking_most_frequent_first(self):
+        text = "The snout. A sow, another sow and a third sow near the wild boar."
+        pairs = self.gm.find_relevant_terms(text, ranking="frequency")
+        self.assertEqual([en for en, _ in pairs], ["sow", "wild boar", "snout"])
+
+    def test_length_ranking_longest_first(self):
+        text = "The sow and the wild boar rooted with a snout."
+        pairs = self.gm.find_relevant_terms(text, ranking="length")
+        self.assertEqual(pairs[0][0], "wild boar")
+
+    def test_max_terms_caps_result(self):
+        text = "sow sow sow snout wild boar"
+        pairs = self.gm.find_relevant_terms(text, max_terms=2, ranking="frequency")
+        self.assertEqual(len(pairs), 2)
+        self.assertEqual(pairs[0][0], "sow")
+
+    def test_quoted_format_matches_active_string(self):
+        result = self.gm.get_relevant_glossary_string("the habitat", quoted=True)
+        self.assertEqual(result, "'habitat' → 'môi trường sống'")
+
+    def test_memoized_string_invalidated_on_change(self):
+        first = self.gm.get_active_glossary_string()
+        self.assertIs(first, self.gm.get_active_glossary_string())
+        version = self.gm.version
+        self.gm.add_term("tusk", "răng nanh")
+        self.assertGreater(self.gm.version, version)
+        self.assertIn("tusk", self.gm.get_active_glossary_string())
+        self.assertEqual(self.gm.find_relevant_terms("a long tusk"), [("tusk", "răng nanh")])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+
+import pytest
+
+from src.extract_app.core import local_server
+from src.extract_app.core.local_server import LocalInferenceServer, LocalServerClient
+
+
+class FakeEngine:
+    """Stands in for a loaded LocalGenAI slot."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prefix_cache_enabled = True
+        self.last_usage = {}
+        self.unloaded = False
+        self.barrier = None  # Shared by slots to prove generations overlap
+
+    def load_model(self, model_path, **kwargs):
+        pass
+
+    def count_tokens(self, text, special=False):
+        return len(text.split())
+
+    def generate_response(self, system_instruction, prompt, max_tokens=4096,
+                          temperature=0.15, stop=None, on_token=None, should_stop=None):
+        time.sleep(self.delay)
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)  # Raises unless another slot is generating too
+        if self.unloaded:
+            raise RuntimeError("engine was unloaded during generation")
+        pieces = [w + " " for w in prompt.upper().split()]
+        for piece in pieces:
+            if on_token:
+                on_token(piece)
+            if should_stop and should_stop():
+                return None
+        self.last_usage = {"completion_tokens": len(pieces)}
+        return "".join(pieces)
+
+    def unload_model(self):
+        self.unloaded = True
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    authkey = b"0123456789abcdef"
+    srv = LocalInferenceServer(0, authkey, n_slots=2, idle_timeout=0)
+    for _ in range(2):
+        engine = FakeEngine(delay=0.2)
+        srv._engines.append(engine)
+        srv._slots.put(engine)
+    srv._model_path = "fake.gguf"
+
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    assert srv.ready.wait(5)
+
+    state = tmp_path / "local_server.json"
+    state.write_text(json.dumps({"port": srv.address[1], "authkey": authkey.hex()}))
+    monkeypatch.setattr(local_server, "get_state_path", lambda: state)
+
+    yield srv
+    srv._shutdown()
+    thread.join(5)
+
+
+def test_ping_reports_loaded_model(server):
+    info = LocalServerClient().ping()
+    assert info["model_path"] == "fake.gguf"
+    assert info["slots"] == 2
+
+
+def test_generate_streams_tokens_and_usage(server):
+    client = LocalServerClient()
+    pieces = []
+    text = client.generate_response("", "hello big world", on_token=pieces.append)
+    assert text == "HELLO BIG WORLD"
+    assert pieces == ["HELLO ", "BIG ", "WORLD "]
+    assert client.last_usage["completion_tokens"] == 3
+
+
+def test_usage_is_returned_per_call(server):
+    client = LocalServerClient()
+    results = {}
+
+    def run(prompt):
+        results[prompt] = client.generate_with_usage("", prompt)
+
+    threads = [threading.Thread(target=run, args=(p,)) for p in ("one", "two words", "three more words")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    for prompt, (text, usage) in results.items():
+        assert text == prompt.upper()
+        assert usage["completion_tokens"] == len(prompt.split())
+
+
+def test_concurrent_requests_use_parallel_slots(server):
+    client = LocalServerClient()
+    results = [None, None]
+    barrier = threading.Barrier(2)
+    for engine in server._engines:
+        engine.barrier = barrier
+
+    def run(i):
+        results[i] = client.generate_response("", f"chunk {i}")
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    # Each generation waited at the barrier for the other one: they overlapped
+    assert results == ["CHUNK 0", "CHUNK 1"]
+    assert not barrier.broken
+
+
+def test_reload_waits_for_inflight_generation(server, monkeypatch):
+    monkeypatch.setattr(local_server, "LocalGenAI", FakeEngine)
+    old_engines = list(server._engines)
+    result = []
+    worker = threading.Thread(target=lambda: result.append(
+        LocalServerClient().generate_response("", "still running")))
+    worker.start()
+    time.sleep(0.05)  # Generation holds a slot now
+
+    server._load("other.gguf", 0)
+    worker.join(5)
+
+    assert result == ["STILL RUNNING"]
+    assert all(engine.unloaded for engine in old_engines)
+    assert server._slots.qsize() == server.requested_slots
+    assert LocalServerClient().generate_response("", "new model") == "NEW MODEL"
+
+
+def test_ping_without_server_returns_none(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_server, "get_state_path", lambda: tmp_path / "missing.json")
+    assert LocalServerClient().ping() is None
+
+
+@pytest.mark.skipif(not hasattr(local_server.os, "fchmod"), reason="POSIX permissions only")
+def test_state_file_is_private(tmp_path, monkeypatch):
+    state = tmp_path / "run" / "local_server.json"
+    state.parent.mkdir()
+    state.write_text("{}")
+    state.chmod(0o644)
+    monkeypatch.setattr(local_server, "get_state_path", lambda: state)
+    local_server.write_state(1234, "ab" * 16)
+    assert state.stat().st_mode & 0o777 == 0o600
+    assert json.loads(state.read_text())["port"] == 1234
+
+
+def test_client_restarts_server_after_idle_exit(server, monkeypatch):
+    monkeypatch.setattr(local_server, "LocalGenAI", FakeEngine)
+    client = LocalServerClient()
+    client.load_model("fake.gguf", n_gpu_layers=0)
+    assert client.generate_response("", "before exit") == "BEFORE EXIT"
+
+    server._shutdown()  # Same as the idle watchdog firing
+    time.sleep(0.2)
+    spawned = []
+
+    def fake_popen(cmd, env=None, **kwargs):
+        # Stand-in for the detached server process: same authkey, published state file
+        srv = LocalInferenceServer(0, bytes.fromhex(env[local_server.AUTHKEY_ENV]), n_slots=1, idle_timeout=0)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        assert srv.ready.wait(5)
+        local_server.write_state(srv.address[1], env[local_server.AUTHKEY_ENV])
+        spawned.append(srv)
+
+    monkeypatch.setattr(local_server.subprocess, "Popen", fake_popen)
+    try:
+        assert client.generate_response("", "after exit") == "AFTER EXIT"
+        assert len(spawned) == 1
+        assert spawned[0]._model_path == "fake.gguf"
+        assert client.model_loaded
+    finally:
+        for srv in spawned:
+            srv._shutdown()
+
+
+def test_spawned_server_does_not_inherit_trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_server, "get_state_path", lambda: tmp_path / "local_server.json")
+    monkeypatch.setenv("EXTRACT_TRACE", str(tmp_path / "trace.json"))
+    envs = []
+    monkeypatch.setattr(local_server.subprocess, "Popen", lambda cmd, env=None, **kwargs: envs.append(env))
+    with pytest.raises(TimeoutError):
+        LocalServerClient().ensure_server(timeout=0.1)
+    assert "EXTRACT_TRACE" not in envs[0]
+    assert local_server.AUTHKEY_ENV in envs[0]
@@ -0,0 +1,77 @@
+import urllib.request
+
+import pytest
+
+from src.extract_app.core.metrics import MetricsRegistry, RateMeter, classify_error
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry(prefix="t_")
+
+
+def test_prometheus_text_format(registry):
+    chunks = registry.counter("chunks_total", "Chunks", ("engine", "model"))
+    latency = registry.histogram("latency_seconds", "Latency", ("engine",), buckets=(1, 5))
+    chunks.inc(engine="cloud", model='gemini "pro"')
+    chunks.inc(2, engine="cloud", model='gemini "pro"')
+    for value in (0.5, 3, 7):
+        latency.observe(value, engine="local")
+
+    text = registry.to_prometheus()
+    assert "# TYPE t_chunks_total counter" in text
+    assert 't_chunks_total{engine="cloud",model="gemini \\"pro\\""} 3' in text
+    assert 't_latency_seconds_bucket{engine="local",le="1"} 1' in text
+    assert 't_latency_seconds_bucket{engine="local",le="5"} 2' in text
+    assert 't_latency_seconds_bucket{engine="local",le="+Inf"} 3' in text
+    assert 't_latency_seconds_sum{engine="local"} 10.5' in text
+    assert 't_latency_seconds_count{engine="local"} 3' in text
+
+
+def test_counter_value_and_histogram_stats(registry):
+    retries = registry.counter("retries_total", "Retries", ("engine", "reason"))
+    retries.inc(engine="cloud", reason="429")
+    retries.inc(engine="cloud", reason="timeout")
+    retries.inc(engine="local", reason="429")
+    assert retries.value() == 3
+    assert retries.value(reason="429") == 2
+    assert retries.value(engine="cloud", reason="429") == 1
+
+    latency = registry.histogram("lat", "Latency", buckets=(1, 2, 5))
+    for value in [0.5] * 9 + [4]:
+        latency.observe(value)
+    assert latency.stats() == {"count": 10, "mean": pytest.approx(0.85), "p90": 1}
+
+
+def test_rate_meter_uses_sliding_window():
+    meter = RateMeter(window_seconds=300)
+    meter.add(600, now=0)
+    meter.add(600, now=120)
+    assert meter.per_minute(now=120) == pytest.approx(600)  # 1200 words over 2 min
+    assert meter.per_minute(now=400) == pytest.approx(120)  # First event left the window
+    assert meter.per_minute(now=1000) == 0
+
+
+@pytest.mark.parametrize("error, reason", [
+    ("429 Resource has been exhausted (e.g. check quota).", "429"),
+    ("404 models/x is not found", "404"),
+    ("Deadline Exceeded", "timeout"),
+    ("socket timed out", "timeout"),
+    ("empty response", "other"),
+])
+def test_classify_error(error, reason):
+    assert classify_error(error) == reason
+
+
+def test_http_endpoint_and_textfile(registry, tmp_path):
+    registry.counter("up", "Up").inc()
+    registry.write_textfile(tmp_path / "m.prom")
+    assert "t_up 1" in (tmp_path / "m.prom").read_text(encoding="utf-8")
+
+    server = registry.serve(0)
+    try:
+        port = server.server_port
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        assert "t_up 1" in body
+    finally:
+        server.shutdown()
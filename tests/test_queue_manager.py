@@ -134,3 +134,101 @@ def test_stop_aborts_queue(queue_manager):
     queue_manager.stop()
     assert queue_manager.status == QueueStatus.IDLE
     assert len(queue_manager.pending_ids) == 0
+
+def test_stop_is_forwarded_to_translation(queue_manager, mock_deps):
+    ts, db, sm = mock_deps
+    seen = {}
+
+    def fake_translate(content, **kwargs):
+        seen.update(kwargs)
+        kwargs["progress_callback"](1, 2, "streaming")
+        return "Translated Text"
+
+    ts.translate_text.side_effect = fake_translate
+    queue_manager.on_progress = Mock()
+    queue_manager.enqueue(ChapterQueueItem(1, "S1", 100, "C1"))
+    queue_manager.start()
+    if queue_manager._worker_thread:
+        queue_manager._worker_thread.join(timeout=2.0)
+
+    assert seen["should_stop"]() is False
+    queue_manager.on_progress.assert_called_once_with(1, 1, 2, "streaming")
+
+def test_multiple_workers_translate_concurrently(mock_deps):
+    ts, db, sm = mock_deps
+    in_flight = []
+    peak = [0]
+
+    def slow_translate(content, **kwargs):
+        in_flight.append(content)
+        peak[0] = max(peak[0], len(in_flight))
+        time.sleep(0.2)
+        in_flight.remove(content)
+        return "Translated Text"
+
+    ts.translate_text.side_effect = slow_translate
+    on_queue_done = Mock()
+    qm = ChapterQueueManager(ts, db, sm, on_queue_done=on_queue_done, workers=3)
+    for i in range(6):
+        qm.enqueue(ChapterQueueItem(i, f"S{i}", 100, f"C{i}"))
+    qm.start()
+    assert qm.join(timeout=3.0)
+
+    assert peak[0] == 3
+    assert db.update_article_translation.call_count == 6
+    assert qm.done_count == 6
+    on_queue_done.assert_called_once()
+    assert qm.status == QueueStatus.IDLE
+
+def test_glossary_savings_are_counted_per_call(mock_deps):
+    ts, db, sm = mock_deps
+
+    def fake_translate(content, stats=None, **kwargs):
+        time.sleep(0.05)
+        stats["glossary_tokens_saved"] = int(content[1:])
+        return "Translated Text"
+
+    ts.translate_text.side_effect = fake_translate
+    qm = ChapterQueueManager(ts, db, sm, workers=3)
+    for i in range(1, 7):
+        qm.enqueue(ChapterQueueItem(i, f"S{i}", 100, f"C{i}"))
+    qm.start()
+    assert qm.join(timeout=3.0)
+    assert qm.glossary_tokens_saved == sum(range(1, 7))
+
+def test_content_is_read_when_the_item_is_translated(mock_deps):
+    ts, db, sm = mock_deps
+    db.get_article_content.side_effect = lambda article_id: "" if article_id == 2 else f"C{article_id}"
+    qm = ChapterQueueManager(ts, db, sm)
+    qm.enqueue(ChapterQueueItem(1, "S1", 100))
+    qm.enqueue(ChapterQueueItem(2, "S2", 0))
+    qm.start()
+    assert qm.join(timeout=3.0)
+
+    assert ts.translate_text.call_count == 1
+    assert ts.translate_text.call_args[0][0] == "C1"
+    db.update_article_translation.assert_called_once_with(1, "Translated Text", "translated")
+
+def test_items_enqueued_after_a_lull_keep_all_workers(mock_deps):
+    ts, db, sm = mock_deps
+    in_flight = []
+    peak = [0]
+
+    def slow_translate(content, **kwargs):
+        in_flight.append(content)
+        peak[0] = max(peak[0], len(in_flight))
+        time.sleep(1.0 if content == "C0" else 0.3)
+        in_flight.remove(content)
+        return "Translated Text"
+
+    ts.translate_text.side_effect = slow_translate
+    qm = ChapterQueueManager(ts, db, sm, workers=3)
+    qm.enqueue(ChapterQueueItem(0, "S0", 100, "C0"))
+    qm.start()
+    time.sleep(0.7)  # Idle workers have seen an empty queue by now
+    for i in range(1, 4):
+        qm.enqueue(ChapterQueueItem(i, f"S{i}", 100, f"C{i}"))
+    assert qm.join(timeout=5.0)
+
+    assert peak[0] == 3
+    assert db.update_article_translation.call_count == 4
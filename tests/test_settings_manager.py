@@ -0,0 +1,25 @@
+import json
+import threading
+
+from src.extract_app.core.settings_manager import SettingsManager
+
+
+def test_concurrent_sets_keep_file_valid(tmp_path):
+    path = tmp_path / "settings.json"
+    settings = SettingsManager(str(path))
+    settings.set_api_key("secret")
+
+    def worker(i):
+        for n in range(20):
+            settings.set(f"key_{i}", n)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["gemini_api_key"] == "secret"
+    assert all(data[f"key_{i}"] == 19 for i in range(4))
+    assert not list(tmp_path.glob(".settings-*"))
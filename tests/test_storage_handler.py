@@ -0,0 +1,96 @@
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from src.extract_app.core.storage_handler import save_as_folders, IMAGE_CACHE_NAME
+
+
+@pytest.fixture
+def images(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    paths = []
+    for i in range(3):
+        path = src / f"img{i}.png"
+        Image.new("RGB", (32, 32), (i * 80, 0, 0)).save(path)
+        paths.append(str(path))
+    broken = src / "broken.png"
+    broken.write_bytes(b"not an image")
+    paths.append(str(broken))
+    return paths
+
+
+def _book(images):
+    return [
+        {"title": "One", "content": [("text", "a"), ("image", {"anchor": images[0]}),
+                                     ("image", {"anchor": images[1]})], "children": []},
+        {"title": "Two", "content": [("image", {"anchor": images[0]}),  # duplicate of One/image_000
+                                     ("image", {"anchor": images[3]})], "children": []},
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_images_converted_and_anchors_match(tmp_path, images, workers):
+    ok, book_dir = save_as_folders(_book(images), tmp_path, "book", image_workers=workers)
+    assert ok
+    one = tmp_path / "book" / "01 - One"
+    two = tmp_path / "book" / "02 - Two"
+    assert (one / "image_000.webp").exists() and (one / "image_001.webp").exists()
+    assert (two / "image_000.webp").read_bytes() == (one / "image_000.webp").read_bytes()
+    # Broken image falls back to a plain copy and its anchor is patched
+    assert (two / "image_001.png").exists()
+    text = (two / "content.txt").read_text(encoding="utf-8")
+    assert "[Image Anchor: image_001.png]" in text
+    assert "image_001.webp" not in text
+
+
+def test_resave_skips_unchanged_images(tmp_path, images):
+    save_as_folders(_book(images), tmp_path, "book", image_workers=1)
+    webp = tmp_path / "book" / "01 - One" / "image_000.webp"
+    assert (tmp_path / "book" / IMAGE_CACHE_NAME).exists()
+    webp.write_bytes(b"marker")  # Would be overwritten by a re-conversion
+
+    save_as_folders(_book(images), tmp_path, "book", image_workers=1)
+    assert webp.read_bytes() == b"marker"
+
+
+def test_resave_prunes_removed_nodes_and_keeps_unchanged_text(tmp_path):
+    book = [{"title": "One", "content": [("text", "a")], "children": []},
+            {"title": "Two", "content": [("text", "b")], "children": []}]
+    save_as_folders(book, tmp_path, "book", image_workers=1)
+    content = tmp_path / "book" / "01 - One" / "content.txt"
+    mtime = content.stat().st_mtime_ns
+
+    save_as_folders(book[:1], tmp_path, "book", image_workers=1)
+    assert content.stat().st_mtime_ns == mtime
+    assert not (tmp_path / "book" / "02 - Two").exists()
+
+
+def test_resave_keeps_folders_it_did_not_write(tmp_path):
+    book = [{"title": "One", "content": [("text", "a")], "children": []},
+            {"title": "Two", "content": [("text", "b")], "children": []}]
+    save_as_folders(book, tmp_path, "book", image_workers=1, original_path="/a/book.pdf")
+    (tmp_path / "book" / "07 - My notes").mkdir()  # User's own numbered folder
+
+    # Another source with the same title stem: nothing of the first save is pruned
+    save_as_folders(book[:1], tmp_path, "book", image_workers=1, original_path="/b/book.epub")
+    assert (tmp_path / "book" / "02 - Two").exists()
+
+    save_as_folders(book[:1], tmp_path, "book", image_workers=1, original_path="/b/book.epub")
+    assert (tmp_path / "book" / "07 - My notes").exists()
+    assert (tmp_path / "book" / "02 - Two").exists()
+
+
+def test_folder_and_db_writers_share_one_pass(tmp_path, images):
+    from src.extract_app.core.database import DatabaseManager
+
+    db = DatabaseManager(str(tmp_path / "lib.db"))
+    progress = []
+    ok, _ = save_as_folders(_book(images), tmp_path, "book", progress_callback=lambda p, m: progress.append(p),
+                            db_manager=db, original_path="/books/book.pdf", image_workers=1)
+    assert ok
+    assert progress[-1] == pytest.approx(1.0)
+    book = db.get_all_books()[0]
+    articles = [a for ch in db.get_book_details(book["id"])["chapters"] for a in ch["articles"]]
+    assert [a["subtitle"] for a in articles] == ["One", "Two"]
+    assert db.get_article_images(articles[0]["id"])[0]["path"] == images[0]
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from src.extract_app.core.thumbnail_cache import ThumbnailCache
+
+
+@pytest.fixture
+def cover(tmp_path):
+    path = tmp_path / "cover.jpg"
+    Image.new("RGB", (800, 1200), (10, 20, 30)).save(path)
+    return path
+
+
+def test_thumbnail_is_resized_and_persisted(tmp_path, cover):
+    cache = ThumbnailCache(tmp_path / "thumbs", size=(40, 44))
+    thumb = cache.get(str(cover))
+    assert thumb.size == (40, 44)
+    files = list((tmp_path / "thumbs").glob("*.png"))
+    assert len(files) == 1
+
+    # A fresh cache (new session) reads the stored file instead of decoding the cover:
+    # corrupt the cover but keep its size and mtime, so the key is unchanged
+    stat = cover.stat()
+    cover.write_bytes(b"\0" * stat.st_size)
+    os.utime(cover, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    fresh = ThumbnailCache(tmp_path / "thumbs", size=(40, 44))
+    assert fresh.get(str(cover)).size == (40, 44)
+
+def test_modified_cover_gets_new_thumbnail_and_prune_drops_old(tmp_path, cover):
+    cache = ThumbnailCache(tmp_path / "thumbs", size=(40, 44))
+    first_key = cache.key_for(str(cover))
+    cache.get(str(cover))
+
+    Image.new("RGB", (600, 600), (200, 0, 0)).save(cover)
+    stat = cover.stat()
+    os.utime(cover, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.key_for(str(cover)) != first_key
+    assert cache.get(str(cover)).getpixel((0, 0))[0] > 150
+
+    assert cache.prune([str(cover)]) == 1
+    assert [p.stem for p in (tmp_path / "thumbs").glob("*.png")] == [cache.key_for(str(cover))]
+
+
+def test_missing_or_unreadable_cover(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    assert cache.get("") is None
+    assert cache.get(str(tmp_path / "nope.jpg")) is None
+    bad = tmp_path / "bad.jpg"
+    bad.write_bytes(b"not an image")
+    assert cache.get(str(bad)) is None
+
+
+def test_get_without_create_only_returns_existing_thumbnails(tmp_path, cover):
+    cache = ThumbnailCache(tmp_path / "thumbs", size=(40, 44))
+    assert cache.get(str(cover), create=False) is None
+    assert not (tmp_path / "thumbs").exists()
+    cache.get(str(cover))
+    fresh = ThumbnailCache(tmp_path / "thumbs", size=(40, 44))
+    assert fresh.get(str(cover), create=False).size == (40, 44)
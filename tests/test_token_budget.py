@@ -0,0 +1,61 @@
+# --------------------------------------------------------------------------------
+# Project: ExtractPDF-EPUB
+# File: tests/test_token_budget.py
+# Version: 1.0.0
+# Author: Antigravity
+# Description: Unit tests for TokenEstimator and chunk_token_budget.
+#              Run with: pytest tests/test_token_budget.py -v
+# --------------------------------------------------------------------------------
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from extract_app.core.token_budget import (
+    TokenEstimator,
+    chunk_token_budget,
+    MIN_CHUNK_TOKENS,
+)
+
+
+class TestTokenEstimator:
+
+    def test_count_uses_chars_per_token(self):
+        est = TokenEstimator(chars_per_token=4.0)
+        assert est.count("") == 0
+        assert est.count("abcd") == 1
+        assert est.count("abcde") == 2
+
+    def test_observe_prompt_moves_towards_observation(self):
+        est = TokenEstimator(chars_per_token=4.0, smoothing=0.5)
+        est.observe_prompt(chars=3000, tokens=1000)  # 3 chars/token observed
+        assert est.chars_per_token == 3.5
+
+    def test_observe_output_moves_towards_observation(self):
+        est = TokenEstimator(output_ratio=1.0, smoothing=0.5)
+        est.observe_output(source_tokens=100, output_tokens=200)
+        assert est.output_ratio == 1.5
+
+    def test_invalid_observations_ignored(self):
+        est = TokenEstimator(chars_per_token=4.0, output_ratio=1.4)
+        est.observe_prompt(0, 100)
+        est.observe_output(100, 0)
+        assert est.chars_per_token == 4.0
+        assert est.output_ratio == 1.4
+
+
+class TestChunkTokenBudget:
+
+    def test_shared_context_reserves_prompt_and_output(self):
+        # 4096 * 0.9 = 3686.4 usable; minus 686 reserved = 3000.4; / (1 + 1.5) = 1200
+        budget = chunk_token_budget(4096, 686, 1.5, shared_context=True)
+        assert budget == 1200
+        assert 686 + budget + budget * 1.5 <= 4096
+
+    def test_output_only_limit(self):
+        budget = chunk_token_budget(8192, 0, 2.0, shared_context=False, safety_margin=0.0)
+        assert budget == 4096
+
+    def test_never_below_minimum(self):
+        assert chunk_token_budget(1024, 5000, 1.4) == MIN_CHUNK_TOKENS
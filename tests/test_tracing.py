@@ -0,0 +1,62 @@
+import json
+import threading
+
+import pytest
+
+from src.extract_app.shared import tracing
+
+
+@pytest.fixture
+def trace():
+    tracing.reset()
+    tracing.enable()
+    yield tracing
+    tracing.disable()
+    tracing.reset()
+
+
+def test_disabled_spans_record_nothing():
+    tracing.disable()
+    tracing.reset()
+    with tracing.span("x.y", a=1) as span:
+        span.set(b=2)
+
+    @tracing.traced("x.fn")
+    def fn():
+        return 3
+
+    assert fn() == 3
+    assert [e for e in tracing.to_chrome_trace()["traceEvents"] if e["ph"] == "X"] == []
+
+
+def test_spans_export_as_chrome_trace(trace, tmp_path):
+    @trace.traced("parse.work")
+    def work():
+        with trace.span("parse.inner", pages=3) as span:
+            span.set(found=2)
+
+    work()
+    worker = threading.Thread(target=work, name="worker")
+    worker.start()
+    worker.join()
+    with pytest.raises(ValueError):
+        with trace.span("cloud.generate"):
+            raise ValueError("boom")
+
+    doc = json.loads(trace.export(tmp_path / "trace.json").read_text(encoding="utf-8"))
+    spans = [e for e in doc["traceEvents"] if e["ph"] == "X"]
+    assert [s["name"] for s in spans] == ["parse.inner", "parse.work"] * 2 + ["cloud.generate"]
+    inner, outer = spans[0], spans[1]
+    assert inner["cat"] == "parse" and inner["args"] == {"pages": 3, "found": 2}
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert spans[2]["tid"] != spans[0]["tid"]
+    assert spans[4]["args"] == {"error": "ValueError"}
+    names = {e["args"]["name"] for e in doc["traceEvents"] if e["ph"] == "M"}
+    assert "worker" in names
+
+
+def test_pipeline_functions_are_traced(trace):
+    from src.extract_app.core.chunking_strategy import ChunkingStrategy
+
+    ChunkingStrategy().chunk_text("Một câu. Hai câu.", 5)
+    assert [e["name"] for e in trace.to_chrome_trace()["traceEvents"] if e["ph"] == "X"] == ["translate.chunk"]
@@ -8,6 +8,7 @@
 
 import unittest
 from unittest.mock import MagicMock, patch
+import os
 import sys
 from pathlib import Path
 
@@ -110,6 +111,216 @@ class TestLocalPromptStrictness(unittest.TestCase):
         self.assertIn("Markdown", prompt)
 
 
+class _FakeLlama:
+    """Minimal llama_cpp.Llama stand-in that records evaluated tokens."""
+
+    def __init__(self):
+        self.evaluated = 0
+        self.loaded_states = 0
+        self.input_ids = []
+
+    def n_ctx(self):
+        return 4096
+
+    def tokenize(self, data, add_bos=True, special=False):
+        return ([1] if add_bos else []) + list(data.split())
+
+    def reset(self):
+        self.input_ids = []
+
+    def eval(self, tokens):
+        self.evaluated += len(tokens)
+        self.input_ids = list(tokens)
+
+    def save_state(self):
+        return list(self.input_ids)
+
+    def load_state(self, state):
+        self.loaded_states += 1
+        self.input_ids = list(state)
+
+    def __call__(self, prompt, stream=False, **kwargs):
+        if stream:
+            return iter({"choices": [{"text": piece}]} for piece in ["Xin", " chào", " bạn"])
+        return {"choices": [{"text": "ok"}], "usage": {"completion_tokens": 1}}
+
+
+class TestLocalPrefixCache(unittest.TestCase):
+    """Tests for LocalGenAI instruction-prefix KV-cache reuse."""
+
+    def setUp(self):
+        from extract_app.core.local_genai import LocalGenAI
+        self.engine = LocalGenAI()
+        self.engine._llm = _FakeLlama()
+        self.engine._model_path = "fake.gguf"
+
+    def test_prefix_evaluated_once_for_same_instruction(self):
+        self.engine.generate_response("rules A", "chunk one")
+        evaluated = self.engine._llm.evaluated
+        self.engine.generate_response("rules A", "chunk two")
+        self.assertEqual(self.engine._llm.evaluated, evaluated)
+        self.assertGreater(self.engine.last_usage["cached_prefix_tokens"], 0)
+
+    def test_switching_instruction_restores_saved_state(self):
+        self.engine.generate_response("rules A", "chunk")
+        self.engine.generate_response("rules B", "chunk")
+        self.engine.generate_response("rules A", "chunk")
+        self.assertEqual(self.engine._llm.loaded_states, 1)
+
+    def test_lru_evicts_oldest_prefix(self):
+        for i in range(self.engine.MAX_PREFIX_STATES + 2):
+            self.engine.generate_response(f"rules {i}", "chunk")
+        self.assertEqual(len(self.engine._prefix_states), self.engine.MAX_PREFIX_STATES)
+
+    def test_cache_is_bounded_by_state_bytes(self):
+        from types import SimpleNamespace
+        big = self.engine.MAX_PREFIX_STATE_BYTES // 2 + 1
+        self.engine._llm.save_state = lambda: SimpleNamespace(
+            scores=SimpleNamespace(nbytes=big), input_ids=None, llama_state_size=0)
+        self.engine._llm.load_state = lambda state: None
+        for i in range(3):
+            self.engine.generate_response(f"rules {i}", "chunk")
+        self.assertEqual(len(self.engine._prefix_states), 1)  # Only the newest fits
+
+    def test_disabled_cache_reports_no_reuse(self):
+        self.engine.prefix_cache_enabled = False
+        self.engine.generate_response("rules A", "chunk")
+        self.assertEqual(self.engine.last_usage["cached_prefix_tokens"], 0)
+        self.assertEqual(self.engine._llm.evaluated, 0)
+
+
+class TestLocalStreaming(unittest.TestCase):
+    """Tests for LocalGenAI streamed generation and early abort."""
+
+    def setUp(self):
+        from extract_app.core.local_genai import LocalGenAI
+        self.engine = LocalGenAI()
+        self.engine._llm = _FakeLlama()
+        self.engine._model_path = "fake.gguf"
+
+    def test_generate_stream_yields_pieces(self):
+        pieces = list(self.engine.generate_stream("rules", "hello"))
+        self.assertEqual(pieces, ["Xin", " chào", " bạn"])
+        self.assertEqual(self.engine.last_usage["completion_tokens"], 3)
+
+    def test_completion_tokens_counted_from_text_not_pieces(self):
+        class _MergingLlama(_FakeLlama):
+            """Streams multi-token text as one piece, like merged UTF-8 bytes."""
+            def __call__(self, prompt, stream=False, **kwargs):
+                return iter([{"choices": [{"text": "Xin chào bạn"}]}])
+
+        self.engine._llm = _MergingLlama()
+        self.assertEqual(list(self.engine.generate_stream("rules", "hello")), ["Xin chào bạn"])
+        self.assertEqual(self.engine.last_usage["completion_tokens"], 3)
+
+    def test_on_token_receives_pieces_and_full_text_returned(self):
+        received = []
+        result = self.engine.generate_response("rules", "hello", on_token=received.append)
+        self.assertEqual(received, ["Xin", " chào", " bạn"])
+        self.assertEqual(result, "Xin chào bạn")
+
+    def test_should_stop_aborts_generation(self):
+        received = []
+        result = self.engine.generate_response(
+            "rules", "hello", on_token=received.append, should_stop=lambda: len(received) >= 2
+        )
+        self.assertIsNone(result)
+        self.assertEqual(len(received), 2)
+
+
+class _DraftingLlama(_FakeLlama):
+    """Fake Llama that runs two drafting rounds and emits 7 tokens."""
+
+    def __init__(self, draft):
+        super().__init__()
+        self.draft = draft
+
+    def __call__(self, prompt, stream=False, **kwargs):
+        self.draft(None)
+        self.draft(None)
+        return {"choices": [{"text": "ok"}], "usage": {"completion_tokens": 7}}
+
+
+class TestSpeculativeDecodingStats(unittest.TestCase):
+    """Tests for draft acceptance accounting in LocalGenAI."""
+
+    def setUp(self):
+        from extract_app.core.local_genai import LocalGenAI, _CountingDraftModel
+        self.engine = LocalGenAI()
+        self.engine._model_path = "fake.gguf"
+        # Drafter proposing 4 tokens per round
+        self.draft = _CountingDraftModel(lambda ids, **kw: [0, 0, 0, 0])
+
+    def test_accepted_tokens_derived_from_rounds(self):
+        self.engine._llm = _DraftingLlama(self.draft)
+        self.engine._draft = self.draft
+        self.engine.generate_response("rules", "chunk")
+        self.assertEqual(self.engine.last_usage["draft_proposed"], 8)
+        self.assertEqual(self.engine.last_usage["draft_accepted"], 5)
+
+    def test_no_draft_counters_without_drafting(self):
+        self.engine._llm = _FakeLlama()
+        self.engine._draft = self.draft
+        self.engine.generate_response("rules", "chunk")
+        self.assertNotIn("draft_proposed", self.engine.last_usage)
+
+
+class TestResidentModels(unittest.TestCase):
+    """Tests for LocalGenAI load profiles and the resident-model LRU."""
+
+    def setUp(self):
+        import tempfile
+        from extract_app.core import local_genai
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name in ("a.gguf", "b.gguf", "c.gguf"):
+            path = os.path.join(self.tmp.name, name)
+            with open(path, "wb") as f:
+                f.write(b"gguf")
+            self.paths.append(path)
+
+        self.created = []
+
+        def fake_llama(**kwargs):
+            self.created.append(kwargs)
+            return _FakeLlama()
+
+        patcher = patch.object(local_genai, "Llama", side_effect=fake_llama)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.engine = local_genai.LocalGenAI()
+
+    def test_switching_back_reuses_resident_model(self):
+        self.engine.load_model(self.paths[0])
+        self.engine.load_model(self.paths[1])
+        self.engine.load_model(self.paths[0])
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.engine._model_path, self.paths[0])
+
+    def test_lru_limits_resident_models(self):
+        self.engine.max_resident_models = 2
+        for path in self.paths:
+            self.engine.load_model(path)
+        self.assertEqual(self.engine.resident_models, self.paths[1:])
+
+    def test_profile_is_passed_to_llama(self):
+        from extract_app.core.local_genai import LoadProfile
+        profile = LoadProfile(n_ctx=2048, n_threads=3, n_batch=256, use_mlock=True, kv_cache_type="q8_0")
+        self.engine.load_model(self.paths[0], profile=profile)
+        kwargs = self.created[-1]
+        self.assertEqual((kwargs["n_ctx"], kwargs["n_threads"], kwargs["n_batch"]), (2048, 3, 256))
+        self.assertTrue(kwargs["use_mlock"])
+        self.assertEqual(kwargs["type_k"], 8)
+        self.assertEqual(self.engine.n_ctx, 4096)  # _FakeLlama reports its own context
+
+    def test_quantized_kv_requires_flash_attn(self):
+        from extract_app.core.local_genai import LoadProfile
+        kwargs = LoadProfile(kv_cache_type="q4_0", flash_attn=False).to_llama_kwargs()
+        self.assertEqual(kwargs["type_v"], 1)
+
+
 class TestAnchorProtection(unittest.TestCase):
     """Tests for anchor protection and restoration pipeline."""
 
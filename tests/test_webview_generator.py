@@ -0,0 +1,110 @@
+import json
+
+from src.extract_app.core.webview_generator import generate_webview, build_search_index, fold_text
+
+
+def _chapters(n_articles, text="Boars dig for roots. " * 200):
+    return [{"title": "Chapter 1", "articles": [
+        {"id": i, "subtitle": f"Article {i}", "content_text": text, "translation_text": "Lợn rừng"}
+        for i in range(n_articles)
+    ]}]
+
+
+def _manifest(webview_dir):
+    raw = (webview_dir / "data" / "manifest.js").read_text(encoding="utf-8")
+    return json.loads(raw[len("window.bookManifest = "):].rstrip().rstrip(";"))
+
+
+def test_manifest_holds_toc_only_and_text_goes_to_shards(tmp_path):
+    index = generate_webview("Book", "Author", _chapters(3), tmp_path)
+    webview_dir = index.parent
+    manifest = _manifest(webview_dir)
+    entry = manifest["chapters"][0]["articles"][1]
+    assert entry["subtitle"] == "Article 1" and entry["key"] == "a1"
+    assert "Boars" not in (webview_dir / "data" / "manifest.js").read_text(encoding="utf-8")
+    shard = (webview_dir / "data" / "shards" / "a1.js").read_text(encoding="utf-8")
+    assert shard.startswith('window.__onShard("a1", ') and "Lợn rừng" in shard
+    assert "bookData = window.bookManifest" in (webview_dir / "js" / "app.js").read_text(encoding="utf-8")
+
+
+def test_manifest_size_independent_of_text_and_stale_shards_removed(tmp_path):
+    small = generate_webview("Book", "Author", _chapters(2, "x"), tmp_path / "s").parent
+    large = generate_webview("Book", "Author", _chapters(2), tmp_path / "l").parent
+    size = lambda d: (d / "data" / "manifest.js").stat().st_size
+    assert size(small) == size(large)
+
+    generate_webview("Book", "Author", _chapters(1), tmp_path / "l")
+    assert sorted(p.name for p in (large / "data" / "shards").iterdir()) == ["a0.js"]
+
+
+def test_rebuild_rewrites_only_changed_shards_and_images(tmp_path):
+    image = tmp_path / "boar.png"
+    image.write_bytes(b"png")
+    chapters = _chapters(3)
+    chapters[0]["articles"][2]["images"] = [str(image)]
+    webview_dir = generate_webview("Book", "Author", chapters, tmp_path / "out").parent
+    shards = webview_dir / "data" / "shards"
+    copied = tmp_path / "out" / "images" / "boar.png"
+    assert copied.read_bytes() == b"png"
+
+    for shard in shards.iterdir():
+        shard.write_text("marker", encoding="utf-8")  # Detects rewrites
+    copied.unlink()
+    chapters[0]["articles"][1]["translation_text"] = "Lợn rừng đào rễ"
+    generate_webview("Book", "Author", chapters, tmp_path / "out")
+
+    assert (shards / "a0.js").read_text(encoding="utf-8") == "marker"
+    assert "đào rễ" in (shards / "a1.js").read_text(encoding="utf-8")
+    assert not copied.exists()  # Article 2 unchanged: its images are not touched
+
+
+def test_search_index_folds_diacritics_and_delta_encodes_postings():
+    assert fold_text("Lợn Rừng ĐÀO") == "lon rung dao"
+    chapters = [{"title": "C", "articles": [
+        {"subtitle": "Boar", "content_text": "wild [Image: pic.png]", "translation_text": "Lợn rừng"},
+        {"subtitle": "Deer", "content_text": "forest", "translation_text": ""},
+        {"subtitle": "Rừng", "content_text": "", "translation_text": "rừng sâu"},
+    ]}]
+    index = build_search_index(chapters)
+    assert index["docs"] == [[0, 0], [0, 1], [0, 2]]
+    assert index["terms"] == sorted(index["terms"]) and "png" not in index["terms"]
+    assert index["postings"][index["terms"].index("rung")] == [0, 2]  # docs 0 and 2
+
+
+def test_search_index_written_as_lazy_asset(tmp_path):
+    webview_dir = generate_webview("Book", "Author", _chapters(1), tmp_path).parent
+    assert (webview_dir / "data" / "search.js").read_text(encoding="utf-8").startswith("window.__onSearchIndex(")
+    assert "search.js" not in (webview_dir / "index.html").read_text(encoding="utf-8")
+
+
+def test_search_index_retokenizes_only_changed_articles(tmp_path, monkeypatch):
+    from src.extract_app.core import webview_generator
+    chapters = _chapters(3)
+    webview_dir = generate_webview("Book", "Author", chapters, tmp_path).parent
+    search = webview_dir / "data" / "search.js"
+    first = search.read_text(encoding="utf-8")
+
+    calls = []
+    real_tokens = webview_generator._tokens
+    monkeypatch.setattr(webview_generator, "_tokens", lambda text: calls.append(text) or real_tokens(text))
+
+    search.write_text("marker", encoding="utf-8")
+    generate_webview("Book", "Author", chapters, tmp_path)
+    assert calls == [] and search.read_text(encoding="utf-8") == "marker"  # Nothing changed
+
+    chapters[0]["articles"][1]["translation_text"] = "Lợn rừng đào rễ"
+    generate_webview("Book", "Author", chapters, tmp_path)
+    assert len(calls) == 1
+    rebuilt = search.read_text(encoding="utf-8")
+    assert rebuilt != first and "dao" in rebuilt
+
+
+def test_search_index_version_in_manifest_changes_with_text(tmp_path):
+    chapters = _chapters(2)
+    webview_dir = generate_webview("Book", "Author", chapters, tmp_path).parent
+    first = _manifest(webview_dir)["search"]
+    assert first and "search.js?v=${version}" in (webview_dir / "js" / "app.js").read_text(encoding="utf-8")
+
+    chapters[0]["articles"][0]["translation_text"] = "Lợn rừng đào rễ"
+    generate_webview("Book", "Author", chapters, tmp_path)
+    assert _manifest(webview_dir)["search"] not in (None, first)